@@ -0,0 +1,230 @@
+import logging
+import os
+import tarfile
+import threading
+from pathlib import Path
+from bout_install.SourceCache import file_lock
+from bout_install.SourceCache import get_default_cache_dir
+from bout_install.SourceCache import parse_size
+
+
+class ArtifactCache(object):
+    """
+    Class for caching the installed files of packages
+
+    Each artifact is a compressed tar file of the files a package added to
+    the installation directory, stored under the build key of the package
+    (see `Installer.get_build_key`).
+    When the cache grows beyond its maximum size, the least recently used
+    artifacts are evicted.
+    Artifacts are only added, opened and evicted under a lock file, as the
+    cache may be used by several installations at once.
+
+    Examples
+    --------
+    >>> from bout_install.ArtifactCache import ArtifactCache
+    >>>
+    >>> cache = ArtifactCache('/tmp/artifacts', max_size=2**30)
+    >>> cache.put(build_key, local_dir, ['lib/libfftw3.a'])
+    >>> # In another installation with the same build key
+    >>> found = cache.get(build_key, local_dir)
+    """
+
+    def __init__(self, cache_dir, max_size):
+        """
+        Sets the cache directory and maximum size
+
+        Parameters
+        ----------
+        cache_dir : Path or str
+            The directory of the cache
+        max_size : int
+            The maximum size of the cache in bytes
+        """
+
+        self.cache_dir = Path(cache_dir).absolute()
+        self.max_size = max_size
+
+        self.lock_path = self.cache_dir.joinpath('artifacts.lock')
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.logger = logging.getLogger('bout_install')
+
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+        self._lock = threading.Lock()
+
+    def get_artifact_path(self, build_key):
+        """
+        Returns the path of an artifact
+
+        Parameters
+        ----------
+        build_key : str
+            The build key of the package
+
+        Returns
+        -------
+        artifact_path : Path
+            The path of the artifact in the cache
+        """
+
+        return self.cache_dir.joinpath(f'{build_key}.tar.gz')
+
+    def contains(self, build_key):
+        """
+        Returns whether the artifact of build_key is in the cache
+
+        Parameters
+        ----------
+        build_key : str
+            The build key of the package
+
+        Returns
+        -------
+        found : bool
+            Whether the artifact is in the cache
+        """
+
+        return self.get_artifact_path(build_key).is_file()
+
+    def get(self, build_key, extract_dir):
+        """
+        Unpacks the artifact of build_key into extract_dir
+
+        Notes
+        -----
+        The paths in the artifact are relative to the installation directory.
+        Installers unpack into their staging directory, and promote the
+        files into the installation directory once unpacked
+
+        Parameters
+        ----------
+        build_key : str
+            The build key of the package
+        extract_dir : Path
+            The directory to unpack into
+
+        Returns
+        -------
+        found : bool
+            Whether the artifact was found in the cache
+        """
+
+        artifact_path = self.get_artifact_path(build_key)
+
+        # NOTE: An opened artifact can be read even if it is evicted
+        with file_lock(self.lock_path, self._lock):
+            if not artifact_path.is_file():
+                self.misses += 1
+                return False
+            # Mark the artifact as recently used
+            os.utime(artifact_path)
+            self.hits += 1
+            artifact_file = artifact_path.open('rb')
+
+        with artifact_file, tarfile.open(fileobj=artifact_file) as tar:
+            tar.extractall(path=extract_dir)
+
+        self.logger.info(f'Unpacked {artifact_path.name} from the artifact '
+                         f'cache')
+        return True
+
+    def put(self, build_key, local_dir, paths):
+        """
+        Packs files of local_dir into the artifact of build_key
+
+        Parameters
+        ----------
+        build_key : str
+            The build key of the package
+        local_dir : Path
+            The installation directory
+        paths : list
+            The paths of the files to pack, relative to local_dir
+        """
+
+        artifact_path = self.get_artifact_path(build_key)
+        part_path = artifact_path.with_name(f'{artifact_path.name}.'
+                                            f'{os.getpid()}.'
+                                            f'{threading.get_ident()}.part')
+
+        with tarfile.open(part_path, 'w:gz', compresslevel=6) as tar:
+            for path in sorted(paths):
+                tar.add(Path(local_dir).joinpath(path),
+                        arcname=path,
+                        recursive=False)
+
+        if part_path.stat().st_size > self.max_size:
+            part_path.unlink()
+            return
+
+        with file_lock(self.lock_path, self._lock):
+            part_path.replace(artifact_path)
+            self.stored += 1
+            self._evict()
+
+        self.logger.info(f'Stored {len(paths)} files in the artifact cache '
+                         f'as {artifact_path.name}')
+
+    def _evict(self):
+        """
+        Removes the least recently used artifacts until the cache fits
+        """
+
+        artifacts = sorted(self.cache_dir.glob('*.tar.gz'),
+                           key=lambda path: path.stat().st_mtime)
+        total = sum(path.stat().st_size for path in artifacts)
+
+        for artifact_path in artifacts:
+            if total <= self.max_size:
+                break
+            total -= artifact_path.stat().st_size
+            artifact_path.unlink()
+            self.logger.info(f'Evicted {artifact_path.name} from the '
+                             f'artifact cache')
+
+    def get_summary(self):
+        """
+        Returns a summary of the cache usage of this run
+
+        Returns
+        -------
+        summary : str
+            The number of hits, misses and stored artifacts
+        """
+
+        return (f'Artifact cache: {self.hits} hits, {self.misses} misses, '
+                f'{self.stored} stored')
+
+
+def get_artifact_cache(config):
+    """
+    Returns the artifact cache configured by the cache section
+
+    Parameters
+    ----------
+    config : configparser.ConfigParser
+        The configuration
+
+    Returns
+    -------
+    artifact_cache : None or ArtifactCache
+        The artifact cache. None if the cache is disabled
+    """
+
+    cache_dir = config.get('cache', 'artifact_cache_dir', fallback='')
+    max_size = parse_size(config.get('cache',
+                                     'artifact_cache_size',
+                                     fallback='0'))
+
+    if max_size == 0:
+        return None
+
+    if cache_dir == '':
+        cache_dir = get_default_cache_dir().joinpath('artifacts')
+
+    return ArtifactCache(cache_dir, max_size)
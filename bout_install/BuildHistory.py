@@ -0,0 +1,372 @@
+import datetime
+import json
+import os
+import statistics
+import threading
+import time
+from pathlib import Path
+from bout_install.Scheduler import get_critical_paths
+from bout_install.SourceCache import get_default_cache_dir
+
+
+class BuildHistory(object):
+    """
+    Class for keeping the durations of the builds across installations
+
+    After each run, the phases which were run (rather than skipped or taken
+    from a cache) are stored per package, version, build options and number
+    of cores of the host.
+    The durations of a package are predicted from the median of its most
+    similar builds, falling back to builds of other options, core counts or
+    versions when the package has not been built like this before.
+
+    Examples
+    --------
+    >>> from bout_install.BuildHistory import BuildHistory
+    >>>
+    >>> history = BuildHistory('build_history.json')
+    >>> history.record([{'package': 'fftw',
+    ...                  'version': '3.3.6-pl2',
+    ...                  'phase': 'make',
+    ...                  'status': 'done',
+    ...                  'seconds': 42.0}])
+    >>> history.predict('fftw', '3.3.6-pl2')
+    42.0
+    """
+
+    def __init__(self, path, max_builds=10, cores=None):
+        """
+        Sets the file storing the history
+
+        Parameters
+        ----------
+        path : Path or str
+            Path to the json file storing the history
+        max_builds : int
+            Number of the most recent builds kept per package, version,
+            options and cores
+        cores : None or int
+            The number of cores of the host. If None, os.cpu_count() is used
+        """
+
+        self.path = Path(path)
+        self.max_builds = max_builds
+        self.cores = cores if cores is not None else os.cpu_count()
+
+        self._lock = threading.Lock()
+
+    def read(self):
+        """
+        Returns the builds stored in the history
+
+        Returns
+        -------
+        builds : list of dict
+            The builds with the keys `package`, `version`, `options`,
+            `cores`, `recorded` and `phases` (the seconds indexed by phase
+            name), the most recent last. Empty if the history can not be read
+        """
+
+        try:
+            with self.path.open() as f:
+                return json.load(f).get('builds', list())
+        except (OSError, ValueError, AttributeError):
+            return list()
+
+    def record(self, records, options=None):
+        """
+        Adds the phases run in an installation to the history
+
+        Parameters
+        ----------
+        records : list of dict
+            The phase records of a timing report (see
+            `bout_install.TimingReport.TimingReport.record`).
+            Only the phases with the status `done` are stored
+        options : None or dict
+            Fingerprints of the build options indexed by package name
+        """
+
+        options = options if options is not None else dict()
+        recorded = datetime.datetime.now().isoformat(timespec='seconds')
+
+        new_builds = dict()
+        for record in records:
+            if record['status'] != 'done' or record['package'] is None:
+                continue
+            package = record['package']
+            build = new_builds.setdefault(
+                package,
+                {'package': package,
+                 'version': record['version'],
+                 'options': options.get(package),
+                 'cores': self.cores,
+                 'recorded': recorded,
+                 'phases': dict()})
+            build['phases'][record['phase']] = \
+                round(build['phases'].get(record['phase'], 0) +
+                      record['seconds'], 3)
+
+        if len(new_builds) == 0:
+            return
+
+        with self._lock:
+            builds = self.read() + list(new_builds.values())
+
+            # Only keep the most recent builds of each key
+            counts = dict()
+            kept = list()
+            for build in reversed(builds):
+                key = (build['package'], build['version'], build['options'],
+                       build['cores'])
+                counts[key] = counts.get(key, 0) + 1
+                if counts[key] <= self.max_builds:
+                    kept.append(build)
+            kept.reverse()
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f'{self.path.name}.{os.getpid()}')
+            with tmp_path.open('w') as f:
+                json.dump({'builds': kept}, f, indent=4)
+            tmp_path.replace(self.path)
+
+    def get_durations(self, package, version, options=None, builds=None):
+        """
+        Returns the predicted durations of the phases of a package
+
+        Notes
+        -----
+        The builds matching the package, version, options and cores are
+        used if any, then the builds of the same version and cores, then of
+        the same version, and finally any build of the package
+
+        Parameters
+        ----------
+        package : str
+            Name of the package
+        version : None or str
+            Version of the package
+        options : None or str
+            Fingerprint of the build options
+        builds : None or list of dict
+            The builds to predict from. If None, the history is read
+
+        Returns
+        -------
+        durations : dict
+            The median seconds of each phase indexed by phase name. Empty if
+            the package has not been built before
+        """
+
+        builds = builds if builds is not None else self.read()
+        builds = [build for build in builds if build['package'] == package]
+
+        query = {'version': version, 'options': options, 'cores': self.cores}
+        tiers = (('version', 'options', 'cores'),
+                 ('version', 'cores'),
+                 ('version',),
+                 ())
+        for keys in tiers:
+            matching = [build for build in builds
+                        if all(build[key] == query[key] for key in keys)]
+            if len(matching) == 0:
+                continue
+            phases = {phase for build in matching for phase in build['phases']}
+            return {phase: statistics.median(build['phases'][phase]
+                                             for build in matching
+                                             if phase in build['phases'])
+                    for phase in sorted(phases)}
+
+        return dict()
+
+    def predict(self, package, version, options=None, builds=None):
+        """
+        Returns the predicted duration of building a package
+
+        Parameters
+        ----------
+        package : str
+            Name of the package
+        version : None or str
+            Version of the package
+        options : None or str
+            Fingerprint of the build options
+        builds : None or list of dict
+            The builds to predict from. If None, the history is read
+
+        Returns
+        -------
+        seconds : None or float
+            The sum of the predicted durations of the phases. None if the
+            package has not been built before
+        """
+
+        durations = self.get_durations(package, version, options, builds)
+        return sum(durations.values()) if len(durations) != 0 else None
+
+
+class Progress(object):
+    """
+    Class for estimating when the installation of a dependency graph ends
+
+    The remaining time is the larger of the longest chain of remaining
+    predicted durations through the graph, and the total of the remaining
+    durations shared by the workers.
+    Running packages count with the part of their prediction which has not
+    elapsed yet, and packages without a prediction count as instant.
+
+    Examples
+    --------
+    >>> from bout_install.BuildHistory import Progress
+    >>>
+    >>> graph = {'mpi': (), 'petsc': ('mpi',)}
+    >>> progress = Progress(graph, {'mpi': 60.0, 'petsc': 300.0})
+    >>> progress.start('mpi')
+    >>> print(progress.get_eta())
+    """
+
+    def __init__(self, graph, predictions, workers=1):
+        """
+        Sets the graph and the predicted durations of its nodes
+
+        Parameters
+        ----------
+        graph : dict
+            Dictionary where the keys are the node names and the values are
+            iterables of the names of the nodes the key depends on
+        predictions : dict
+            The predicted seconds indexed by node name. Nodes without a
+            prediction may be left out
+        workers : int
+            Maximum number of nodes running concurrently
+        """
+
+        self.graph = graph
+        self.predictions = predictions
+        self.workers = max(int(workers), 1)
+
+        self.started = dict()
+        self.finished = set()
+
+        self._lock = threading.Lock()
+
+    def start(self, name):
+        """
+        Marks a node as running
+
+        Parameters
+        ----------
+        name : str
+            Name of the node
+        """
+
+        with self._lock:
+            self.started[name] = time.monotonic()
+
+    def finish(self, name):
+        """
+        Marks a node as finished
+
+        Parameters
+        ----------
+        name : str
+            Name of the node
+        """
+
+        with self._lock:
+            self.finished.add(name)
+
+    def get_remaining_seconds(self):
+        """
+        Returns the estimated seconds until all the nodes have finished
+
+        Returns
+        -------
+        seconds : None or float
+            The estimate. None if no node has a prediction
+        """
+
+        if len(self.predictions) == 0:
+            return None
+
+        now = time.monotonic()
+        remaining = dict()
+        with self._lock:
+            for name in self.graph:
+                prediction = self.predictions.get(name) or 0
+                if name in self.finished:
+                    remaining[name] = 0
+                elif name in self.started:
+                    elapsed = now - self.started[name]
+                    remaining[name] = max(prediction - elapsed, 0)
+                else:
+                    remaining[name] = prediction
+
+        chain = max(get_critical_paths(self.graph, remaining).values(),
+                    default=0)
+        return max(chain, sum(remaining.values()) / self.workers)
+
+    def get_eta(self):
+        """
+        Returns the estimated end of the installation as text
+
+        Returns
+        -------
+        eta : None or str
+            The wall-clock time and the remaining time, e.g.
+            `ETA 14:32 (12m 5s left)`. None if no node has a prediction
+        """
+
+        seconds = self.get_remaining_seconds()
+        if seconds is None:
+            return None
+
+        end = datetime.datetime.now() + datetime.timedelta(seconds=seconds)
+        return f'ETA {end:%H:%M} ({format_seconds(seconds)} left)'
+
+
+def format_seconds(seconds):
+    """
+    Returns a duration in a human readable form
+
+    Parameters
+    ----------
+    seconds : float
+        The duration
+
+    Returns
+    -------
+    formatted : str
+        The duration in hours, minutes and seconds, e.g. `1h 2m` or `12m 5s`
+    """
+
+    seconds = round(seconds)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if hours != 0:
+        return f'{hours}h {minutes}m'
+    if minutes != 0:
+        return f'{minutes}m {seconds}s'
+    return f'{seconds}s'
+
+
+def get_build_history(config):
+    """
+    Returns the build history configured by the cache section
+
+    Parameters
+    ----------
+    config : configparser.ConfigParser
+        The configuration
+
+    Returns
+    -------
+    build_history : BuildHistory
+        The build history
+    """
+
+    history_path = config.get('cache', 'build_history', fallback='')
+    if history_path == '':
+        history_path = get_default_cache_dir().joinpath('build_history.json')
+
+    return BuildHistory(history_path)
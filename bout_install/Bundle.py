@@ -0,0 +1,380 @@
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import tarfile
+import tempfile
+from pathlib import Path
+from bout_install.InstallerUsingGit import InstallerUsingGit
+from bout_install.SourceCache import SourceCache
+
+
+class Bundle(object):
+    """
+    Class for packing the sources of an installation into one archive
+
+    The archive holds the tar files of all the packages, a git bundle of
+    the repositories and a manifest.
+    As the tar files are already compressed, the archive itself is not
+    compressed, so that packing and unpacking is limited by the disk only.
+
+    Examples
+    --------
+    >>> from bout_install.Bundle import Bundle
+    >>>
+    >>> # On a machine with internet access, after fetching the sources
+    >>> Bundle('bout_sources.tar').create(registry, packages)
+    >>> # On a machine without internet access
+    >>> Bundle('bout_sources.tar').extract(registry, packages)
+    """
+
+    manifest_name = 'manifest.json'
+
+    def __init__(self, bundle_path):
+        """
+        Sets the path of the bundle
+
+        Parameters
+        ----------
+        bundle_path : Path or str
+            Path to the bundle archive
+        """
+
+        self.bundle_path = Path(bundle_path).absolute()
+        self.logger = logging.getLogger('bout_install')
+
+    def create(self, registry, packages):
+        """
+        Packs the sources of the packages into the bundle
+
+        Notes
+        -----
+        The sources should already have been fetched.
+        Tar files which are not present (e.g. as they were untarred while
+        downloading without being kept) are fetched again.
+        The extra sources of the installers (like the prerequisites of GCC)
+        and the submodules of the repositories are packed as well, so that
+        nothing needs to be downloaded when installing from the bundle
+
+        Parameters
+        ----------
+        registry : InstallerRegistry
+            The registry of the installers
+        packages : list
+            Names of the packages to bundle
+        """
+
+        manifest = {'versions': dict(registry.config['versions']),
+                    'sources': list(),
+                    'repositories': list()}
+
+        self.bundle_path.parent.mkdir(parents=True, exist_ok=True)
+        part_path = \
+            self.bundle_path.with_name(f'{self.bundle_path.name}.part')
+
+        tmp_dir = tempfile.TemporaryDirectory(dir=self.bundle_path.parent)
+        with tmp_dir as tmp, tarfile.open(part_path, 'w') as tar:
+            for name in packages:
+                installer = registry.get_installer(name)
+                for url in installer.get_source_urls():
+                    if isinstance(installer, InstallerUsingGit):
+                        manifest['repositories'].append(
+                            self.add_repository(tar, Path(tmp), installer,
+                                                url))
+                    else:
+                        manifest['sources'].append(
+                            self.add_source(tar, installer, url))
+                for url in installer.extra_sources.values():
+                    manifest['sources'].append(
+                        self.add_source(tar, installer, url))
+
+            manifest_path = Path(tmp).joinpath(self.manifest_name)
+            with manifest_path.open('w') as f:
+                json.dump(manifest, f, indent=4)
+            tar.add(manifest_path, arcname=self.manifest_name)
+
+        part_path.replace(self.bundle_path)
+
+    def add_source(self, tar, installer, url):
+        """
+        Adds the tar file of a source to the bundle
+
+        Parameters
+        ----------
+        tar : tarfile.TarFile
+            The bundle opened for writing
+        installer : Installer
+            The installer of the source
+        url : str
+            The url of the source
+
+        Returns
+        -------
+        entry : dict
+            The manifest entry of the source
+        """
+
+        source_path = installer.get_tar_file_path(url)
+        if not source_path.is_file():
+            installer.fetch_source(url)
+
+        arcname = f'sources/{source_path.name}'
+        self.logger.info(f'Adding {source_path} to the bundle')
+        tar.add(source_path, arcname=arcname)
+
+        return {'name': installer.name,
+                'url': url,
+                'file': arcname,
+                'sha256': SourceCache.get_checksum(source_path)}
+
+    def add_repository(self, tar, tmp_dir, installer, url):
+        """
+        Adds git bundles of a repository and its submodules to the bundle
+
+        Parameters
+        ----------
+        tar : tarfile.TarFile
+            The bundle opened for writing
+        tmp_dir : Path
+            Directory to write the git bundles to
+        installer : InstallerUsingGit
+            The installer of the repository
+        url : str
+            The url of the repository
+
+        Returns
+        -------
+        entry : dict
+            The manifest entry of the repository, listing the path, commit,
+            url and file of the submodules, parents first
+        """
+
+        # The submodules are not part of the bundle of the repository
+        installer.run_subprocess('git submodule update --init --recursive',
+                                 installer.git_dir)
+
+        repositories = [('', None, url)]
+        repositories.extend(self.get_submodules(installer.git_dir))
+
+        entry = {'name': installer.name, 'url': url, 'submodules': list()}
+        for index, (path, commit, repository_url) in enumerate(repositories):
+            bundle_path = tmp_dir.joinpath(f'{installer.name}-{index}.bundle')
+            installer.run_subprocess(f'git bundle create {bundle_path} --all',
+                                     installer.git_dir.joinpath(path))
+            arcname = f'repositories/{bundle_path.name}'
+            self.logger.info(f'Adding {bundle_path} to the bundle')
+            tar.add(bundle_path, arcname=arcname)
+            if path == '':
+                entry['file'] = arcname
+            else:
+                entry['submodules'].append({'path': path,
+                                            'commit': commit,
+                                            'url': repository_url,
+                                            'file': arcname})
+
+        return entry
+
+    @staticmethod
+    def get_submodules(git_dir):
+        """
+        Returns the checked out submodules of a repository
+
+        Parameters
+        ----------
+        git_dir : Path
+            The directory of the repository
+
+        Returns
+        -------
+        submodules : list of tuple
+            The path relative to git_dir, the checked out commit and the url
+            of the origin of each submodule (including nested submodules),
+            parents first
+        """
+
+        command = ['git', 'submodule', 'foreach', '--recursive', '--quiet',
+                   'echo "$sha1 $(git remote get-url origin) $displaypath"']
+        result = subprocess.run(command,
+                                cwd=git_dir,
+                                stdout=subprocess.PIPE,
+                                check=True,
+                                universal_newlines=True)
+
+        submodules = list()
+        for line in result.stdout.splitlines():
+            commit, url, path = line.split(' ', 2)
+            submodules.append((path, commit, url))
+        return submodules
+
+    def read_manifest(self):
+        """
+        Returns the manifest of the bundle
+
+        Returns
+        -------
+        manifest : dict
+            Dictionary with the keys `versions`, `sources` and
+            `repositories`
+        """
+
+        with tarfile.open(self.bundle_path, 'r:') as tar:
+            return json.load(tar.extractfile(self.manifest_name))
+
+    def check_versions(self, registry, packages, manifest):
+        """
+        Checks that the bundle was created with the configured versions
+
+        Parameters
+        ----------
+        registry : InstallerRegistry
+            The registry of the installers
+        packages : list
+            Names of the packages to install
+        manifest : dict
+            The manifest of the bundle
+
+        Raises
+        ------
+        ValueError
+            If the version of a package or an extra source differs from the
+            configuration
+        """
+
+        names = list()
+        for name in packages:
+            names.append(name)
+            names.extend(registry.get_installer(name).extra_sources)
+
+        versions = registry.config['versions']
+        mismatches = [f'{name} {manifest["versions"].get(name)} (bundle) '
+                      f'!= {versions.get(name)} (configuration)'
+                      for name in names
+                      if manifest['versions'].get(name) != versions.get(name)]
+        if len(mismatches) != 0:
+            raise ValueError(f'{self.bundle_path} was created with other '
+                             f'versions: {", ".join(mismatches)}')
+
+    def extract(self, registry, packages):
+        """
+        Places the sources of the packages where the installers expect them
+
+        Notes
+        -----
+        The tar files are copied straight from the bundle to their
+        destinations, and the repositories and their submodules are cloned
+        from their git bundles.
+        Sources which are already present are left untouched
+
+        Parameters
+        ----------
+        registry : InstallerRegistry
+            The registry of the installers
+        packages : list
+            Names of the packages to install
+
+        Raises
+        ------
+        ValueError
+            If the bundle was created with other versions, or does not
+            contain the sources of the packages
+        IOError
+            If a source in the bundle is corrupt
+        """
+
+        manifest = self.read_manifest()
+        self.check_versions(registry, packages, manifest)
+
+        entries = {entry['file']: entry for entry in
+                   manifest['sources'] + manifest['repositories']}
+        bundled_urls = {entry['url'] for entry in entries.values()}
+        # The submodules are indexed by file, with their repository
+        submodules = {submodule['file']: (entry, submodule)
+                      for entry in manifest['repositories']
+                      for submodule in entry.get('submodules', list())}
+
+        for name in packages:
+            installer = registry.get_installer(name)
+            for url in (*installer.get_source_urls(),
+                        *installer.extra_sources.values()):
+                if url not in bundled_urls:
+                    raise ValueError(f'{self.bundle_path} does not contain '
+                                     f'{url}')
+
+        # The members are read in the order they are stored, so that the
+        # archive is read sequentially
+        cloned = set()
+        with tarfile.open(self.bundle_path, 'r:') as tar:
+            for member in tar:
+                if member.name in submodules:
+                    entry, submodule = submodules[member.name]
+                    if entry['file'] not in cloned:
+                        continue
+                    installer = registry.get_installer(entry['name'])
+                    bundle_path = installer.install_dir.joinpath(
+                        Path(member.name).name)
+                    self.extract_file(tar, member, bundle_path)
+                    installer.clone_submodule_bundle(bundle_path,
+                                                     submodule['path'],
+                                                     submodule['commit'],
+                                                     submodule['url'])
+                    bundle_path.unlink()
+                    continue
+
+                entry = entries.get(member.name)
+                if entry is None or entry['name'] not in packages:
+                    continue
+                installer = registry.get_installer(entry['name'])
+
+                if 'sha256' in entry:
+                    tar_file_path = installer.get_tar_file_path(entry['url'])
+                    if tar_file_path.is_file():
+                        continue
+                    self.logger.info(f'Extracting {tar_file_path} from the '
+                                     f'bundle')
+                    self.extract_file(tar, member, tar_file_path,
+                                      entry['sha256'])
+                elif not installer.git_dir.is_dir():
+                    bundle_path = installer.install_dir.joinpath(
+                        Path(member.name).name)
+                    self.extract_file(tar, member, bundle_path)
+                    installer.clone_bundle(bundle_path, entry['url'])
+                    bundle_path.unlink()
+                    cloned.add(member.name)
+
+    @staticmethod
+    def extract_file(tar, member, path, checksum=None):
+        """
+        Copies a member of the bundle to path
+
+        Parameters
+        ----------
+        tar : tarfile.TarFile
+            The opened bundle
+        member : tarfile.TarInfo
+            The member to extract
+        path : Path
+            The destination, which is written atomically
+        checksum : None or str
+            The expected SHA-256 checksum of the member
+
+        Raises
+        ------
+        IOError
+            If the checksum does not match
+        """
+
+        part_path = path.with_name(f'{path.name}.{os.getpid()}.part')
+        sha = hashlib.sha256()
+        with tar.extractfile(member) as src, part_path.open('wb') as dst:
+            for chunk in iter(lambda: src.read(2**20), b''):
+                sha.update(chunk)
+                dst.write(chunk)
+
+        if checksum is not None and sha.hexdigest() != checksum:
+            part_path.unlink()
+            raise IOError(f'Checksum mismatch for {member.name} in the '
+                          f'bundle')
+
+        part_path.replace(path)
+
@@ -0,0 +1,217 @@
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from bout_install.SourceCache import get_default_cache_dir
+from bout_install.SourceCache import parse_size
+
+
+class CompilerCache(object):
+    """
+    Class for caching compilations with ccache
+
+    The compilers are launched through ccache, which reuses the object files
+    of translation units compiled before with the same input.
+    ccache is used in masquerade mode: a directory of links named after the
+    compilers is put first on PATH, so that the compiler names the packages
+    see (and record, like the MPI compiler wrappers) stay unchanged.
+    Each package writes the results of its compilations to a stats log, from
+    which the hit rates of the packages are collected.
+
+    Examples
+    --------
+    >>> from bout_install.CompilerCache import CompilerCache
+    >>>
+    >>> cache = CompilerCache('/tmp/ccache', max_size=2**30)
+    >>> environment = cache.get_environment(stats_log_path)
+    >>> environment['PATH'] = f'{cache.get_masquerade_dir()}:{PATH}'
+    >>> # Compile with the environment, and collect the statistics
+    >>> cache.collect('fftw', stats_log_path)
+    >>> print(cache.get_summary())
+    """
+
+    # The compilers linked in the masquerade directory
+    compilers = ('cc', 'c++', 'gcc', 'g++', 'gfortran', 'clang', 'clang++')
+
+    def __init__(self, cache_dir, max_size, executable='ccache'):
+        """
+        Sets the cache directory, maximum size and ccache executable
+
+        Parameters
+        ----------
+        cache_dir : Path or str
+            The directory of the cache
+        max_size : int
+            The maximum size of the cache in bytes
+        executable : Path or str
+            The ccache executable
+        """
+
+        self.cache_dir = Path(cache_dir).absolute()
+        self.max_size = max_size
+        self.executable = str(executable)
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.logger = logging.getLogger('bout_install')
+
+        # Hits and misses indexed by package name
+        self.stats = dict()
+
+        self._lock = threading.Lock()
+
+    def get_environment(self, stats_log_path):
+        """
+        Returns the environment variables configuring ccache
+
+        Parameters
+        ----------
+        stats_log_path : Path
+            The file to log the results of the compilations to
+
+        Returns
+        -------
+        environment : dict
+            The environment variables
+        """
+
+        return {'CCACHE_DIR': str(self.cache_dir),
+                'CCACHE_MAXSIZE': f'{self.max_size // 1024}Ki',
+                'CCACHE_STATSLOG': str(stats_log_path)}
+
+    def get_masquerade_dir(self, compilers=()):
+        """
+        Returns the directory of links from the compiler names to ccache
+
+        Notes
+        -----
+        When called through a link, ccache runs the compiler of the same
+        name found next on PATH, skipping the links to itself.
+        The directory is kept in the cache directory, and links pointing to
+        another ccache executable are replaced
+
+        Parameters
+        ----------
+        compilers : iterable of str
+            Names of compilers to link in addition to the common compilers
+            of C, C++ and Fortran
+
+        Returns
+        -------
+        masquerade_dir : Path
+            The directory to put first on PATH
+        """
+
+        masquerade_dir = self.cache_dir.joinpath('masquerade')
+        names = set(self.compilers).union(compilers)
+
+        with self._lock:
+            masquerade_dir.mkdir(parents=True, exist_ok=True)
+            for name in sorted(names):
+                link_path = masquerade_dir.joinpath(name)
+                if link_path.is_symlink() and \
+                        os.readlink(link_path) == self.executable:
+                    continue
+                # Replace the link atomically, as other installations may be
+                # compiling through it
+                tmp_path = masquerade_dir.joinpath(f'.{name}.{os.getpid()}')
+                if tmp_path.is_symlink():
+                    tmp_path.unlink()
+                os.symlink(self.executable, tmp_path)
+                os.replace(tmp_path, link_path)
+
+        return masquerade_dir
+
+    def collect(self, name, stats_log_path):
+        """
+        Collects the hits and misses of a package from its stats log
+
+        Notes
+        -----
+        The stats log contains a comment line with the source file of each
+        compilation, followed by the counters it incremented (e.g.
+        `direct_cache_hit` or `cache_miss`).
+        Compilations which can not be cached (like linking) are not counted
+
+        Parameters
+        ----------
+        name : str
+            Name of the package
+        stats_log_path : Path
+            The stats log of the package. It is removed after reading
+        """
+
+        stats_log_path = Path(stats_log_path)
+        if not stats_log_path.is_file():
+            return
+
+        hits = 0
+        misses = 0
+        with stats_log_path.open() as f:
+            for line in f:
+                line = line.strip()
+                if line.endswith('cache_hit'):
+                    hits += 1
+                elif line == 'cache_miss':
+                    misses += 1
+        stats_log_path.unlink()
+
+        with self._lock:
+            self.stats[name] = (hits, misses)
+
+    def get_summary(self):
+        """
+        Returns a summary of the hit rates of the packages of this run
+
+        Returns
+        -------
+        summary : str
+            The number of hits and compilations of each package
+        """
+
+        lines = ['Compiler cache:']
+        for name, (hits, misses) in sorted(self.stats.items()):
+            total = hits + misses
+            rate = 100 * hits / total if total != 0 else 0
+            lines.append(f'    {name}: {hits} of {total} compilations '
+                         f'cached ({rate:.0f}%)')
+        if len(lines) == 1:
+            lines.append('    No compilations')
+        return '\n'.join(lines)
+
+
+def get_compiler_cache(config):
+    """
+    Returns the compiler cache configured by the cache section
+
+    Parameters
+    ----------
+    config : configparser.ConfigParser
+        The configuration
+
+    Returns
+    -------
+    compiler_cache : None or CompilerCache
+        The compiler cache. None if the cache is disabled or ccache is not
+        found
+    """
+
+    if not config.getboolean('cache', 'compiler_cache', fallback=False):
+        return None
+
+    executable = shutil.which('ccache')
+    if executable is None:
+        logging.getLogger('bout_install').warning(
+            'ccache not found, compiling without the compiler cache')
+        return None
+
+    cache_dir = config.get('cache', 'compiler_cache_dir', fallback='')
+    max_size = parse_size(config.get('cache',
+                                     'compiler_cache_size',
+                                     fallback='5G'))
+
+    if cache_dir == '':
+        cache_dir = get_default_cache_dir().joinpath('ccache')
+
+    return CompilerCache(cache_dir, max_size, executable)
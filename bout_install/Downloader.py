@@ -0,0 +1,337 @@
+import json
+import logging
+import os
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+from bout_install.SourceCache import get_default_cache_dir
+
+
+class Downloader(object):
+    """
+    Class for making http requests through a shared session
+
+    The session keeps the connections alive, so that several requests to
+    the same host (like the NetCDF and NetCDF CXX interface sources from
+    github.com) reuse the same connection.
+    Hosts which fail the SSL verification are remembered, so that the
+    failing handshake is not repeated for every request to that host.
+    Alternative urls of a source are ranked by probing them concurrently,
+    combined with the throughput history of the hosts from earlier
+    downloads.
+
+    Examples
+    --------
+    >>> from bout_install.Downloader import Downloader
+    >>>
+    >>> downloader = Downloader(timeout=10)
+    >>> response = downloader.get('http://www.fftw.org/fftw-3.3.6-pl2.tar.gz')
+    """
+
+    def __init__(self,
+                 timeout=30,
+                 pool_size=10,
+                 history_path=None,
+                 offline=False):
+        """
+        Creates the session
+
+        Parameters
+        ----------
+        timeout : float
+            Timeout in seconds for connecting and for each read
+        pool_size : int
+            Maximum number of connections kept alive per host
+        history_path : None or Path or str
+            Path to the json file storing the throughput of the hosts
+            If None, no history is kept
+        offline : bool
+            Whether requests are forbidden (for installing from a bundle)
+        """
+
+        self.timeout = timeout
+        self.offline = offline
+        self.history_path = \
+            Path(history_path) if history_path is not None else None
+
+        self.logger = logging.getLogger('bout_install')
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.insecure_hosts = set()
+        self.rankings = dict()
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        """
+        Makes a request, falling back to no SSL verification on SSL errors
+
+        Parameters
+        ----------
+        method : str
+            The http method
+        url : str
+            The url to request
+        kwargs : dict
+            Keyword arguments passed to requests.Session.request
+
+        Returns
+        -------
+        response : requests.Response
+            The response
+
+        Raises
+        ------
+        requests.exceptions.ConnectionError
+            If the downloader is offline
+        """
+
+        if self.offline:
+            raise requests.exceptions.ConnectionError(
+                f'{url} can not be requested in offline mode')
+
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlsplit(url).netloc
+
+        if host in self.insecure_hosts:
+            return self.session.request(method, url, verify=False, **kwargs)
+
+        try:
+            return self.session.request(method, url, **kwargs)
+        except requests.exceptions.SSLError:
+            msg = (f'SSL error occurred in {url}, trying to download without '
+                   f'SSL verification. Use with care!')
+            self.logger.warning(msg)
+            with self._lock:
+                self.insecure_hosts.add(host)
+            return self.session.request(method, url, verify=False, **kwargs)
+
+    def get(self, url, headers=None):
+        """
+        Returns the streamed response of a GET request
+
+        Parameters
+        ----------
+        url : str
+            The url to request
+        headers : None or dict
+            Extra headers to send with the request
+
+        Returns
+        -------
+        response : requests.Response
+            The response
+        """
+
+        return self.request('GET', url, stream=True, headers=headers)
+
+    def head(self, url):
+        """
+        Returns the response of a HEAD request, following redirects
+
+        Parameters
+        ----------
+        url : str
+            The url to request
+
+        Returns
+        -------
+        response : requests.Response
+            The response
+        """
+
+        return self.request('HEAD', url, allow_redirects=True)
+
+    def probe(self, url):
+        """
+        Returns the time it takes the server to answer a HEAD request
+
+        Parameters
+        ----------
+        url : str
+            The url to probe
+
+        Returns
+        -------
+        latency : None or float
+            The latency in seconds. None if the url is not healthy
+        """
+
+        start = time.monotonic()
+        try:
+            response = self.head(url)
+            response.raise_for_status()
+        except requests.exceptions.RequestException:
+            return None
+        return time.monotonic() - start
+
+    def rank_urls(self, urls):
+        """
+        Returns the urls ordered from the most to the least promising
+
+        Notes
+        -----
+        The urls are probed concurrently, and the unhealthy ones are moved
+        last (they are kept in case the probe was unlucky).
+        Healthy hosts with a throughput history are preferred, fastest
+        first, followed by the remaining healthy hosts ordered by latency.
+        The ranking is only made once per run for the same urls
+
+        Parameters
+        ----------
+        urls : list
+            The candidate urls of the same file
+
+        Returns
+        -------
+        ranked_urls : list
+            The ranked urls
+        """
+
+        urls = list(urls)
+        if len(urls) < 2:
+            return urls
+
+        key = tuple(urls)
+        with self._lock:
+            if key in self.rankings:
+                return self.rankings[key]
+
+        with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+            latencies = dict(zip(urls, executor.map(self.probe, urls)))
+        history = self.read_history()
+
+        def score(url):
+            latency = latencies[url]
+            throughput = \
+                history.get(urlsplit(url).netloc, dict()).get('throughput')
+            if latency is None:
+                return 2, 0
+            if throughput is not None:
+                return 0, -throughput
+            return 1, latency
+
+        ranked_urls = sorted(urls, key=score)
+        if ranked_urls[0] != urls[0]:
+            self.logger.info(f'Using {ranked_urls[0]} in favour of {urls[0]}')
+
+        with self._lock:
+            self.rankings[key] = ranked_urls
+        return ranked_urls
+
+    def read_history(self):
+        """
+        Returns the throughput history of the hosts
+
+        Returns
+        -------
+        history : dict
+            Dictionary indexed by host with the keys `throughput` (bytes per
+            second) and `downloads`
+        """
+
+        if self.history_path is None:
+            return dict()
+        try:
+            with self.history_path.open() as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return dict()
+
+    def get_throughput(self, url):
+        """
+        Returns the throughput of the host of url from the history
+
+        Parameters
+        ----------
+        url : str
+            The url to be downloaded
+
+        Returns
+        -------
+        throughput : None or float
+            The throughput in bytes per second. None if the host has no
+            history
+        """
+
+        host = urlsplit(url).netloc
+        return self.read_history().get(host, dict()).get('throughput')
+
+    def record_throughput(self, response, n_bytes, seconds):
+        """
+        Adds the throughput of a download to the history of its host
+
+        Notes
+        -----
+        The history is an exponentially weighted average, so that the host
+        can recover from a bad day.
+        Small downloads are ignored as they are dominated by the latency
+
+        Parameters
+        ----------
+        response : requests.Response
+            The response the download was read from
+        n_bytes : int
+            The number of bytes downloaded
+        seconds : float
+            The time the download took
+        """
+
+        if self.history_path is None or n_bytes < 2**20 or seconds <= 0:
+            return
+
+        # Use the requested host rather than the host redirected to, as the
+        # former is what is ranked
+        url = response.history[0].url if response.history else response.url
+        host = urlsplit(url).netloc
+        throughput = n_bytes / seconds
+
+        with self._lock:
+            history = self.read_history()
+            entry = history.setdefault(host, {'throughput': throughput,
+                                              'downloads': 0})
+            entry['throughput'] = \
+                0.7 * entry['throughput'] + 0.3 * throughput
+            entry['downloads'] += 1
+
+            self.history_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.history_path.with_name(
+                f'{self.history_path.name}.{os.getpid()}')
+            with tmp_path.open('w') as f:
+                json.dump(history, f, indent=4)
+            tmp_path.replace(self.history_path)
+
+
+def get_downloader(config):
+    """
+    Returns a downloader configured by the download_options section
+
+    Parameters
+    ----------
+    config : configparser.ConfigParser
+        The configuration
+
+    Returns
+    -------
+    downloader : Downloader
+        The downloader
+    """
+
+    timeout = config.get('download_options', 'timeout', fallback='')
+    pool_size = config.get('download_options', 'pool_size', fallback='')
+    history_path = config.get('cache', 'mirror_history', fallback='')
+
+    if history_path == '':
+        history_path = get_default_cache_dir().joinpath('mirror_history.json')
+
+    return Downloader(timeout=float(timeout) if timeout != '' else 30,
+                      pool_size=int(pool_size) if pool_size != '' else 10,
+                      history_path=history_path)
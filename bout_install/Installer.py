@@ -1,11 +1,369 @@
+import bz2
+import collections
 import configparser
+import contextlib
+import fnmatch
+import functools
+import gzip
+import hashlib
+import json
 import logging
+import lzma
 import os
 import requests
 import shutil
+import signal
 import subprocess
 import tarfile
+import threading
+import time
 from pathlib import Path
+from bout_install.ArtifactCache import get_artifact_cache
+from bout_install.CompilerCache import get_compiler_cache
+from bout_install.Downloader import get_downloader
+from bout_install.ResourceMonitor import ResourceMonitor
+from bout_install.ResourceMonitor import add_usage
+from bout_install.ResourceMonitor import get_usage
+from bout_install.SourceCache import get_source_cache
+from bout_install.SourceCache import parse_size
+from bout_install.TimingReport import TimingReport
+
+# Locks guarding paths which can be written by several threads
+_path_locks = dict()
+_path_locks_lock = threading.Lock()
+
+
+def get_path_lock(path):
+    """
+    Returns the lock guarding a path
+
+    Parameters
+    ----------
+    path : Path or str
+        The path to guard
+
+    Returns
+    -------
+    lock : threading.Lock
+        The lock belonging to the path
+    """
+
+    key = str(Path(path).absolute())
+    with _path_locks_lock:
+        if key not in _path_locks:
+            _path_locks[key] = threading.Lock()
+        return _path_locks[key]
+
+
+def get_manifest_path(tar_path):
+    """
+    Returns the path to the manifest of a tar file
+
+    The manifest is a small json file next to the tar file containing
+    metadata about the tar file, such as the name of the untarred directory
+
+    Parameters
+    ----------
+    tar_path : Path or str
+        Path to the tar file
+
+    Returns
+    -------
+    manifest_path : Path
+        Path to the manifest
+    """
+
+    tar_path = Path(tar_path).absolute()
+    return tar_path.with_name(f'{tar_path.name}.json')
+
+
+def read_manifest(tar_path):
+    """
+    Returns the manifest of a tar file
+
+    Parameters
+    ----------
+    tar_path : Path or str
+        Path to the tar file
+
+    Returns
+    -------
+    manifest : dict
+        The content of the manifest. Empty if there is no manifest
+    """
+
+    return read_json(get_manifest_path(tar_path))
+
+
+def update_manifest(tar_path, **entries):
+    """
+    Updates the manifest of a tar file with the given entries
+
+    Parameters
+    ----------
+    tar_path : Path or str
+        Path to the tar file
+    entries : dict
+        The entries to add to the manifest
+    """
+
+    update_json(get_manifest_path(tar_path), **entries)
+
+
+def read_json(path):
+    """
+    Returns the content of a json file
+
+    Parameters
+    ----------
+    path : Path
+        Path to the json file
+
+    Returns
+    -------
+    content : dict
+        The content of the file. Empty if there is no file
+    """
+
+    if not path.is_file():
+        return dict()
+
+    with path.open() as f:
+        return json.load(f)
+
+
+def update_json(path, **entries):
+    """
+    Updates a json file with the given entries
+
+    Parameters
+    ----------
+    path : Path
+        Path to the json file
+    entries : dict
+        The entries to add to the file
+    """
+
+    content = {**read_json(path), **entries}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # The file may be updated concurrently by a pipeline
+    tmp_path = path.with_name(f'{path.name}.{threading.get_ident()}.tmp')
+    with tmp_path.open('w') as f:
+        json.dump(content, f, indent=4)
+    tmp_path.replace(path)
+
+
+@functools.lru_cache()
+def _get_compiler_version(path, mtime_ns):
+    """
+    Returns the version of a compiler
+
+    Parameters
+    ----------
+    path : str
+        Path to the compiler
+    mtime_ns : int
+        Modification time of the compiler, so that a replaced compiler is
+        run again
+
+    Returns
+    -------
+    version : None or str
+        The first line of `--version`
+    """
+
+    result = subprocess.run([path, '--version'],
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL,
+                            universal_newlines=True)
+    return next(iter(result.stdout.splitlines()), None)
+
+
+def get_compiler_identity(local_dir=None):
+    """
+    Returns the identity of the compilers used for building
+
+    Notes
+    -----
+    Compilers installed in `local_dir` (like the compilers of the gcc
+    package) are left out, as they are captured by the build key of the
+    package installing them.
+    The compilers are looked up on every call, and only the versions of
+    unchanged compilers are reused
+
+    Parameters
+    ----------
+    local_dir : None or Path
+        The installation directory
+
+    Returns
+    -------
+    identity : dict
+        The compiler selecting environment variables together with the path
+        and version of the C, C++ and Fortran compilers
+    """
+
+    variables = ('PATH', 'CC', 'CXX', 'FC', 'CFLAGS', 'CXXFLAGS', 'FFLAGS',
+                 'LDFLAGS')
+    environment = {variable: os.environ.get(variable)
+                   for variable in variables}
+
+    def is_local(path):
+        return local_dir is not None and \
+            Path(path).absolute().parts[:len(Path(local_dir).parts)] == \
+            Path(local_dir).parts
+
+    search_path = environment['PATH']
+    if search_path is not None:
+        search_path = os.pathsep.join(
+            directory for directory in search_path.split(os.pathsep)
+            if not is_local(directory))
+
+    identity = {'environment': environment}
+    compilers = (('CC', 'cc'), ('CXX', 'c++'), ('FC', 'gfortran'))
+    for variable, default in compilers:
+        compiler = environment.get(variable) or default
+        path = shutil.which(compiler.split()[0], path=search_path)
+        version = None
+        if path is not None and is_local(path):
+            # Set explicitly to a compiler in local_dir
+            path = 'local_dir'
+        elif path is not None:
+            version = _get_compiler_version(path, os.stat(path).st_mtime_ns)
+        identity[variable] = {'path': path, 'version': version}
+    return identity
+
+
+def get_tar_stat(tar_path):
+    """
+    Returns the size and modification time of a tar file
+
+    Parameters
+    ----------
+    tar_path : Path or str
+        Path to the tar file
+
+    Returns
+    -------
+    tar_stat : None or list
+        The size in bytes and the modification time in nanoseconds.
+        None if the tar file does not exist
+    """
+
+    try:
+        stat = Path(tar_path).stat()
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+# Parallel decompressors in order of preference indexed by compression
+DECOMPRESSORS = {'gzip': (('pigz', '-dc'),),
+                 'bzip2': (('lbzip2', '-dc'), ('pbzip2', '-dc')),
+                 'xz': (('xz', '-dc', '-T0'),),
+                 'zstd': (('zstd', '-dc', '-T0'),)}
+
+
+def get_compression(tar_path):
+    """
+    Returns the compression of a tar file from its magic bytes
+
+    Parameters
+    ----------
+    tar_path : Path or str
+        Path to the tar file
+
+    Returns
+    -------
+    compression : None or str
+        Either `gzip`, `bzip2`, `xz` or `zstd`.
+        None if the tar file is uncompressed (or the compression is unknown)
+    """
+
+    with Path(tar_path).open('rb') as f:
+        magic = f.read(6)
+
+    if magic.startswith(b'\x1f\x8b'):
+        return 'gzip'
+    if magic.startswith(b'BZh'):
+        return 'bzip2'
+    if magic.startswith(b'\xfd7zXZ\x00'):
+        return 'xz'
+    if magic.startswith(b'\x28\xb5\x2f\xfd'):
+        return 'zstd'
+    return None
+
+
+def get_decompressor(tar_path):
+    """
+    Returns the command of an available parallel decompressor of a tar file
+
+    Parameters
+    ----------
+    tar_path : Path or str
+        Path to the tar file
+
+    Returns
+    -------
+    command : None or list
+        The command decompressing stdin to stdout.
+        None if the tar file is uncompressed or no decompressor is found
+    """
+
+    for command in DECOMPRESSORS.get(get_compression(tar_path), ()):
+        if shutil.which(command[0]) is not None:
+            return list(command)
+    return None
+
+
+class _TeeReader(object):
+    """
+    File-like object which copies everything read from a stream to a file
+    """
+
+    def __init__(self, stream, tee_file=None):
+        """
+        Stores the stream and the file
+
+        Parameters
+        ----------
+        stream : file-like
+            The stream to read from
+        tee_file : None or file-like
+            The file to copy the read bytes to.
+            If None, nothing is copied
+        """
+
+        self.stream = stream
+        self.tee_file = tee_file
+
+    def read(self, size=-1):
+        """
+        Reads from the stream, and copies the bytes to the file
+
+        Parameters
+        ----------
+        size : int
+            Maximum number of bytes to read. Reads everything if negative
+
+        Returns
+        -------
+        data : bytes
+            The bytes read
+        """
+
+        data = self.stream.read(size)
+        if self.tee_file is not None:
+            self.tee_file.write(data)
+        return data
+
+    def drain(self):
+        """
+        Reads the rest of the stream, so that the file is complete
+        """
+
+        while len(self.read(2**20)) != 0:
+            pass
 
 
 class Installer(object):
@@ -41,9 +399,31 @@ class Installer(object):
     >>> installer.install_package(fftw_url, bin_file)
     """
 
+    # Name of the package, used as node in the dependency graph
+    name = None
+    # Names of the packages which must be installed prior to this package
+    dependencies = ()
+    # Glob patterns of files to untar and to skip, relative to the top
+    # directory of the tar file (patterns of directories cover their content)
+    # If untar_includes is empty, all files not excluded are untarred
+    untar_includes = ()
+    untar_excludes = ()
+    # Whether the installed files can be stored in the artifact cache
+    cache_artifacts = True
+    # Whether the compiler cache is used by putting the masquerade directory
+    # of ccache first on PATH
+    # Installers which should not find the compilers there (like CMake
+    # projects) set this to False, and launch the compilers through ccache
+    # themselves
+    wrap_compilers = True
+    # Whether make install is staged with DESTDIR, and promoted into
+    # local_dir once installed and checked
+    stage_install = True
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
-                 log_path=None):
+                 log_path=None,
+                 registry=None):
         """
         Makes the logger and installation paths (obtained from config.ini)
 
@@ -61,14 +441,62 @@ class Installer(object):
         log_path : None or Path or str
             Path to the log file containing the log of Installer.
             If None, the log will directed to stderr
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run.
+            If set, the configuration is taken from the registry, and
+            dependencies are installed through the registry
         """
 
-        self.config = configparser.ConfigParser(allow_no_value=True)
-        with Path(config_path).open() as f:
-            self.config.read_file(f)
+        if registry is not None:
+            self.config = registry.config
+        else:
+            self.config = configparser.ConfigParser(allow_no_value=True)
+            with Path(config_path).open() as f:
+                self.config.read_file(f)
 
         # Set input
         self.log_path = log_path
+        self.registry = registry
+
+        # The downloader is shared by all installers of a run
+        if registry is not None:
+            self.downloader = registry.downloader
+        else:
+            self.downloader = get_downloader(self.config)
+
+        # The source cache is shared between installations
+        if registry is not None:
+            self.source_cache = registry.source_cache
+        else:
+            self.source_cache = get_source_cache(self.config)
+
+        # As is the artifact cache
+        if registry is not None:
+            self.artifact_cache = registry.artifact_cache
+        else:
+            self.artifact_cache = get_artifact_cache(self.config)
+
+        # The files promoted by the last staged installation
+        self.promoted_paths = None
+
+        # The timing report is shared by all installers of a run
+        if registry is not None:
+            self.timing_report = registry.timing_report
+        else:
+            self.timing_report = TimingReport()
+
+        # The current phase of each thread, and the phase logs written to
+        self._phases = threading.local()
+        self._log_paths = set()
+
+        # And the compiler cache
+        if registry is not None:
+            self.compiler_cache = registry.compiler_cache
+        else:
+            self.compiler_cache = get_compiler_cache(self.config)
+
+        # Obtain the number of parallel jobs to use when making
+        self.jobs = self.get_jobs()
 
         # Obtain install options
         self.use_preinstalled = \
@@ -91,18 +519,29 @@ class Installer(object):
 
         # Set the environment variables
         # Set the local path first
-        os.environ['PATH'] = (f'{self.local_dir.joinpath("bin")}'
-                              f'{os.pathsep}'
-                              f'{os.environ["PATH"]}')
+        # NOTE: Several installers are created in one run, so we avoid
+        #       adding the same path more than once
+        bin_dir = f'{self.local_dir.joinpath("bin")}'
+        lib_dir = f'{self.local_dir.joinpath("lib")}'
+        if bin_dir not in os.environ['PATH'].split(os.pathsep):
+            os.environ['PATH'] = (f'{bin_dir}'
+                                  f'{os.pathsep}'
+                                  f'{os.environ["PATH"]}')
         if 'LD_LIBRARY_PATH' not in os.environ:
-            os.environ['LD_LIBRARY_PATH'] = f'{self.local_dir.joinpath("lib")}'
-        else:
-            os.environ['LD_LIBRARY_PATH'] = (f'{self.local_dir.joinpath("lib")}'
+            os.environ['LD_LIBRARY_PATH'] = lib_dir
+        elif lib_dir not in os.environ['LD_LIBRARY_PATH'].split(os.pathsep):
+            os.environ['LD_LIBRARY_PATH'] = (f'{lib_dir}'
                                              f'{os.pathsep}'
                                              f'{os.environ["LD_LIBRARY_PATH"]}')
 
         # Declare other class variables
         self.config_log_path = None
+        # Alternative urls to try if downloading from an url fails
+        self.mirrors = dict()
+        # Urls of tar files the build would otherwise download itself,
+        # indexed by name. They are fetched with the source, so that they
+        # are cached and bundled
+        self.extra_sources = dict()
 
         # Setup the logger
         self._setup_logger()
@@ -184,211 +623,1895 @@ class Installer(object):
         self.local_dir.mkdir(parents=True, exist_ok=True)
         self.examples_dir.mkdir(parents=True, exist_ok=True)
 
-    def get_tar_file(self, url):
+        self.build_dir = self.get_build_dir()
+
+    def get_build_dir(self):
         """
-        Obtain a tar file from url
+        Returns the directory to untar and build the sources in
+
+        Notes
+        -----
+        The candidates given by `build_root` in the `install_options`
+        section of the configuration (e.g. /dev/shm or node-local scratch)
+        are tried in turn, and the first existing one with at least
+        `build_root_min_free` free space is used.
+        The sources are built in a subdirectory named after `install_dir`,
+        so that installations sharing a build root do not collide
+
+        Returns
+        -------
+        build_dir : Path
+            The build directory. `install_dir` if no build root is set or
+            none of the candidates is usable
+        """
+
+        build_roots = self.config.get('install_options',
+                                      'build_root',
+                                      fallback='').split()
+
+        # NOTE: This is called before the logger is set up
+        logger = logging.getLogger('bout_install')
+
+        for build_root in build_roots:
+            build_root = Path(os.path.expandvars(build_root)).expanduser()
+            if not build_root.is_dir() or not self.has_free_space(build_root):
+                continue
+            digest = hashlib.sha256(str(self.install_dir).encode())
+            build_dir = \
+                build_root.joinpath(f'bout_install-{digest.hexdigest()[:8]}')
+            build_dir.mkdir(exist_ok=True)
+            return build_dir.absolute()
+
+        if len(build_roots) != 0:
+            logger.warning(f'No usable build root found, building in '
+                           f'{self.install_dir}')
+        return self.install_dir
+
+    def has_free_space(self, build_root):
+        """
+        Returns whether a build root has enough free space to build in
 
         Parameters
         ----------
-        url : str
-            The url to get the tar file from
-        """
+        build_root : Path
+            The build root
 
-        try:
-            response = requests.get(url, stream=True)
-        except requests.exceptions.SSLError:
-            msg = (f'SSL error occurred in {url}, trying to download without '
-                   f'SSL verification. Use with care!')
-            self.logger.warning(msg)
-            response = requests.get(url, stream=True, verify=False)
+        Returns
+        -------
+        enough : bool
+            Whether at least `build_root_min_free` in the `install_options`
+            section of the configuration is free
+        """
 
-        response.raise_for_status()
+        min_free = parse_size(self.config.get('install_options',
+                                              'build_root_min_free',
+                                              fallback='0'))
+        free = shutil.disk_usage(build_root).free
+        if free < min_free:
+            # NOTE: This is called before the logger is set up
+            logging.getLogger('bout_install').warning(
+                f'Only {free / 2**30:.1f} GiB free in {build_root}, trying '
+                f'the next build root')
+            return False
+        return True
+
+    def check_build_dir(self):
+        """
+        Moves on to the next build root if the current one is too full
 
-        tar_file_path = self.get_tar_file_path(url)
+        Notes
+        -----
+        The build root may fill up after the installer was created (e.g. by
+        the sources of other packages), so this is checked whenever a
+        source is untarred
+        """
 
-        with tar_file_path.open('wb') as f:
-            # Decode in case transport encoding was applied
-            # https://stackoverflow.com/questions/32463419/having-trouble-getting-requests-2-7-0-to-automatically-decompress-gzip
-            response.raw.decode_content = True
-            shutil.copyfileobj(response.raw, f)
+        if self.build_dir != self.install_dir and \
+                not self.has_free_space(self.build_dir.parent):
+            self.build_dir = self.get_build_dir()
 
-    def get_tar_file_path(self, url):
+    def get_extract_dir(self, tar_path):
         """
-        Returns the path to the tar file
+        Returns the directory to untar a tar file into
 
         Parameters
         ----------
-        url : str
-            The url to get the tar file from
+        tar_path : str or Path
+            Path to the tar file
 
         Returns
         -------
-        tar_file_path : Path
-            The path to the tar file
+        extract_dir : Path
+            The build directory for tar files in `install_dir`. Other tar
+            files are untarred next to themselves
         """
 
-        # The file name is the last part of the url
-        file_name = url.split('/')[-1]
-        tar_file_path = self.install_dir.joinpath(file_name)
-        return tar_file_path
+        tar_dir = Path(tar_path).absolute().parent
+        return self.build_dir if tar_dir == self.install_dir else tar_dir
 
-    @staticmethod
-    def untar(tar_path):
+    def clean_build_dir(self, tar_dir):
         """
-        Untar a tar file
+        Removes an untarred source from the build root after installing
+
+        Notes
+        -----
+        Sources are only removed if built in a build root and
+        `clean_build_root` in the `install_options` section of the
+        configuration is set.
+        The tar file is kept in `install_dir`, so a later rebuild only needs
+        to untar it again
 
         Parameters
         ----------
-        tar_path : str or Path
-            Tar file to extract
+        tar_dir : Path
+            The untarred source
         """
 
-        tar_path = Path(tar_path).absolute()
-        tar_extract_dir = tar_path.parent
+        if self.build_dir == self.install_dir or \
+                not self.config.getboolean('install_options',
+                                           'clean_build_root',
+                                           fallback=True) or \
+                tar_dir.parent != self.build_dir:
+            return
 
-        tar = tarfile.open(tar_path)
-        tar.extractall(path=tar_extract_dir)
-        tar.close()
+        with get_path_lock(tar_dir):
+            if tar_dir.is_dir():
+                self.logger.info(f'Removing {tar_dir}')
+                shutil.rmtree(tar_dir)
 
-    @staticmethod
-    def get_tar_dir(tar_path):
+    def install_dependency(self, installer):
         """
-        Returns the path to the tar directory (directory of untarred files)
+        Installs a dependency
+
+        Notes
+        -----
+        If the installer is part of a registry, the dependency is installed
+        through the registry, so that it is only installed once per run
 
         Parameters
         ----------
-        tar_path : str or Path
-            Path to tar file
+        installer : Installer
+            The installer of the dependency
+        """
+
+        if self.registry is not None:
+            self.registry.install(installer.name)
+        else:
+            installer.install()
+
+    def get_jobs(self):
+        """
+        Returns the number of parallel jobs to use when making
+
+        Notes
+        -----
+        The number is given by `jobs` in the `install_options` section of the
+        configuration, which the `--jobs` option of the command line
+        interface sets in the configuration of the run.
+        If it is not set, the number of cores available to the process is
+        used
 
         Returns
         -------
-        tar_dir : Path
-            The untarred directory
+        jobs : int
+            The number of parallel jobs
         """
 
-        dir_name = Path(tarfile.open(tar_path).getnames()[0]).parts[0]
-        tar_dir = Path(tar_path).absolute().parent.joinpath(dir_name)
-        return tar_dir
+        jobs = self.config.get('install_options', 'jobs', fallback='')
+        if jobs == '':
+            # sched_getaffinity respects the cores assigned by batch systems
+            if hasattr(os, 'sched_getaffinity'):
+                jobs = len(os.sched_getaffinity(0))
+            else:
+                jobs = os.cpu_count()
 
-    @staticmethod
-    def get_configure_command(config_options=None):
+        return max(int(jobs), 1)
+
+    def get_source_urls(self):
         """
-        Get the command to configure the package
+        Returns the urls of the sources needed to install the package
 
-        Parameters
-        ----------
-        config_options : dict
-            Configuration options to use with `./configure`.
-            The configuration options will be converted to `--key=val` during
-            runtime
+        Notes
+        -----
+        The url is obtained from the `<name>_url` attribute of the installer.
+        Sources of dependencies are not included, and alternative urls are
+        found in `self.mirrors`
 
         Returns
         -------
-        config_str : str
-            The configuration command
+        urls : list
+            The urls of the sources
         """
 
-        options = ''
-        if config_options is not None:
-            for key, val in config_options.items():
-                if val is not None:
-                    options += f' --{key}={val}'
-                else:
-                    options += f' --{key}'
-
-        config_str = f'./configure{options}'
-        return config_str
+        url = getattr(self, f'{self.name}_url', None)
+        return [url] if url is not None else []
 
-    def run_subprocess(self, command, path):
+    def get_source_size(self, url):
         """
-        Run a subprocess
+        Returns the size of the source as reported by the server
 
         Parameters
         ----------
-        command : str
-            The command to run
-        path : Path or str
-            Path to the location to run the command from
+        url : str
+            The url of the source
+
+        Returns
+        -------
+        size : None or int
+            The size in bytes. None if the size could not be obtained
         """
 
-        result = subprocess.run(command.split(),
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.PIPE,
-                                cwd=path)
+        try:
+            response = self.downloader.head(url)
+            response.raise_for_status()
+        except requests.exceptions.RequestException:
+            return None
 
-        if result.returncode != 0:
-            self._raise_subprocess_error(result)
+        size = response.headers.get('Content-Length')
+        return int(size) if size is not None else None
 
-    def make(self, path):
+    def fetch_source(self, url):
         """
-        Make the package
+        Downloads the source unless it is already present
 
         Parameters
         ----------
-        path : Path or str
-            Path to the get_configure_command file
+        url : str
+            The url of the source
         """
 
-        make_str = 'make'
-        self.run_subprocess(make_str, path)
-
-        make_install_str = 'make install'
-        self.run_subprocess(make_install_str, path)
+        tar_file_path = self.get_tar_file_path(url)
+        self.run_download_tar(url, tar_file_path, overwrite_on_exist=False)
 
-    def run_download_tar(self, url, tar_file_path, overwrite_on_exist):
+    def fetch_extra_sources(self, overwrite_on_exist=False):
         """
-        Downloads the tar-file if not found
+        Downloads the tar files in `self.extra_sources` unless present
 
         Parameters
         ----------
-        url : str
-            The url to download the tar-file from
-        tar_file_path : Path
-            Path to the tar file
         overwrite_on_exist : bool
-            Whether to overwrite the package if it is already found
+            Whether to overwrite the tar files if they are already found
+
+        Returns
+        -------
+        tar_file_paths : dict
+            The paths to the tar files indexed by the names of
+            `self.extra_sources`
         """
 
-        if not tar_file_path.is_file() or overwrite_on_exist:
-            self.logger.info(f'Downloading {url}')
-            self.get_tar_file(url)
-        else:
-            self.logger.info(f'{tar_file_path} found, skipping download')
+        tar_file_paths = dict()
+        for name, url in self.extra_sources.items():
+            tar_file_paths[name] = self.get_tar_file_path(url)
+            self.run_download_tar(url,
+                                  tar_file_paths[name],
+                                  overwrite_on_exist)
 
-    def run_untar(self, tar_file_path, tar_dir, overwrite_on_exist):
+        return tar_file_paths
+
+    def prepare_source(self, url, overwrite_on_exist=False):
         """
-        Untars the tar file
+        Downloads and untars the source unless already done
+
+        Notes
+        -----
+        This covers the I/O bound stages of the installation, and can
+        therefore be run in the background while other packages are built
 
         Parameters
         ----------
-        tar_file_path : Path
-            Path to the tar file
-        tar_dir : Path
-            Directory to the tar file
+        url : str
+            The url of the source
         overwrite_on_exist : bool
-            Whether to overwrite the package if it is already found
+            Whether to overwrite the source if it is already found
+
+        Returns
+        -------
+        tar_dir : Path
+            The directory of the untarred source
         """
 
-        if not tar_dir.is_dir() or overwrite_on_exist:
-            self.logger.info(f'Untarring {tar_file_path}')
-            self.untar(tar_file_path)
+        # Download the tar file (and untar it on the fly if streaming)
+        tar_file_path = self.get_tar_file_path(url)
+        untarred = tar_file_path.is_file() or \
+            'tar_dir' in read_manifest(tar_file_path)
+        if overwrite_on_exist or not untarred or \
+                not self.get_tar_dir(tar_file_path).is_dir():
+            self.check_build_dir()
+        untar_overwrite_on_exist = overwrite_on_exist
+        if self.config.getboolean('download_options',
+                                  'stream_extract',
+                                  fallback=False):
+            self.run_stream_untar(url, tar_file_path, overwrite_on_exist)
+            # Overwriting has already been taken care of
+            untar_overwrite_on_exist = False
         else:
-            self.logger.info(f'{tar_dir} found, skipping untarring')
+            self.run_download_tar(url, tar_file_path, overwrite_on_exist)
 
-    def run_configure(self,
-                      tar_dir,
-                      config_log_path,
-                      extra_config_option,
-                      overwrite_on_exist):
+        # Untar
+        tar_dir = self.get_tar_dir(tar_file_path)
+        self.run_untar(tar_file_path, tar_dir, untar_overwrite_on_exist)
+
+        # Download the tar files the build would otherwise download
+        self.fetch_extra_sources(overwrite_on_exist)
+
+        return tar_dir
+
+    def get_candidate_urls(self, url):
         """
-        Configures the package
+        Returns the url and its mirrors in the order they should be tried
 
         Parameters
         ----------
-        tar_dir : Path
-            Directory of the tar file
-        config_log_path : Path
-            Path to the Makefile
+        url : str
+            The url of the source
+
+        Returns
+        -------
+        candidate_urls : list
+            The url followed by the mirrors found in `self.mirrors`, ranked
+            by the downloader if `rank_mirrors` is set
+        """
+
+        candidate_urls = [url, *self.mirrors.get(url, list())]
+        if self.config.getboolean('download_options',
+                                  'rank_mirrors',
+                                  fallback=False):
+            candidate_urls = self.downloader.rank_urls(candidate_urls)
+        return candidate_urls
+
+    def get_response(self, url, headers=None):
+        """
+        Returns the streamed response of a successful request to url
+
+        Notes
+        -----
+        The mirrors of the url are tried in turn if the request fails.
+        If `rank_mirrors` is set in the `download_options` section of the
+        configuration, the fastest healthy candidate is tried first
+
+        Parameters
+        ----------
+        url : str
+            The url to get the response from
+        headers : None or dict
+            Extra headers to send with the request
+
+        Returns
+        -------
+        response : requests.Response
+            The response
+        """
+
+        candidate_urls = self.get_candidate_urls(url)
+        for candidate_url in candidate_urls:
+            try:
+                response = self.downloader.get(candidate_url, headers=headers)
+                response.raise_for_status()
+                break
+            except (requests.exceptions.HTTPError,
+                    requests.exceptions.ConnectionError) as e:
+                if candidate_url == candidate_urls[-1]:
+                    raise
+                self.logger.warning(f'Trying mirror after error: {e}')
+
+        # Decode in case transport encoding was applied
+        # https://stackoverflow.com/questions/32463419/having-trouble-getting-requests-2-7-0-to-automatically-decompress-gzip
+        response.raw.decode_content = True
+
+        return response
+
+    def stream_untar(self, url):
+        """
+        Downloads and untars a tar file in one pass
+
+        The response is piped directly into a streaming tar reader.
+        If `keep_tar_files` is set in the `download_options` section of the
+        configuration, the raw bytes are copied to the tar file while
+        extracting, so that it can be reused later.
+        The name of the untarred directory is stored in the manifest of the
+        tar file
+
+        Parameters
+        ----------
+        url : str
+            The url to get the tar file from
+
+        Returns
+        -------
+        tar_dir : Path
+            The untarred directory
+        """
+
+        tar_file_path = self.get_tar_file_path(url)
+        part_path = tar_file_path.with_name(f'{tar_file_path.name}.part')
+        keep_tar_file = self.config.getboolean('download_options',
+                                               'keep_tar_files',
+                                               fallback=True)
+
+        response = self.get_response(url)
+
+        names = list()
+
+        def members(tar):
+            for member in tar:
+                names.append(member.name)
+                yield member
+
+        tee_file = part_path.open('wb') if keep_tar_file else None
+        try:
+            stream = _TeeReader(response.raw, tee_file)
+            with tarfile.open(fileobj=stream, mode='r|*') as tar:
+                tar.extractall(path=self.get_extract_dir(tar_file_path),
+                               members=self.filter_members(members(tar)))
+            # The end of the archive may be followed by padding
+            stream.drain()
+        finally:
+            if tee_file is not None:
+                tee_file.close()
+
+        if keep_tar_file:
+            part_path.replace(tar_file_path)
+
+        dir_name = Path(names[0]).parts[0]
+        update_manifest(tar_file_path,
+                        url=url,
+                        tar_dir=dir_name,
+                        tar_stat=get_tar_stat(tar_file_path))
+
+        return self.get_extract_dir(tar_file_path).joinpath(dir_name)
+
+    def get_tar_file(self, url):
+        """
+        Obtain a tar file from url
+
+        Notes
+        -----
+        The mirrors of the url are tried in turn if the download fails.
+        The file is downloaded to a `.part` file which is renamed to the tar
+        file once it has been completely downloaded and validated.
+        If a `.part` file is found from an interrupted download, the download
+        is resumed if the server supports range requests
+
+        Parameters
+        ----------
+        url : str
+            The url to get the tar file from
+
+        Raises
+        ------
+        IOError
+            If the downloaded file is truncated or corrupt
+        """
+
+        tar_file_path = self.get_tar_file_path(url)
+        part_path = tar_file_path.with_name(f'{tar_file_path.name}.part')
+
+        offset = part_path.stat().st_size if part_path.is_file() else 0
+        headers = {'Range': f'bytes={offset}-'} if offset > 0 else None
+
+        try:
+            response = self.get_response(url, headers=headers)
+        except requests.exceptions.HTTPError as e:
+            if offset == 0 or e.response is None or \
+                    e.response.status_code != 416:
+                raise
+            # The range is not satisfiable, so we start from scratch
+            part_path.unlink()
+            offset = 0
+            response = self.get_response(url)
+
+        # NOTE: Resuming is only possible if the server honoured the range,
+        #       and did not apply a content encoding which would make the
+        #       ranges refer to the encoded bytes
+        encoded = 'Content-Encoding' in response.headers
+        if offset > 0 and response.status_code == 206 and not encoded:
+            self.logger.info(f'Resuming download of {url} from byte {offset}')
+            mode = 'ab'
+            # The header is on the form 'bytes start-end/total'
+            total = response.headers.get('Content-Range', '').split('/')[-1]
+            expected_size = int(total) if total.isdigit() else None
+        else:
+            offset = 0
+            mode = 'wb'
+            length = response.headers.get('Content-Length')
+            expected_size = \
+                int(length) if length is not None and not encoded else None
+
+        start = time.monotonic()
+        with part_path.open(mode) as f:
+            shutil.copyfileobj(response.raw, f)
+
+        size = part_path.stat().st_size
+        self.downloader.record_throughput(response,
+                                          size - offset,
+                                          time.monotonic() - start)
+        if expected_size is not None and size != expected_size:
+            # The .part file is kept, so that the download can be resumed
+            raise IOError(f'Download of {url} is truncated: Got {size} bytes, '
+                          f'expected {expected_size} bytes')
+
+        try:
+            self.validate_tar_file(part_path)
+        except IOError:
+            # A corrupt file can not be resumed
+            part_path.unlink()
+            raise
+
+        part_path.replace(tar_file_path)
+
+    def validate_tar_file(self, tar_path):
+        """
+        Validates the integrity of the compressed stream of a tar file
+
+        Notes
+        -----
+        The stream is decompressed to the end, so that truncation and
+        checksum errors are detected before untarring.
+        The same decompressor as for untarring is used (see `untar`), and
+        the modules of Python are only used if no parallel decompressor is
+        available
+
+        Parameters
+        ----------
+        tar_path : Path or str
+            Path to the tar file
+
+        Raises
+        ------
+        IOError
+            If the tar file is truncated or corrupt
+        """
+
+        tar_path = Path(tar_path)
+
+        backend = self.config.get('install_options',
+                                  'untar_backend',
+                                  fallback='auto')
+        command = get_decompressor(tar_path) if backend == 'auto' else None
+        if command is not None:
+            with tar_path.open('rb') as f:
+                result = subprocess.run(command,
+                                        stdin=f,
+                                        stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.PIPE)
+            if result.returncode != 0:
+                raise IOError(f'{tar_path} is truncated or corrupt: '
+                              f'{result.stderr.decode(errors="replace")}')
+            return
+
+        openers = {'gzip': gzip.open, 'bzip2': bz2.open, 'xz': lzma.open}
+        opener = openers.get(get_compression(tar_path))
+        if opener is None:
+            # Uncompressed (or no module for the compression), let tarfile
+            # handle it
+            return
+
+        try:
+            with opener(tar_path, 'rb') as f:
+                while len(f.read(2**20)) != 0:
+                    pass
+        except (EOFError, OSError, lzma.LZMAError) as e:
+            raise IOError(f'{tar_path} is truncated or corrupt: {e}')
+
+    def get_tar_file_path(self, url):
+        """
+        Returns the path to the tar file
+
+        Parameters
+        ----------
+        url : str
+            The url to get the tar file from
+
+        Returns
+        -------
+        tar_file_path : Path
+            The path to the tar file
+        """
+
+        # The file name is the last part of the url
+        file_name = url.split('/')[-1]
+        tar_file_path = self.install_dir.joinpath(file_name)
+        return tar_file_path
+
+    def untar(self, tar_path):
+        """
+        Untar a tar file
+
+        Notes
+        -----
+        Unless `untar_backend` in the `install_options` section of the
+        configuration is set to `tarfile`, the tar file is decompressed by a
+        parallel decompressor (see `DECOMPRESSORS`) if one is available.
+        The decompressed stream is piped into tarfile.
+        Only the files selected by `get_untar_patterns` are untarred, into
+        the directory given by `get_extract_dir`
+
+        Parameters
+        ----------
+        tar_path : str or Path
+            Tar file to extract
+        """
+
+        tar_path = Path(tar_path).absolute()
+        tar_extract_dir = self.get_extract_dir(tar_path)
+
+        backend = self.config.get('install_options',
+                                  'untar_backend',
+                                  fallback='auto')
+        command = get_decompressor(tar_path) if backend == 'auto' else None
+
+        start = time.monotonic()
+        if command is None:
+            with tarfile.open(tar_path) as tar:
+                tar.extractall(path=tar_extract_dir,
+                               members=self.filter_members(tar))
+            backend = 'tarfile'
+        else:
+            self.untar_with_decompressor(tar_path, command)
+            backend = command[0]
+
+        self.logger.info(f'Untarred {tar_path.name} with {backend} in '
+                         f'{time.monotonic() - start:.1f} s')
+
+    def get_untar_patterns(self):
+        """
+        Returns the include and exclude patterns used when untarring
+
+        Notes
+        -----
+        The class attributes `untar_includes` and `untar_excludes` can be
+        overridden by `<name>_includes` and `<name>_excludes` in the `untar`
+        section of the configuration, given as whitespace separated patterns
+
+        Returns
+        -------
+        includes : tuple
+            Glob patterns of the files to untar. Empty for all files
+        excludes : tuple
+            Glob patterns of the files to skip
+        """
+
+        includes = self.config.get('untar',
+                                   f'{self.name}_includes',
+                                   fallback=None)
+        excludes = self.config.get('untar',
+                                   f'{self.name}_excludes',
+                                   fallback=None)
+
+        if includes is None:
+            includes = self.untar_includes
+        else:
+            includes = tuple(includes.split())
+        if excludes is None:
+            excludes = self.untar_excludes
+        else:
+            excludes = tuple(excludes.split())
+
+        return includes, excludes
+
+    def filter_members(self, members):
+        """
+        Yields the members of a tar file which should be untarred
+
+        Parameters
+        ----------
+        members : iterable
+            The tarfile.TarInfo members of the tar file
+
+        Yields
+        ------
+        member : tarfile.TarInfo
+            A member matching the include patterns and none of the exclude
+            patterns
+        """
+
+        includes, excludes = self.get_untar_patterns()
+
+        def matches(path, patterns):
+            return any(fnmatch.fnmatch(path, pattern) or
+                       fnmatch.fnmatch(path, f'{pattern}/*')
+                       for pattern in patterns)
+
+        skipped = 0
+        for member in members:
+            path = '/'.join(Path(member.name).parts[1:])
+            if path != '' and \
+                    ((len(includes) != 0 and not matches(path, includes)) or
+                     matches(path, excludes)):
+                skipped += 1
+                continue
+            yield member
+
+        if skipped != 0:
+            self.logger.info(f'Skipped {skipped} files when untarring')
+
+    def untar_with_decompressor(self, tar_path, command):
+        """
+        Untar a tar file decompressed by an external command
+
+        Parameters
+        ----------
+        tar_path : Path
+            Tar file to extract
+        command : list
+            The command decompressing stdin to stdout
+        """
+
+        with tar_path.open('rb') as f:
+            process = subprocess.Popen(command,
+                                       stdin=f,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE)
+            try:
+                with tarfile.open(fileobj=process.stdout, mode='r|') as tar:
+                    tar.extractall(path=self.get_extract_dir(tar_path),
+                                   members=self.filter_members(tar))
+                # Read the padding after the end of the archive, so that the
+                # decompressor does not fail on a broken pipe
+                while len(process.stdout.read(2**16)) != 0:
+                    pass
+            except BaseException:
+                process.kill()
+                raise
+            finally:
+                process.stdout.close()
+                stderr = process.stderr.read()
+                process.stderr.close()
+                process.wait()
+
+        if process.returncode != 0:
+            result = subprocess.CompletedProcess(command,
+                                                 process.returncode,
+                                                 stdout=b'',
+                                                 stderr=stderr)
+            self._raise_subprocess_error(result)
+
+    def get_tar_dir(self, tar_path):
+        """
+        Returns the path to the tar directory (directory of untarred files)
+
+        Notes
+        -----
+        The name of the directory is read from the manifest of the tar file
+        if present, as the tar file may not have been kept.
+        Otherwise only the first member of the tar file is read, and the name
+        is stored in the manifest together with the size and modification
+        time of the tar file, so that a replaced tar file is read again
+
+        Parameters
+        ----------
+        tar_path : str or Path
+            Path to tar file
+
+        Returns
+        -------
+        tar_dir : Path
+            The untarred directory
+        """
+
+        tar_path = Path(tar_path)
+        tar_stat = get_tar_stat(tar_path)
+
+        manifest = read_manifest(tar_path)
+        if 'tar_dir' in manifest and \
+                (tar_stat is None or
+                 manifest.get('tar_stat', tar_stat) == tar_stat):
+            dir_name = manifest['tar_dir']
+        else:
+            with tarfile.open(tar_path) as tar:
+                dir_name = Path(tar.next().name).parts[0]
+            if not self.is_planning():
+                update_manifest(tar_path, tar_dir=dir_name, tar_stat=tar_stat)
+
+        tar_dir = self.get_extract_dir(tar_path).joinpath(dir_name)
+        return tar_dir
+
+    @staticmethod
+    def get_configure_command(config_options=None):
+        """
+        Get the command to configure the package
+
+        Parameters
+        ----------
+        config_options : dict
+            Configuration options to use with `./configure`.
+            The configuration options will be converted to `--key=val` during
+            runtime
+
+        Returns
+        -------
+        config_str : str
+            The configuration command
+        """
+
+        options = ''
+        if config_options is not None:
+            for key, val in config_options.items():
+                if val is not None:
+                    options += f' --{key}={val}'
+                else:
+                    options += f' --{key}'
+
+        config_str = f'./configure{options}'
+        return config_str
+
+    def get_compiler_cache_log_path(self):
+        """
+        Returns the path to the compiler cache stats log of the package
+
+        Returns
+        -------
+        stats_log_path : Path
+            Path to the stats log
+        """
+
+        name = self.name if self.name is not None else 'installer'
+        return self.local_dir.joinpath('.bout_install', f'{name}.ccache.log')
+
+    def get_subprocess_environment(self):
+        """
+        Returns the environment of the subprocesses
+
+        Notes
+        -----
+        If the compiler cache is enabled, ccache is configured through the
+        environment, and its masquerade directory is put first on PATH
+        (unless `wrap_compilers` is False).
+        CC, CXX and FC are left unchanged, as packages like MPICH record them
+        in the compiler wrappers they install
+
+        Returns
+        -------
+        environment : dict
+            The environment variables
+        """
+
+        environment = dict(os.environ)
+        if self.compiler_cache is None:
+            return environment
+
+        stats_log_path = self.get_compiler_cache_log_path()
+        stats_log_path.parent.mkdir(parents=True, exist_ok=True)
+        environment.update(self.compiler_cache.get_environment(stats_log_path))
+
+        if self.wrap_compilers:
+            # Compilers given by name are found through PATH, and are linked
+            # in the masquerade directory as well
+            compilers = [environment[variable].split()[0]
+                         for variable in ('CC', 'CXX', 'FC')
+                         if environment.get(variable, '').strip() != '' and
+                         '/' not in environment[variable].split()[0]]
+            masquerade_dir = \
+                self.compiler_cache.get_masquerade_dir(compilers)
+            path = environment.get('PATH')
+            environment['PATH'] = str(masquerade_dir) if path is None \
+                else f'{masquerade_dir}{os.pathsep}{path}'
+        return environment
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Context manager marking a phase of the installation
+
+        Notes
+        -----
+        The output of the subprocesses run in the phase is written to the log
+        of the phase (see `get_phase_log_path`).
+        The phase is thread local, as the source of a package may be
+        prepared by a prefetcher while the package is built.
+        The duration of the phase is recorded in the timing report, together
+        with its status. The status is `done` unless set otherwise through
+        the yielded record (e.g. to `skipped` or `cached`), or `failed` if
+        the phase raised.
+        The resources used by the subprocesses of the phase (see
+        `run_subprocess`) are added to the record
+
+        Parameters
+        ----------
+        name : str
+            Name of the phase, e.g. `configure` or `make`
+
+        Yields
+        ------
+        record : dict
+            The record of the phase, containing its status
+        """
+
+        previous = getattr(self._phases, 'name', None)
+        previous_record = getattr(self._phases, 'record', None)
+        record = {'status': 'done'}
+        self._phases.name = name
+        self._phases.record = record
+        start = time.monotonic()
+        try:
+            yield record
+        except BaseException:
+            record['status'] = 'failed'
+            raise
+        finally:
+            self._phases.name = previous
+            self._phases.record = previous_record
+            self.timing_report.record(self.name,
+                                      self.get_version(),
+                                      name,
+                                      record.pop('status'),
+                                      start,
+                                      time.monotonic() - start,
+                                      **record)
+
+    def get_phase_log_path(self, phase=None):
+        """
+        Returns the path to the log of a phase
+
+        Parameters
+        ----------
+        phase : None or str
+            Name of the phase. If None, the current phase is used
+
+        Returns
+        -------
+        phase_log_path : Path
+            Path to the log of the phase. Subprocesses run outside of a phase
+            are logged to `subprocess.log`
+        """
+
+        if phase is None:
+            phase = getattr(self._phases, 'name', None) or 'subprocess'
+        name = self.name if self.name is not None else 'installer'
+        return self.local_dir.joinpath('.bout_install',
+                                       'logs',
+                                       name,
+                                       f'{phase}.log')
+
+    def run_subprocess(self, command, path):
+        """
+        Run a subprocess
+
+        Notes
+        -----
+        The output (stdout and stderr combined) is streamed to the log of the
+        current phase, which is truncated the first time it is used by the
+        installer.
+        Only the last `log_tail_lines` lines (see the `install_options`
+        section of the configuration) are kept in memory for the error report.
+        If streaming is interrupted (like by KeyboardInterrupt or a full
+        disk), the process group of the command is killed and reaped before
+        re-raising.
+        The cpu time, peak resident memory and bytes read and written by the
+        subprocess and its descendants are added to the record of the
+        current phase, together with the number of jobs.
+        The peak memory of the process tree is sampled every
+        `resource_sample_interval` seconds, as the operating system only
+        reports the peak of the largest single process
+
+        Parameters
+        ----------
+        command : str
+            The command to run
+        path : Path or str
+            Path to the location to run the command from
+        """
+
+        log_path = self.get_phase_log_path()
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        mode = 'ab' if log_path in self._log_paths else 'wb'
+        self._log_paths.add(log_path)
+
+        tail_lines = self.config.getint('install_options',
+                                        'log_tail_lines',
+                                        fallback=50)
+        tail = collections.deque(maxlen=tail_lines)
+        sample_interval = self.config.getfloat('install_options',
+                                               'resource_sample_interval',
+                                               fallback=0.5)
+
+        with log_path.open(mode) as log_file:
+            log_file.write(f'$ {command} (in {path})\n'.encode())
+            log_file.flush()
+            # The command runs in its own process group, so that it can be
+            # killed together with its descendants
+            process = subprocess.Popen(command.split(),
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT,
+                                       cwd=path,
+                                       env=self.get_subprocess_environment(),
+                                       start_new_session=True)
+            with ResourceMonitor(process.pid, sample_interval) as monitor:
+                try:
+                    with process.stdout:
+                        for line in process.stdout:
+                            log_file.write(line)
+                            tail.append(line)
+                    # Wait with wait4 to get the resources used by the tree
+                    _, status, rusage = os.wait4(process.pid, 0)
+                except BaseException:
+                    # Do not leave the command running (e.g. on
+                    # KeyboardInterrupt or a full disk)
+                    try:
+                        os.killpg(process.pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                    process.wait()
+                    raise
+                if os.WIFEXITED(status):
+                    process.returncode = os.WEXITSTATUS(status)
+                else:
+                    process.returncode = -os.WTERMSIG(status)
+
+        usage = get_usage(rusage)
+        usage['max_rss'] = max(usage['max_rss'], monitor.peak_rss)
+        record = getattr(self._phases, 'record', None)
+        if record is not None:
+            record['jobs'] = self.jobs
+            add_usage(record, usage)
+
+        if process.returncode != 0:
+            self.logger.error(f'{command} failed, see {log_path}')
+            output = b''.join(tail).decode(errors='replace')
+            result = subprocess.CompletedProcess(command.split(),
+                                                 process.returncode,
+                                                 stdout=output,
+                                                 stderr='')
+            self._raise_subprocess_error(result)
+
+    def get_make_commands(self, path):
+        """
+        Returns the commands making the package
+
+        Parameters
+        ----------
+        path : Path or str
+            Path to the get_configure_command file
+
+        Returns
+        -------
+        make_commands : list of tuple
+            The phase and command of each step, run in order
+        """
+
+        return [('make', f'make -j{self.jobs}'),
+                ('install', f'make -j{self.jobs} install{self.get_destdir()}')]
+
+    def make(self, path):
+        """
+        Make the package
+
+        Parameters
+        ----------
+        path : Path or str
+            Path to the get_configure_command file
+        """
+
+        for phase, command in self.get_make_commands(path):
+            with self.phase(phase):
+                self.run_subprocess(command, path)
+
+    def is_staging(self):
+        """
+        Returns whether make install is staged
+
+        Notes
+        -----
+        Staging is enabled by `stage_install` in the `install_options`
+        section of the configuration, and is skipped for installers which
+        set the `stage_install` class attribute to False
+
+        Returns
+        -------
+        staging : bool
+            Whether the package is installed into the staging directory
+        """
+
+        return self.stage_install and \
+            self.config.getboolean('install_options',
+                                   'stage_install',
+                                   fallback=True)
+
+    def get_stage_dir(self):
+        """
+        Returns the staging directory of the package
+
+        Notes
+        -----
+        The staging directory is in `local_dir`, so that the installed files
+        can be promoted by renaming
+
+        Returns
+        -------
+        stage_dir : Path
+            The staging directory
+        """
+
+        name = self.name if self.name is not None else 'installer'
+        return self.local_dir.joinpath('.bout_install', 'stage', name)
+
+    def get_destdir(self):
+        """
+        Returns the DESTDIR option of make install
+
+        Returns
+        -------
+        destdir : str
+            The option (with a leading space), or an empty string if the
+            installation is not staged
+        """
+
+        if not self.is_staging():
+            return ''
+        return f' DESTDIR={self.get_stage_dir()}'
+
+    def get_promotion_moves(self, staged_dir):
+        """
+        Returns the moves promoting the staged files into local_dir
+
+        Parameters
+        ----------
+        staged_dir : Path
+            The staged copy of `local_dir`
+
+        Returns
+        -------
+        directories : list of Path
+            The directories to create in `local_dir`
+        files : list of tuple
+            The staged paths and their targets in `local_dir`
+
+        Raises
+        ------
+        FileExistsError
+            If a staged file (or symbolic link) replaces a directory of
+            `local_dir`, or a staged directory replaces a file
+        """
+
+        directories = list()
+        files = list()
+        conflicts = list()
+        for root, dir_names, file_names in os.walk(staged_dir):
+            root = Path(root)
+            target_dir = self.local_dir.joinpath(root.relative_to(staged_dir))
+            for name in list(dir_names):
+                path = root.joinpath(name)
+                # Symbolic links to directories are moved as files
+                if path.is_symlink():
+                    dir_names.remove(name)
+                    file_names.append(name)
+                else:
+                    target_path = target_dir.joinpath(name)
+                    if target_path.exists() and not target_path.is_dir():
+                        conflicts.append(target_path)
+                    directories.append(target_path)
+            for name in file_names:
+                target_path = target_dir.joinpath(name)
+                if target_path.is_dir() and not target_path.is_symlink():
+                    conflicts.append(target_path)
+                files.append((root.joinpath(name), target_path))
+
+        if len(conflicts) != 0:
+            conflicts = ', '.join(str(path) for path in conflicts)
+            raise FileExistsError(f'Can not promote {staged_dir}, as files '
+                                  f'and directories would replace each '
+                                  f'other at: {conflicts}')
+        return directories, files
+
+    def promote_stage(self):
+        """
+        Moves the staged files into local_dir
+
+        Notes
+        -----
+        make install with DESTDIR installs into the staging directory
+        followed by the full path of `local_dir`.
+        The files are moved by renaming within one file system, so promoting
+        is quick, and `local_dir` never contains partially written files.
+        All the moves are checked for conflicts (see `get_promotion_moves`)
+        before anything is moved.
+        An interrupted promotion is recorded in the install record, and is
+        finished by the next installation (see `resume_promotion`).
+        If the package does not honour DESTDIR, nothing is staged, and the
+        files are already in `local_dir`
+        """
+
+        stage_dir = self.get_stage_dir()
+        staged_dir = stage_dir.joinpath(self.local_dir.relative_to('/'))
+
+        if not staged_dir.is_dir():
+            self.logger.warning(f'Nothing was staged in {stage_dir}')
+        else:
+            directories, files = self.get_promotion_moves(staged_dir)
+
+            self.update_install_record(promoting=str(stage_dir))
+            for directory in directories:
+                directory.mkdir(exist_ok=True)
+            promoted_paths = list()
+            for path, target_path in files:
+                os.replace(path, target_path)
+                promoted_paths.append(
+                    str(target_path.relative_to(self.local_dir)))
+            self.logger.info(f'Promoted {len(promoted_paths)} files into '
+                             f'{self.local_dir}')
+            # The promoted files are stored in the artifact cache
+            self.promoted_paths = promoted_paths
+
+        shutil.rmtree(stage_dir, ignore_errors=True)
+        if self.read_install_record().get('promoting') is not None:
+            self.update_install_record(promoting=None)
+
+    def resume_promotion(self):
+        """
+        Finishes a promotion which was interrupted
+
+        Notes
+        -----
+        The files which were not moved yet are still in the staging
+        directory, so promoting again completes `local_dir`
+        """
+
+        if self.read_install_record().get('promoting') is None:
+            return
+
+        self.logger.warning(f'The promotion of {self.name} was interrupted, '
+                            f'finishing it')
+        with self.phase('promote'):
+            self.promote_stage()
+
+    def get_install_record_path(self, name=None):
+        """
+        Returns the path to the install record of a package
+
+        The install record is a small json file in `local_dir` containing
+        metadata about the installation of the package, such as its build key
+
+        Parameters
+        ----------
+        name : None or str
+            Name of the package. If None, the name of this installer is used
+
+        Returns
+        -------
+        install_record_path : Path
+            Path to the install record
+        """
+
+        name = self.name if name is None else name
+        return self.local_dir.joinpath('.bout_install', f'{name}.json')
+
+    def read_install_record(self, name=None):
+        """
+        Returns the install record of a package
+
+        Parameters
+        ----------
+        name : None or str
+            Name of the package. If None, the name of this installer is used
+
+        Returns
+        -------
+        install_record : dict
+            The content of the install record. Empty if there is no record
+        """
+
+        if name is None and self.name is None:
+            return dict()
+        return read_json(self.get_install_record_path(name))
+
+    def update_install_record(self, **entries):
+        """
+        Updates the install record of the package with the given entries
+
+        Parameters
+        ----------
+        entries : dict
+            The entries to add to the install record
+        """
+
+        if self.name is not None:
+            update_json(self.get_install_record_path(), **entries)
+
+    @staticmethod
+    def get_fingerprint(**inputs):
+        """
+        Returns a hash of the inputs of a phase of the installation
+
+        Parameters
+        ----------
+        inputs : dict
+            The inputs. Must be serializable to json (or convertible to str)
+
+        Returns
+        -------
+        fingerprint : str
+            The hex digest of the SHA-256 hash
+        """
+
+        content = json.dumps(inputs, sort_keys=True, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def get_dependency_keys(self):
+        """
+        Returns the build keys of the dependencies
+
+        Returns
+        -------
+        dependency_keys : dict
+            The build keys indexed by the names of the dependencies.
+            Dependencies without an install record (e.g. preinstalled ones)
+            are marked as external.
+            When planning, the build keys the dependencies would be
+            installed with are used
+        """
+
+        planned_keys = \
+            self.registry.plan.build_keys if self.is_planning() else dict()
+        return {name: planned_keys.get(
+                    name,
+                    self.read_install_record(name).get('build_key',
+                                                       'external'))
+                for name in self.dependencies}
+
+    def get_version(self):
+        """
+        Returns the version of the package
+
+        Returns
+        -------
+        version : None or str
+            The version from the `versions` section of the configuration.
+            None if the package has no version there
+        """
+
+        if self.name is None:
+            return None
+        return self.config.get('versions', self.name, fallback=None)
+
+    def get_build_key(self, url, build_options=None):
+        """
+        Returns a key identifying the files installed by building the package
+
+        Notes
+        -----
+        The key is a hash of the package, its url and version, the build
+        options, the installation directory (as the installed files refer to
+        it), the identity of the compilers and the build keys of the
+        dependencies.
+        It changes whenever any of the build inputs change, including when a
+        dependency is rebuilt with other inputs
+
+        Parameters
+        ----------
+        url : str
+            Url to the source of the package
+        build_options : None or dict
+            The configure (or cmake) options of the package
+
+        Returns
+        -------
+        build_key : None or str
+            The key. None if the installer is not named
+        """
+
+        if self.name is None:
+            return None
+
+        return self.get_fingerprint(
+            name=self.name,
+            installer=type(self).__name__,
+            url=url,
+            version=self.get_version(),
+            build_options=build_options,
+            local_dir=self.local_dir,
+            compiler=get_compiler_identity(self.local_dir),
+            dependencies=self.get_dependency_keys())
+
+    def is_installed(self, build_key, file_from_make, overwrite_on_exist):
+        """
+        Returns whether the package is installed from the same build inputs
+
+        Parameters
+        ----------
+        build_key : None or str
+            The build key of the package
+        file_from_make : Path or str
+            File originating from the make processes (used to check if the
+            package has been made)
+        overwrite_on_exist : bool
+            Whether to overwrite the package if it is already found
+
+        Returns
+        -------
+        installed : bool
+            Whether nothing needs to be done
+        """
+
+        return (not overwrite_on_exist and
+                build_key is not None and
+                Path(file_from_make).is_file() and
+                self.read_install_record().get('build_key') == build_key)
+
+    def is_source_needed(self, url):
+        """
+        Returns whether installing the package would need its source
+
+        Notes
+        -----
+        The source is not needed if the package is installed from the same
+        build inputs, or can be unpacked from the artifact cache.
+        The build options and the file from make are taken from the
+        `extra_config_options` and `file_from_make` attributes passed to
+        `install_package` by `install`.
+        As a dependency may still be rebuilt, the source may be needed after
+        all, and is then downloaded when the package is installed
+
+        Parameters
+        ----------
+        url : str
+            Url to the source of the package
+
+        Returns
+        -------
+        needed : bool
+            Whether the source is needed
+        """
+
+        file_from_make = getattr(self, 'file_from_make', None)
+        if file_from_make is None or \
+                getattr(self, 'overwrite_on_exist', False):
+            return True
+
+        build_key = self.get_build_key(
+            url, getattr(self, 'extra_config_options', None))
+        if self.is_installed(build_key, file_from_make, False):
+            return False
+        return not (self.artifact_cache is not None and
+                    self.cache_artifacts and
+                    build_key is not None and
+                    self.artifact_cache.contains(build_key))
+
+    def is_phase_current(self, phase, fingerprint, output_path):
+        """
+        Returns whether a phase of the installation can be skipped
+
+        Notes
+        -----
+        A phase is current if its output exists, and the fingerprint of its
+        inputs equals the one recorded when it last ran.
+        Outputs from installations prior to the fingerprints are trusted, and
+        the fingerprint is recorded.
+        A fingerprint recorded as None never matches, which is used to rerun
+        making after configuring
+
+        Parameters
+        ----------
+        phase : str
+            Name of the phase, e.g. `configure` or `make`
+        fingerprint : str
+            The fingerprint of the inputs of the phase
+        output_path : Path or str
+            A file created by the phase
+
+        Returns
+        -------
+        current : bool
+            Whether the phase is up to date
+        """
+
+        if not Path(output_path).exists():
+            return False
+
+        install_record = self.read_install_record()
+        if f'{phase}_fingerprint' not in install_record:
+            if not self.is_planning():
+                self.update_install_record(
+                    **{f'{phase}_fingerprint': fingerprint})
+            return True
+        return install_record[f'{phase}_fingerprint'] == fingerprint
+
+    def get_source_name(self, tar_dir):
+        """
+        Returns the name of a source directory used in the fingerprints
+
+        Notes
+        -----
+        Sources in the build directory are named relative to it, so that the
+        fingerprints do not change with the build root
+
+        Parameters
+        ----------
+        tar_dir : Path
+            Directory of the source
+
+        Returns
+        -------
+        source_name : str
+            The directory relative to the build directory, or the full
+            directory for sources outside of it (like git repositories)
+        """
+
+        try:
+            return str(Path(tar_dir).relative_to(self.build_dir))
+        except ValueError:
+            return str(tar_dir)
+
+    def get_configure_fingerprint(self, tar_dir, command):
+        """
+        Returns the fingerprint of the inputs of configuring
+
+        Parameters
+        ----------
+        tar_dir : Path
+            Directory of the source
+        command : str or dict
+            The configure command (or options)
+
+        Returns
+        -------
+        fingerprint : str
+            The fingerprint
+        """
+
+        return self.get_fingerprint(
+            tar_dir=self.get_source_name(tar_dir),
+            command=command,
+            compiler=get_compiler_identity(self.local_dir),
+            dependencies=self.get_dependency_keys())
+
+    def get_make_fingerprint(self, tar_dir, file_from_make):
+        """
+        Returns the fingerprint of the inputs of making
+
+        Notes
+        -----
+        Making depends on the configuration, so the fingerprint changes
+        whenever the package has been configured with other inputs
+
+        Parameters
+        ----------
+        tar_dir : Path
+            Directory of the source
+        file_from_make : Path or str
+            File originating from the make processes
+
+        Returns
+        -------
+        fingerprint : str
+            The fingerprint
+        """
+
+        configure_fingerprint = \
+            self.read_install_record().get('configure_fingerprint')
+        return self.get_fingerprint(installer=type(self).__name__,
+                                    tar_dir=self.get_source_name(tar_dir),
+                                    file_from_make=file_from_make,
+                                    configure=configure_fingerprint)
+
+    def get_local_snapshot(self):
+        """
+        Returns the state of the files in `local_dir`
+
+        Returns
+        -------
+        snapshot : dict
+            The size and modification time (None for directories) indexed by
+            the paths relative to `local_dir`
+        """
+
+        snapshot = dict()
+        for root, dir_names, file_names in os.walk(self.local_dir):
+            root = Path(root)
+            if root == self.local_dir and '.bout_install' in dir_names:
+                dir_names.remove('.bout_install')
+            for name in dir_names + file_names:
+                path = root.joinpath(name)
+                path_stat = path.lstat()
+                relative_path = str(path.relative_to(self.local_dir))
+                if path.is_dir() and not path.is_symlink():
+                    snapshot[relative_path] = None
+                else:
+                    snapshot[relative_path] = (path_stat.st_size,
+                                               path_stat.st_mtime_ns)
+        return snapshot
+
+    def get_build_state(self):
+        """
+        Returns the number of builds started and running in this run
+
+        Returns
+        -------
+        started : int
+            The number of builds started
+        running : int
+            The number of builds running
+        """
+
+        if self.registry is None:
+            return 0, 1
+        return self.registry.builds_started, self.registry.builds_running
+
+    def run_restore_artifact(self, build_key, overwrite_on_exist):
+        """
+        Unpacks the installed files from the artifact cache if present
+
+        Notes
+        -----
+        The artifact is unpacked into the staging directory, and promoted
+        into `local_dir` once fully unpacked (see `promote_stage`), so that
+        `local_dir` never contains a partially unpacked package
+
+        Parameters
+        ----------
+        build_key : None or str
+            The build key of the package
+        overwrite_on_exist : bool
+            Whether to overwrite the package if it is already found
+
+        Returns
+        -------
+        restored : bool
+            Whether the package was unpacked from the artifact cache
+        """
+
+        if self.artifact_cache is None or not self.cache_artifacts or \
+                build_key is None or overwrite_on_exist:
+            return False
+
+        stage_dir = self.get_stage_dir()
+        staged_dir = stage_dir.joinpath(self.local_dir.relative_to('/'))
+        with self.phase('restore') as phase:
+            shutil.rmtree(stage_dir, ignore_errors=True)
+            try:
+                found = self.artifact_cache.get(build_key, staged_dir)
+            except Exception:
+                shutil.rmtree(stage_dir, ignore_errors=True)
+                raise
+            if not found:
+                phase['status'] = 'missed'
+                return False
+            self.promote_stage()
+            phase['status'] = 'cached'
+
+        self.update_install_record(build_key=build_key)
+        return True
+
+    def start_artifact_capture(self, build_key):
+        """
+        Records the state of `local_dir` prior to building
+
+        Notes
+        -----
+        A staged installation lists the installed files when promoting.
+        Otherwise the installed files are found by comparing `local_dir`
+        before and after building.
+        This is only reliable if no other package is built meanwhile, so the
+        snapshot is skipped if other builds are running
+
+        Parameters
+        ----------
+        build_key : None or str
+            The build key of the package
+
+        Returns
+        -------
+        capture : tuple
+            The number of builds started and the snapshot (None if staging,
+            or if the installed files can not be captured)
+        """
+
+        self.promoted_paths = None
+
+        started, running = self.get_build_state()
+        if self.artifact_cache is None or not self.cache_artifacts or \
+                build_key is None or self.is_staging() or running != 1:
+            return started, None
+        return started, self.get_local_snapshot()
+
+    def finish_artifact_capture(self, build_key, capture):
+        """
+        Records the build key, and stores the files installed since
+        `start_artifact_capture`
+
+        Parameters
+        ----------
+        build_key : None or str
+            The build key of the package
+        capture : tuple
+            The return value of `start_artifact_capture`
+        """
+
+        if build_key is None:
+            return
+
+        self.update_install_record(build_key=build_key)
+
+        if self.artifact_cache is None or not self.cache_artifacts:
+            return
+
+        started, snapshot = capture
+        if self.promoted_paths is not None:
+            paths = self.promoted_paths
+        elif snapshot is not None and self.get_build_state() == (started, 1):
+            after = self.get_local_snapshot()
+            paths = [path for path, state in after.items()
+                     if path not in snapshot or
+                     (state is not None and snapshot[path] != state)]
+        else:
+            return
+
+        if len(paths) != 0:
+            self.artifact_cache.put(build_key, self.local_dir, paths)
+
+    def get_cached_source(self, url):
+        """
+        Places the tar file of url from the source cache if present
+
+        Parameters
+        ----------
+        url : str
+            The url to download the tar-file from
+
+        Returns
+        -------
+        found : bool
+            Whether the tar file was found in the source cache
+        """
+
+        if self.source_cache is None:
+            return False
+
+        return self.source_cache.get(url, self.get_tar_file_path(url))
+
+    def run_download_tar(self, url, tar_file_path, overwrite_on_exist):
+        """
+        Downloads the tar-file if not found
+
+        Parameters
+        ----------
+        url : str
+            The url to download the tar-file from
+        tar_file_path : Path
+            Path to the tar file
+        overwrite_on_exist : bool
+            Whether to overwrite the package if it is already found
+        """
+
+        # The file may be downloaded concurrently by a prefetch
+        with get_path_lock(tar_file_path), self.phase('download') as phase:
+            if not tar_file_path.is_file() or overwrite_on_exist:
+                if not overwrite_on_exist and self.get_cached_source(url):
+                    phase['status'] = 'cached'
+                    return
+                self.logger.info(f'Downloading {url}')
+                self.get_tar_file(url)
+                if self.source_cache is not None:
+                    self.source_cache.put(url, tar_file_path)
+            else:
+                phase['status'] = 'skipped'
+                self.logger.info(f'{tar_file_path} found, skipping download')
+
+    def run_stream_untar(self, url, tar_file_path, overwrite_on_exist):
+        """
+        Downloads and untars the tar-file in one pass if not found
+
+        Parameters
+        ----------
+        url : str
+            The url to download the tar-file from
+        tar_file_path : Path
+            Path to the tar file
+        overwrite_on_exist : bool
+            Whether to overwrite the package if it is already found
+        """
+
+        # Downloading and untarring are timed as one download phase
+        with get_path_lock(tar_file_path), self.phase('download') as phase:
+            # If the tar file was not kept, the untarred directory is
+            # required
+            found = tar_file_path.is_file()
+            if not found and 'tar_dir' in read_manifest(tar_file_path):
+                found = self.get_tar_dir(tar_file_path).is_dir()
+
+            if not found and not overwrite_on_exist:
+                found = self.get_cached_source(url)
+                if found:
+                    phase['status'] = 'cached'
+
+            if not found or overwrite_on_exist:
+                self.logger.info(f'Downloading and untarring {url}')
+                self.stream_untar(url)
+                if self.source_cache is not None and tar_file_path.is_file():
+                    self.source_cache.put(url, tar_file_path)
+            elif phase['status'] != 'cached':
+                phase['status'] = 'skipped'
+                self.logger.info(f'{tar_file_path} found, skipping download')
+
+    def run_untar(self, tar_file_path, tar_dir, overwrite_on_exist):
+        """
+        Untars the tar file
+
+        Parameters
+        ----------
+        tar_file_path : Path
+            Path to the tar file
+        tar_dir : Path
+            Directory to the tar file
+        overwrite_on_exist : bool
+            Whether to overwrite the package if it is already found
+        """
+
+        # The file may be untarred concurrently by a pipeline
+        with get_path_lock(tar_dir), self.phase('untar') as phase:
+            if not tar_dir.is_dir() or overwrite_on_exist:
+                self.logger.info(f'Untarring {tar_file_path}')
+                self.untar(tar_file_path)
+            else:
+                phase['status'] = 'skipped'
+                self.logger.info(f'{tar_dir} found, skipping untarring')
+
+    def get_build_path(self, tar_dir):
+        """
+        Returns the directory the package is made in
+
+        Parameters
+        ----------
+        tar_dir : Path
+            Directory of the source
+
+        Returns
+        -------
+        build_path : Path
+            The directory of the source. Installers building out of the
+            source (like CMake projects) return a directory inside it
+        """
+
+        return tar_dir
+
+    def get_configure_step(self,
+                           tar_dir,
+                           config_log_path,
+                           extra_config_option):
+        """
+        Returns the command configuring the package and what it depends on
+
+        Parameters
+        ----------
+        tar_dir : Path
+            Directory of the tar file
+        config_log_path : Path
+            Path to the log file written by configure
+        extra_config_option:
+            Configure option to include.
+            --prefix=self.local_dir is already added as an option
+
+        Returns
+        -------
+        config_str : str
+            The configure command
+        fingerprint : str
+            The fingerprint of the inputs of configuring
+        output_path : Path
+            A file created by configuring
+        """
+
+        config_options = dict(prefix=str(self.local_dir))
+        if extra_config_option is not None:
+            config_options = {**config_options, **extra_config_option}
+
+        config_str = self.get_configure_command(config_options=config_options)
+        fingerprint = self.get_configure_fingerprint(tar_dir, config_str)
+        return config_str, fingerprint, config_log_path
+
+    def run_configure(self,
+                      tar_dir,
+                      config_log_path,
+                      extra_config_option,
+                      overwrite_on_exist):
+        """
+        Configures the package
+
+        Parameters
+        ----------
+        tar_dir : Path
+            Directory of the tar file
+        config_log_path : Path
+            Path to the Makefile
         extra_config_option:
             Configure option to include.
             --prefix=self.local_dir is already added as an option
@@ -396,22 +2519,29 @@ class Installer(object):
             Whether to overwrite the package if it is already found
         """
 
-        if not config_log_path.is_file() or overwrite_on_exist:
-            config_options = dict(prefix=str(self.local_dir))
-            if extra_config_option is not None:
-                config_options = {**config_options, **extra_config_option}
-
-            config_str = \
-                self.get_configure_command(config_options=config_options)
+        config_str, fingerprint, output_path = \
+            self.get_configure_step(tar_dir,
+                                    config_log_path,
+                                    extra_config_option)
 
+        if overwrite_on_exist or \
+                not self.is_phase_current('configure',
+                                          fingerprint,
+                                          output_path):
             self.logger.info(f'Configuring with: {config_str}')
-            self.run_subprocess(config_str, tar_dir)
+            with self.phase('configure'):
+                self.run_subprocess(config_str, tar_dir)
+            self.update_install_record(configure_fingerprint=fingerprint,
+                                       make_fingerprint=None)
         else:
-            self.logger.info(f'{config_log_path} found, skipping configuring')
+            with self.phase('configure') as phase:
+                phase['status'] = 'skipped'
+                self.logger.info(f'{output_path} found and configured '
+                                 f'with the same inputs, skipping configuring')
 
     def run_make(self, tar_dir, file_from_make, overwrite_on_exist):
         """
-        Runs make and make install
+        Runs make and make install, and promotes the staged files
 
         Parameters
         ----------
@@ -424,11 +2554,26 @@ class Installer(object):
             Whether to overwrite the package if it is already found
         """
 
-        if not file_from_make.is_file() or overwrite_on_exist:
-            self.logger.info(f'Making (including make install)')
+        fingerprint = self.get_make_fingerprint(tar_dir, file_from_make)
+
+        if overwrite_on_exist or \
+                not self.is_phase_current('make', fingerprint, file_from_make):
+            self.logger.info(f'Making (including make install) with '
+                             f'{self.jobs} parallel jobs')
+            # Discard what an interrupted installation left in the staging
+            # directory
+            if self.is_staging():
+                shutil.rmtree(self.get_stage_dir(), ignore_errors=True)
             self.make(tar_dir)
+            if self.is_staging():
+                with self.phase('promote'):
+                    self.promote_stage()
+            self.update_install_record(make_fingerprint=fingerprint)
         else:
-            self.logger.info(f'{file_from_make} found, skipping making')
+            with self.phase('make') as phase:
+                phase['status'] = 'skipped'
+                self.logger.info(f'{file_from_make} found and made with the '
+                                 f'same inputs, skipping making')
 
     def install_package(self,
                         url,
@@ -457,13 +2602,30 @@ class Installer(object):
             option
         """
 
-        # Download the tar file
-        tar_file_path = self.get_tar_file_path(url)
-        self.run_download_tar(url, tar_file_path, overwrite_on_exist)
-
-        # Untar
-        tar_dir = self.get_tar_dir(tar_file_path)
-        self.run_untar(tar_file_path, tar_dir, overwrite_on_exist)
+        if self.is_planning():
+            self.plan_package(url,
+                              file_from_make,
+                              path_config_log,
+                              overwrite_on_exist,
+                              extra_config_option)
+            return
+
+        self.resume_promotion()
+
+        # Skip if nothing has changed, or unpack from the artifact cache if
+        # built before
+        build_key = self.get_build_key(url, extra_config_option)
+        if self.is_installed(build_key, file_from_make, overwrite_on_exist):
+            with self.phase('install_package') as phase:
+                phase['status'] = 'skipped'
+                self.logger.info(f'{self.name} is up to date, skipping')
+            return
+        if self.run_restore_artifact(build_key, overwrite_on_exist):
+            return
+        capture = self.start_artifact_capture(build_key)
+
+        # Download and untar
+        tar_dir = self.prepare_source(url, overwrite_on_exist)
 
         # Configure and make
         config_log_path = tar_dir.joinpath(path_config_log)
@@ -471,7 +2633,277 @@ class Installer(object):
                            config_log_path,
                            extra_config_option,
                            overwrite_on_exist)
-        self.run_make(tar_dir, file_from_make, overwrite_on_exist)
+        self.run_make(self.get_build_path(tar_dir),
+                      file_from_make,
+                      overwrite_on_exist)
+
+        # Store the installed files in the artifact cache
+        self.finish_artifact_capture(build_key, capture)
+
+        # Free the build root
+        self.clean_build_dir(tar_dir)
+
+    def is_planning(self):
+        """
+        Returns whether the installation is only planned
+
+        Returns
+        -------
+        planning : bool
+            Whether the registry of the run holds a plan (see
+            `bout_install.Plan.Plan`)
+        """
+
+        return self.registry is not None and self.registry.plan is not None
+
+    def plan_package(self,
+                     url,
+                     file_from_make,
+                     path_config_log='config.log',
+                     overwrite_on_exist=False,
+                     extra_config_option=None):
+        """
+        Adds the phases install_package would run to the plan of the run
+
+        Notes
+        -----
+        The same checks as in `install_package` decide which phases are
+        skipped, but nothing is downloaded, built or recorded
+
+        Parameters
+        ----------
+        url : str
+            Url to the tar file of the package
+        file_from_make : Path or str
+            File originating from the make processes
+        path_config_log : str or Path
+            Name of the log file for configure relative to the configuration
+            file
+        overwrite_on_exist : bool
+            Whether to overwrite the package if it is already found
+        extra_config_option : dict
+            Configure option to include
+        """
+
+        build_key = self.get_build_key(url, extra_config_option)
+        phases = self.plan_restore(build_key,
+                                   file_from_make,
+                                   overwrite_on_exist)
+        if phases is None:
+            phases, tar_dir = self.plan_source(url, overwrite_on_exist)
+            phases.extend(self.plan_build(tar_dir,
+                                          path_config_log,
+                                          file_from_make,
+                                          extra_config_option,
+                                          overwrite_on_exist))
+
+        self.registry.plan.add(self.name,
+                               self.get_version(),
+                               build_key,
+                               phases)
+
+    def plan_restore(self, build_key, file_from_make, overwrite_on_exist):
+        """
+        Returns the phases if the package is up to date or in the cache
+
+        Parameters
+        ----------
+        build_key : None or str
+            The build key of the package
+        file_from_make : Path or str
+            File originating from the make processes
+        overwrite_on_exist : bool
+            Whether to overwrite the package if it is already found
+
+        Returns
+        -------
+        phases : None or list of dict
+            The skipped installation or the restore from the artifact cache.
+            None if the package must be built
+        """
+
+        if self.is_installed(build_key, file_from_make, overwrite_on_exist):
+            return [{'phase': 'install_package', 'status': 'skipped'}]
+        if self.artifact_cache is not None and self.cache_artifacts and \
+                build_key is not None and not overwrite_on_exist and \
+                self.artifact_cache.contains(build_key):
+            return [{'phase': 'restore', 'status': 'cached'}]
+        return None
+
+    def plan_source(self, url, overwrite_on_exist):
+        """
+        Returns the phases preparing the source
+
+        Notes
+        -----
+        The size of a source which would be downloaded is asked from the
+        server, and the download is estimated from the throughput history
+        of the host.
+        If the tar file is not present, the directory it untars to is
+        assumed to be named after the tar file
+
+        Parameters
+        ----------
+        url : str
+            The url of the source
+        overwrite_on_exist : bool
+            Whether to overwrite the source if it is already found
+
+        Returns
+        -------
+        phases : list of dict
+            The download and untar phases
+        tar_dir : Path
+            The directory of the untarred source
+        """
+
+        tar_file_path = self.get_tar_file_path(url)
+        stream_extract = self.config.getboolean('download_options',
+                                                'stream_extract',
+                                                fallback=False)
+
+        found = tar_file_path.is_file()
+        if stream_extract and not found and \
+                'tar_dir' in read_manifest(tar_file_path):
+            found = self.get_tar_dir(tar_file_path).is_dir()
+
+        phases = [self.plan_download(url, found, overwrite_on_exist)]
+
+        if tar_file_path.is_file() or 'tar_dir' in read_manifest(
+                tar_file_path):
+            tar_dir = self.get_tar_dir(tar_file_path)
+        else:
+            dir_name = tar_file_path.name
+            for suffix in ('.tar', '.tgz', '.gz', '.bz2', '.xz', '.zst'):
+                dir_name = dir_name.replace(suffix, '')
+            tar_dir = self.get_extract_dir(tar_file_path).joinpath(dir_name)
+
+        # Streaming untars while downloading
+        if not stream_extract:
+            if tar_dir.is_dir() and not overwrite_on_exist:
+                phases.append({'phase': 'untar', 'status': 'skipped'})
+            else:
+                phases.append({'phase': 'untar', 'status': 'run'})
+
+        for extra_url in self.extra_sources.values():
+            found = self.get_tar_file_path(extra_url).is_file()
+            phases.append(self.plan_download(extra_url,
+                                             found,
+                                             overwrite_on_exist))
+
+        return phases, tar_dir
+
+    def plan_download(self, url, found, overwrite_on_exist):
+        """
+        Returns the phase downloading a tar file
+
+        Parameters
+        ----------
+        url : str
+            The url of the tar file
+        found : bool
+            Whether the tar file (or what it untars to) is present
+        overwrite_on_exist : bool
+            Whether to overwrite the tar file if it is already found
+
+        Returns
+        -------
+        download : dict
+            The download phase
+        """
+
+        if found and not overwrite_on_exist:
+            return {'phase': 'download', 'status': 'skipped'}
+        if not overwrite_on_exist and self.source_cache is not None and \
+                self.source_cache.contains(url):
+            return {'phase': 'download', 'status': 'cached'}
+
+        size = self.get_source_size(url)
+        download = {'phase': 'download', 'status': 'run', 'bytes': size}
+        throughput = self.downloader.get_throughput(url)
+        if size is not None and throughput is not None:
+            download['seconds'] = size / throughput
+        return download
+
+    def plan_build(self,
+                   tar_dir,
+                   path_config_log,
+                   file_from_make,
+                   extra_config_option,
+                   overwrite_on_exist):
+        """
+        Returns the phases configuring and making the package
+
+        Parameters
+        ----------
+        tar_dir : Path
+            Directory of the source
+        path_config_log : str or Path
+            Name of the log file for configure relative to the configuration
+            file
+        file_from_make : Path or str
+            File originating from the make processes
+        extra_config_option : dict
+            Configure option to include
+        overwrite_on_exist : bool
+            Whether to overwrite the package if it is already found
+
+        Returns
+        -------
+        phases : list of dict
+            The configure and make phases. Making is planned to run whenever
+            configuring is
+        """
+
+        config_str, fingerprint, output_path = \
+            self.get_configure_step(tar_dir,
+                                    tar_dir.joinpath(path_config_log),
+                                    extra_config_option)
+        if overwrite_on_exist or \
+                not self.is_phase_current('configure',
+                                          fingerprint,
+                                          output_path):
+            configure = {'phase': 'configure',
+                         'status': 'run',
+                         'command': config_str}
+        else:
+            configure = {'phase': 'configure', 'status': 'skipped'}
+
+        return [configure, *self.plan_make(self.get_build_path(tar_dir),
+                                           file_from_make,
+                                           overwrite_on_exist or
+                                           configure['status'] == 'run')]
+
+    def plan_make(self, tar_dir, file_from_make, overwrite_on_exist):
+        """
+        Returns the phases making the package
+
+        Parameters
+        ----------
+        tar_dir : Path
+            Directory to make the package in
+        file_from_make : Path or str
+            File originating from the make processes
+        overwrite_on_exist : bool
+            Whether to make anew, e.g. as the package is configured anew
+
+        Returns
+        -------
+        phases : list of dict
+            The phases of `get_make_commands`, and the promotion of the
+            staged files
+        """
+
+        if not overwrite_on_exist:
+            fingerprint = self.get_make_fingerprint(tar_dir, file_from_make)
+            if self.is_phase_current('make', fingerprint, file_from_make):
+                return [{'phase': 'make', 'status': 'skipped'}]
+
+        phases = [{'phase': phase, 'status': 'run', 'command': command}
+                  for phase, command in self.get_make_commands(tar_dir)]
+        if self.is_staging():
+            phases.append({'phase': 'promote', 'status': 'run'})
+        return phases
 
     def _raise_subprocess_error(self, result):
         """
@@ -0,0 +1,145 @@
+import configparser
+import threading
+from pathlib import Path
+from bout_install.ArtifactCache import get_artifact_cache
+from bout_install.CompilerCache import get_compiler_cache
+from bout_install.Downloader import get_downloader
+from bout_install.SourceCache import get_source_cache
+from bout_install.TimingReport import TimingReport
+
+
+class InstallerRegistry(object):
+    """
+    Class for sharing installers between the packages installed in one run
+
+    The registry creates at most one installer object per package name, and
+    runs the installation of each package at most once.
+    Nested calls to install dependencies (like PETSc installing MPI) are
+    therefore cheap lookups once the dependency has been installed.
+
+    Examples
+    --------
+    >>> from bout_install.InstallerRegistry import InstallerRegistry
+    >>> from bout_install.main import INSTALLER_CLASSES
+    >>>
+    >>> registry = InstallerRegistry('config.ini', INSTALLER_CLASSES)
+    >>>
+    >>> # Installs MPI and PETSc
+    >>> registry.install('petsc')
+    >>> # MPI has already been installed, so this returns immediately
+    >>> registry.install('mpi')
+    """
+
+    def __init__(self, config_path, installer_classes):
+        """
+        Parses the configuration file and initializes the memoization
+
+        Parameters
+        ----------
+        config_path : Path or str
+            The path to the configuration file
+        installer_classes : dict
+            Dictionary of the installer classes indexed by package name
+        """
+
+        self.config_path = Path(config_path)
+        self.installer_classes = installer_classes
+
+        # The configuration file is only parsed once per run
+        self.config = configparser.ConfigParser(allow_no_value=True)
+        with self.config_path.open() as f:
+            self.config.read_file(f)
+
+        # The http session is shared by all the installers
+        self.downloader = get_downloader(self.config)
+        # As is the source cache, so that the statistics cover the whole run
+        self.source_cache = get_source_cache(self.config)
+        self.artifact_cache = get_artifact_cache(self.config)
+        self.compiler_cache = get_compiler_cache(self.config)
+        # The phases of all the packages are timed in one report
+        self.timing_report = TimingReport()
+        # If set, the installers add what they would do to the plan instead
+        # of installing
+        self.plan = None
+
+        self.installers = dict()
+        self.results = dict()
+
+        # Used by the installers to tell whether other packages were built
+        # while building
+        self.builds_started = 0
+        self.builds_running = 0
+
+        # Reentrant, as creating an installer creates its dependencies
+        self._lock = threading.RLock()
+        self._install_locks = dict()
+
+    def get_installer(self, name):
+        """
+        Returns the installer of a package, creating it if needed
+
+        Parameters
+        ----------
+        name : str
+            Name of the package
+
+        Returns
+        -------
+        installer : Installer
+            The installer of the package
+        """
+
+        with self._lock:
+            if name not in self.installers:
+                installer_class = self.installer_classes[name]
+                self.installers[name] = \
+                    installer_class(config_path=self.config_path,
+                                    registry=self)
+                self._install_locks[name] = threading.Lock()
+            return self.installers[name]
+
+    def install(self, name):
+        """
+        Installs a package unless it has already been installed in this run
+
+        Notes
+        -----
+        If the package is being installed by another thread, the call blocks
+        until that installation has finished.
+        A failed installation is not retried, but the original error is
+        re-raised
+
+        Parameters
+        ----------
+        name : str
+            Name of the package
+        """
+
+        installer = self.get_installer(name)
+
+        with self._install_locks[name]:
+            if name not in self.results:
+                with self._lock:
+                    self.builds_started += 1
+                    self.builds_running += 1
+                # Discard the statistics of earlier, failed runs
+                if self.compiler_cache is not None and self.plan is None:
+                    stats_log_path = installer.get_compiler_cache_log_path()
+                    if stats_log_path.is_file():
+                        stats_log_path.unlink()
+                try:
+                    installer.install()
+                    self.results[name] = None
+                    if self.compiler_cache is not None and \
+                            self.plan is None:
+                        self.compiler_cache.collect(
+                            name, installer.get_compiler_cache_log_path())
+                except Exception as e:
+                    self.results[name] = e
+                    raise
+                finally:
+                    with self._lock:
+                        self.builds_running -= 1
+
+        if self.results[name] is not None:
+            raise self.results[name]
@@ -1,3 +1,4 @@
+import shutil
 from bout_install.Installer import Installer
 
 
@@ -7,6 +8,11 @@ class InstallerUsingCMake(Installer):
     `./configure`
     """
 
+    # CMake launches the compilers through ccache itself (see `run_cmake`),
+    # as it would otherwise record the masquerade directory of ccache as the
+    # location of the compilers
+    wrap_compilers = False
+
     @staticmethod
     def get_cmake_command(cmake_options=None):
         """
@@ -37,6 +43,38 @@ class InstallerUsingCMake(Installer):
         cmake_str = f'cmake{options} ..'
         return cmake_str
 
+    def get_cmake_step(self, build_dir, extra_cmake_option):
+        """
+        Returns the CMake command and the fingerprint of its inputs
+
+        Parameters
+        ----------
+        build_dir : Path
+            Directory to make the build
+        extra_cmake_option:
+            Configure option to include.
+            -DCMAKE_INSTALL_PREFIX=self.local_dir is already added as an option
+
+        Returns
+        -------
+        cmake_str : str
+            The CMake command
+        fingerprint : str
+            The fingerprint of the inputs of configuring
+        """
+
+        cmake_options = dict(DCMAKE_INSTALL_PREFIX=str(self.local_dir))
+        if self.compiler_cache is not None:
+            for language in ('C', 'CXX', 'Fortran'):
+                cmake_options[f'DCMAKE_{language}_COMPILER_LAUNCHER'] = \
+                    self.compiler_cache.executable
+        if extra_cmake_option is not None:
+            cmake_options = {**cmake_options, **extra_cmake_option}
+
+        cmake_str = self.get_cmake_command(cmake_options=cmake_options)
+        fingerprint = self.get_configure_fingerprint(build_dir, cmake_str)
+        return cmake_str, fingerprint
+
     def run_cmake(self,
                   build_dir,
                   makefile_path,
@@ -58,63 +96,117 @@ class InstallerUsingCMake(Installer):
             Whether to overwrite the package if it is already found
         """
 
-        if not makefile_path.is_file() or overwrite_on_exist:
-            # Get the CMake options
-            cmake_options = dict(DCMAKE_INSTALL_PREFIX=str(self.local_dir))
-            if extra_cmake_option is not None:
-                cmake_options = {**cmake_options, **extra_cmake_option}
+        cmake_str, fingerprint = self.get_cmake_step(build_dir,
+                                                     extra_cmake_option)
 
-            cmake_str = self.get_cmake_command(cmake_options=cmake_options)
-
-            # NOTE: We could get in trouble if the build_dir already exists,
-            #       so we deliberately throw an error if the directory exists
-            build_dir.mkdir(exist_ok=False)
+        if overwrite_on_exist or \
+                not self.is_phase_current('configure',
+                                          fingerprint,
+                                          makefile_path):
+            # NOTE: A stale CMake cache would override the new options, so
+            #       the build directory is recreated
+            if build_dir.is_dir():
+                shutil.rmtree(build_dir)
+            build_dir.mkdir()
 
             self.logger.info(f'Running cmake with: {cmake_str}')
-            self.run_subprocess(cmake_str, build_dir)
+            with self.phase('configure'):
+                self.run_subprocess(cmake_str, build_dir)
+            self.update_install_record(configure_fingerprint=fingerprint,
+                                       make_fingerprint=None)
         else:
-            self.logger.info(f'{makefile_path} found, skipping running of '
-                             f'CMake')
-
-    def install_package(self,
-                        url,
-                        file_from_make,
-                        path_config_log='',
-                        overwrite_on_exist=False,
-                        extra_cmake_option=None):
+            with self.phase('configure') as phase:
+                phase['status'] = 'skipped'
+                self.logger.info(f'{makefile_path} found and configured with '
+                                 f'the same inputs, skipping running of CMake')
+
+    def get_build_path(self, tar_dir):
         """
-        Installs a package if it's not installed
+        Returns the directory CMake builds the package in
 
         Parameters
         ----------
-        url : str
-            Url to the tar file of the package
-        file_from_make : Path or str
-            File originating from the make processes (used to check if the
-            package has been made)
-        path_config_log : str or Path
+        tar_dir : Path
+            Directory of the source
+
+        Returns
+        -------
+        build_path : Path
+            The `build` directory inside the source
+        """
+
+        return tar_dir.joinpath('build')
+
+    def run_configure(self,
+                      tar_dir,
+                      config_log_path,
+                      extra_config_option,
+                      overwrite_on_exist):
+        """
+        Configures the package by running CMake in the build directory
+
+        Parameters
+        ----------
+        tar_dir : Path
+            Directory of the source
+        config_log_path : Path
             Only used in parent class
+        extra_config_option:
+            Configure option to include.
+            -DCMAKE_INSTALL_PREFIX=self.local_dir is already added as an option
         overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
-        extra_cmake_option : dict
-            Configure option to include.
-            The installation prefix of self.local_dir is already added as an
-            option
         """
 
-        # Download the tar file
-        tar_file_path = self.get_tar_file_path(url)
-        self.run_download_tar(url, tar_file_path, overwrite_on_exist)
-
-        # Untar
-        tar_dir = self.get_tar_dir(tar_file_path)
-        self.run_untar(tar_file_path, tar_dir, overwrite_on_exist)
-
-        # Configure and make
-        build_dir = tar_dir.joinpath('build')
-        makefile_path = build_dir.joinpath('Makefile')
+        build_dir = self.get_build_path(tar_dir)
         self.run_cmake(build_dir,
-                       makefile_path,
-                       extra_cmake_option,
+                       build_dir.joinpath('Makefile'),
+                       extra_config_option,
                        overwrite_on_exist)
-        self.run_make(build_dir, file_from_make, overwrite_on_exist)
+
+    def plan_build(self,
+                   tar_dir,
+                   path_config_log,
+                   file_from_make,
+                   extra_cmake_option,
+                   overwrite_on_exist):
+        """
+        Returns the phases running CMake and making the package
+
+        Parameters
+        ----------
+        tar_dir : Path
+            Directory of the source
+        path_config_log : str or Path
+            Only used in parent class
+        file_from_make : Path or str
+            File originating from the make processes
+        extra_cmake_option : dict
+            Configure option to include
+        overwrite_on_exist : bool
+            Whether to overwrite the package if it is already found
+
+        Returns
+        -------
+        phases : list of dict
+            The configure and make phases. Making is planned to run whenever
+            configuring is
+        """
+
+        build_dir = self.get_build_path(tar_dir)
+        cmake_str, fingerprint = self.get_cmake_step(build_dir,
+                                                     extra_cmake_option)
+        if overwrite_on_exist or \
+                not self.is_phase_current('configure',
+                                          fingerprint,
+                                          build_dir.joinpath('Makefile')):
+            configure = {'phase': 'configure',
+                         'status': 'run',
+                         'command': cmake_str}
+        else:
+            configure = {'phase': 'configure', 'status': 'skipped'}
+
+        return [configure, *self.plan_make(build_dir,
+                                           file_from_make,
+                                           overwrite_on_exist or
+                                           configure['status'] == 'run')]
@@ -1,6 +1,7 @@
 import shutil
 from pathlib import Path
 from bout_install.Installer import Installer
+from bout_install.Installer import get_path_lock
 
 
 class InstallerUsingGit(Installer):
@@ -8,11 +9,16 @@ class InstallerUsingGit(Installer):
     An Installer class which installs using git rather than tarballs
     """
 
+    # The package is built in the repository rather than installed
+    cache_artifacts = False
+    stage_install = False
+
     def __init__(self,
                  name,
                  section,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
-                 log_path=None):
+                 log_path=None,
+                 registry=None):
         """
         Makes the logger and installation paths (obtained from config.ini)
 
@@ -25,6 +31,8 @@ class InstallerUsingGit(Installer):
 
         Parameters
         ----------
+        name : str
+            Name of the git directory if not set in the config file
         section : str
             What section to use in the config file
         config_path : Path or str
@@ -32,9 +40,13 @@ class InstallerUsingGit(Installer):
         log_path : None or Path or str
             Path to the log file containing the log of Installer.
             If None, the log will directed to stderr
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
-        super().__init__(config_path=config_path, log_path=log_path)
+        super().__init__(config_path=config_path,
+                         log_path=log_path,
+                         registry=registry)
 
         # Obtain install dirs
         git_dir = self.config[section]['git_dir']
@@ -47,9 +59,9 @@ class InstallerUsingGit(Installer):
 
         self.checkout = checkout if checkout != '' else 'master'
 
-    def make(self, path):
+    def get_make_commands(self, path):
         """
-        Make the package
+        Returns the command making the package
 
         Notes
         -----
@@ -59,10 +71,68 @@ class InstallerUsingGit(Installer):
         ----------
         path : Path or str
             Path to the get_configure_command file
+
+        Returns
+        -------
+        make_commands : list of tuple
+            The phase and command of each step, run in order
+        """
+
+        return [('make', f'make -j{self.jobs}')]
+
+    def get_source_size(self, url):
+        """
+        Returns the size of the repository
+
+        Notes
+        -----
+        The size of a repository is not known prior to cloning
+
+        Parameters
+        ----------
+        url : str
+            URL to the package repository
+
+        Returns
+        -------
+        size : None
+            The size is unknown
+        """
+
+        return None
+
+    def fetch_source(self, url):
+        """
+        Clones the repository unless it is already present
+
+        Parameters
+        ----------
+        url : str
+            URL to the package repository
         """
 
-        make_str = 'make'
-        self.run_subprocess(make_str, path)
+        self.run_git(url, overwrite_on_exist=False)
+
+    def prepare_source(self, url, overwrite_on_exist=False):
+        """
+        Clones the repository unless it is already present
+
+        Parameters
+        ----------
+        url : str
+            URL to the package repository
+        overwrite_on_exist : bool
+            Whether to overwrite the repository if it is already found
+
+        Returns
+        -------
+        git_dir : Path
+            The directory of the repository
+        """
+
+        self.run_git(url, overwrite_on_exist)
+
+        return self.git_dir
 
     def run_git(self, url, overwrite_on_exist=False):
         """
@@ -76,11 +146,105 @@ class InstallerUsingGit(Installer):
             Whether to overwrite the package if it is already found
         """
 
+        # The repository may be cloned concurrently by a prefetch
+        with get_path_lock(self.git_dir):
+            if not self.git_dir.is_dir() or overwrite_on_exist:
+                if self.downloader.offline:
+                    raise IOError(f'{url} can not be cloned in offline mode')
+                if self.git_dir.is_dir():
+                    shutil.rmtree(str(self.git_dir))
+                command = f'git clone {url} {self.git_dir}'
+                with self.phase('clone'):
+                    self.run_subprocess(command, self.git_dir.parent)
+
+    def clone_bundle(self, bundle_path, url):
+        """
+        Clones the repository from a git bundle unless it is already present
+
+        Notes
+        -----
+        The origin is set to url, so that the repository can be updated
+        once network access is available
+
+        Parameters
+        ----------
+        bundle_path : Path
+            Path to the git bundle
+        url : str
+            URL to the package repository
+        """
+
+        with get_path_lock(self.git_dir):
+            if not self.git_dir.is_dir():
+                self.git_dir.parent.mkdir(parents=True, exist_ok=True)
+                with self.phase('clone'):
+                    command = f'git clone {bundle_path} {self.git_dir}'
+                    self.run_subprocess(command, self.git_dir.parent)
+                    command = f'git remote set-url origin {url}'
+                    self.run_subprocess(command, self.git_dir)
+
+    def clone_submodule_bundle(self, bundle_path, path, commit, url):
+        """
+        Clones a submodule of the repository from a git bundle
+
+        Parameters
+        ----------
+        bundle_path : Path
+            Path to the git bundle
+        path : str
+            Path of the submodule relative to the repository
+        commit : str
+            The commit of the submodule to check out
+        url : str
+            URL to the submodule repository
+        """
+
+        submodule_dir = self.git_dir.joinpath(path)
+        with get_path_lock(self.git_dir), self.phase('clone'):
+            command = f'git clone {bundle_path} {submodule_dir}'
+            self.run_subprocess(command, self.git_dir)
+            self.run_subprocess(f'git checkout -q {commit}', submodule_dir)
+            command = f'git remote set-url origin {url}'
+            self.run_subprocess(command, submodule_dir)
+
+    def plan_package(self,
+                     url,
+                     file_from_make,
+                     path_config_log='config.log',
+                     overwrite_on_exist=False,
+                     extra_config_option=None):
+        """
+        Adds the phases install_package would run to the plan of the run
+
+        Parameters
+        ----------
+        url : str
+            Url to the package repository
+        file_from_make : Path or str
+            File originating from the make processes
+        path_config_log : str or Path
+            Name of the log file for configure relative to the configuration
+            file
+        overwrite_on_exist : bool
+            Whether to overwrite the package if it is already found
+        extra_config_option : dict
+            Configure option to include
+        """
+
         if not self.git_dir.is_dir() or overwrite_on_exist:
-            if self.git_dir.is_dir():
-                shutil.rmtree(str(self.git_dir))
-            command = f'git clone {url} {self.git_dir}'
-            self.run_subprocess(command, self.git_dir.parent)
+            clone = {'phase': 'clone',
+                     'status': 'run',
+                     'command': f'git clone {url} {self.git_dir}',
+                     'bytes': None}
+        else:
+            clone = {'phase': 'clone', 'status': 'skipped'}
+
+        phases = [clone, *self.plan_build(self.git_dir,
+                                          path_config_log,
+                                          file_from_make,
+                                          extra_config_option,
+                                          overwrite_on_exist)]
+        self.registry.plan.add(self.name, self.get_version(), None, phases)
 
     def install_package(self,
                         url,
@@ -109,6 +273,14 @@ class InstallerUsingGit(Installer):
             option
         """
 
+        if self.is_planning():
+            self.plan_package(url,
+                              file_from_make,
+                              path_config_log,
+                              overwrite_on_exist,
+                              extra_config_option)
+            return
+
         # Run git checkout
         self.run_git(url, overwrite_on_exist)
 
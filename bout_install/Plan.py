@@ -0,0 +1,219 @@
+import json
+import threading
+from pathlib import Path
+from bout_install.TimingReport import format_bytes
+
+
+class Plan(object):
+    """
+    Class for collecting what an installation would do, without doing it
+
+    When the registry of a run holds a plan, the installers add the phases
+    they would run or skip to the plan instead of installing.
+    The phases which would run are given the duration they took in an
+    earlier run, if known.
+
+    Examples
+    --------
+    >>> from bout_install.Plan import Plan
+    >>>
+    >>> plan = Plan(durations={('fftw', 'make'): 42.0})
+    >>> plan.add('fftw', '3.3.6-pl2', None, [{'phase': 'make',
+    ...                                       'status': 'run',
+    ...                                       'command': 'make -j8'}])
+    >>> print(plan.get_summary())
+    """
+
+    def __init__(self, durations=None):
+        """
+        Sets the durations to estimate the phases from
+
+        Parameters
+        ----------
+        durations : None or dict
+            The seconds a phase took indexed by the package and phase name
+        """
+
+        self.durations = durations if durations is not None else dict()
+
+        self.packages = list()
+        # The build keys the packages will be installed with, which the
+        # build keys of their dependants are derived from
+        self.build_keys = dict()
+
+        self._lock = threading.Lock()
+
+    def add(self, package, version, build_key, phases):
+        """
+        Adds the planned phases of a package
+
+        Notes
+        -----
+        The status of the package is `build` if any phase would run,
+        `restore` if it would be unpacked from the artifact cache,
+        `preinstalled` if it would not be installed at all, and `up to date`
+        otherwise
+
+        Parameters
+        ----------
+        package : str
+            Name of the package
+        version : None or str
+            Version of the package
+        build_key : None or str
+            The build key the package would be installed with
+        phases : list of dict
+            The phases with the keys `phase` and `status` (`run`, `skipped`
+            or `cached`), and optionally the `command` to run, the `bytes`
+            to download and the estimated `seconds`
+        """
+
+        for phase in phases:
+            if phase['status'] == 'run' and 'seconds' not in phase:
+                phase['seconds'] = \
+                    self.durations.get((package, phase['phase']))
+            phase.setdefault('seconds', 0)
+
+        if len(phases) == 0:
+            status = 'preinstalled'
+        elif any(phase['status'] == 'run' for phase in phases):
+            status = 'build'
+        elif any(phase['phase'] == 'restore' for phase in phases):
+            status = 'restore'
+        else:
+            status = 'up to date'
+
+        with self._lock:
+            self.packages.append({'package': package,
+                                  'version': version,
+                                  'status': status,
+                                  'phases': phases})
+            if build_key is not None:
+                self.build_keys[package] = build_key
+
+    def __contains__(self, package):
+        """
+        Returns whether a package has been planned
+
+        Parameters
+        ----------
+        package : str
+            Name of the package
+
+        Returns
+        -------
+        contained : bool
+            Whether the package has been planned
+        """
+
+        with self._lock:
+            return any(entry['package'] == package for entry in self.packages)
+
+    def get_totals(self):
+        """
+        Returns the totals of the plan
+
+        Returns
+        -------
+        totals : dict
+            The number of packages with each status, the bytes to download
+            (None if unknown), the estimated seconds and the number of phases
+            which would run without an estimate
+        """
+
+        totals = {'packages': dict(),
+                  'download_bytes': 0,
+                  'seconds': 0,
+                  'unestimated': 0}
+        with self._lock:
+            for entry in self.packages:
+                totals['packages'][entry['status']] = \
+                    totals['packages'].get(entry['status'], 0) + 1
+                for phase in entry['phases']:
+                    if phase['status'] != 'run':
+                        continue
+                    if phase['phase'] in ('download', 'clone'):
+                        if phase.get('bytes') is None or \
+                                totals['download_bytes'] is None:
+                            totals['download_bytes'] = None
+                        else:
+                            totals['download_bytes'] += phase['bytes']
+                    if phase['seconds'] is None:
+                        totals['unestimated'] += 1
+                    else:
+                        totals['seconds'] += phase['seconds']
+        return totals
+
+    def write(self, path):
+        """
+        Writes the plan as json
+
+        Parameters
+        ----------
+        path : Path or str
+            Path to the plan
+        """
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            packages = list(self.packages)
+        plan = {'totals': self.get_totals(), 'packages': packages}
+
+        with path.open('w') as f:
+            json.dump(plan, f, indent=4)
+
+    def get_summary(self):
+        """
+        Returns the plan as text
+
+        Notes
+        -----
+        Each package is listed with its phases, followed by the commands of
+        the phases which would run.
+        Unknown estimates are shown as `?`
+
+        Returns
+        -------
+        summary : str
+            The plan
+        """
+
+        def format_seconds(seconds):
+            return f'{seconds:.0f}s' if seconds is not None else '?'
+
+        lines = list()
+        with self._lock:
+            packages = list(self.packages)
+        for entry in packages:
+            version = f' {entry["version"]}' if entry['version'] else ''
+            lines.append(f'{entry["package"]}{version}: {entry["status"]}')
+            for phase in entry['phases']:
+                line = f'    {phase["phase"]:<16}{phase["status"]:<10}'
+                if phase['status'] == 'run':
+                    size = ''
+                    if 'bytes' in phase:
+                        size = format_bytes(phase['bytes']) \
+                            if phase['bytes'] is not None else '?'
+                    line += f'{size:>8}'
+                    line += f'{format_seconds(phase["seconds"]):>8}'
+                lines.append(line.rstrip())
+                if phase['status'] == 'run' and 'command' in phase:
+                    lines.append(f'        $ {phase["command"]}')
+
+        totals = self.get_totals()
+        counts = ', '.join(f'{count} {status}'
+                           for status, count in
+                           sorted(totals['packages'].items()))
+        download_bytes = totals['download_bytes']
+        download = format_bytes(download_bytes) \
+            if download_bytes is not None else 'an unknown size'
+        lines.append(f'Packages: {counts}')
+        lines.append(f'To download: {download}')
+        estimate = f'Estimated duration: {totals["seconds"]:.0f}s'
+        if totals['unestimated'] != 0:
+            estimate += (f' (and {totals["unestimated"]} phases without an '
+                         f'earlier run)')
+        lines.append(estimate)
+        return '\n'.join(lines)
@@ -0,0 +1,192 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+
+class Prefetcher(object):
+    """
+    Class for downloading the sources of several installers concurrently
+
+    The sources are downloaded into the `install_dir` of the installers, so
+    that the download is skipped when the package is installed.
+    The largest sources are started first, as they are the ones most likely
+    to delay the builds.
+
+    In pipeline mode the sources are also untarred, and they are prepared in
+    the order of the installers.
+    The I/O bound download and untar stages of the upcoming packages then
+    overlap with the build of the current package, while the build of a
+    package only waits for its own source.
+
+    Examples
+    --------
+    >>> from bout_install.Prefetcher import Prefetcher
+    >>> from bout_install.installer.FFTWInstaller import FFTWInstaller
+    >>> from bout_install.installer.MPIInstaller import MPIInstaller
+    >>>
+    >>> prefetcher = Prefetcher([FFTWInstaller(), MPIInstaller()])
+    >>> prefetcher.fetch()
+    """
+
+    def __init__(self, installers, max_workers=4, pipeline=False):
+        """
+        Stores the installers and sets the number of concurrent downloads
+
+        Parameters
+        ----------
+        installers : iterable
+            The installers to download the sources for.
+            In pipeline mode they should be in the order they are built
+        max_workers : int
+            Maximum number of concurrent downloads
+        pipeline : bool
+            Whether to also untar the sources, in the order of the installers
+        """
+
+        self.installers = list(installers)
+        self.max_workers = max(int(max_workers), 1)
+        self.pipeline = pipeline
+
+        self.logger = logging.getLogger('bout_install')
+
+        self._executor = None
+        self._futures = dict()
+
+    def get_sources(self):
+        """
+        Returns the sources to download
+
+        Notes
+        -----
+        The extra sources of the installers (tar files the builds would
+        otherwise download themselves) are included.
+        Packages which are up to date or in the artifact cache are skipped,
+        as their sources are not needed
+
+        Returns
+        -------
+        sources : list
+            List of tuples containing the installer and the url of a source.
+            Every url occurs only once
+        """
+
+        sources = list()
+        urls = set()
+        for installer in self.installers:
+            source_urls = [url for url in installer.get_source_urls()
+                           if installer.is_source_needed(url)]
+            if len(source_urls) == 0:
+                self.logger.info(f'{installer.name} is up to date, skipping '
+                                 f'its sources')
+                continue
+            for url in (*source_urls, *installer.extra_sources.values()):
+                if url not in urls:
+                    urls.add(url)
+                    sources.append((installer, url))
+
+        return sources
+
+    def get_sorted_sources(self):
+        """
+        Returns the sources sorted by size, largest first
+
+        Notes
+        -----
+        The sizes are obtained concurrently from the servers.
+        Sources of unknown size (like git repositories) are put first
+
+        Returns
+        -------
+        sources : list
+            List of tuples containing the installer and the url of a source
+        """
+
+        sources = self.get_sources()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            sizes = list(executor.map(
+                lambda source: source[0].get_source_size(source[1]),
+                sources))
+
+        order = sorted(range(len(sources)),
+                       key=lambda i: -sizes[i] if sizes[i] is not None
+                       else -float('inf'))
+
+        return [sources[i] for i in order]
+
+    def start(self):
+        """
+        Starts downloading the sources in the background
+        """
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        if self.pipeline:
+            for installer, url in self.get_sources():
+                # Extra sources are only downloaded
+                if url in installer.extra_sources.values():
+                    self.logger.info(f'Prefetching {url}')
+                    future = self._executor.submit(installer.fetch_source,
+                                                   url)
+                else:
+                    self.logger.info(f'Preparing {url} in the background')
+                    future = self._executor.submit(installer.prepare_source,
+                                                   url)
+                self._futures[future] = url
+        else:
+            for installer, url in self.get_sorted_sources():
+                self.logger.info(f'Prefetching {url}')
+                future = self._executor.submit(installer.fetch_source, url)
+                self._futures[future] = url
+
+    def join(self, cancel=False):
+        """
+        Waits for the downloads started by start to finish
+
+        Parameters
+        ----------
+        cancel : bool
+            Whether to cancel the downloads which have not yet started
+
+        Returns
+        -------
+        errors : dict
+            Dictionary of the exceptions raised indexed by url
+        """
+
+        if self._executor is None:
+            return dict()
+
+        if cancel:
+            for future in self._futures:
+                future.cancel()
+
+        wait(self._futures)
+        self._executor.shutdown()
+
+        errors = dict()
+        for future, url in self._futures.items():
+            if not future.cancelled() and future.exception() is not None:
+                errors[url] = future.exception()
+                self.logger.warning(f'Prefetching {url} failed with: '
+                                    f'{errors[url]}')
+
+        self._executor = None
+        self._futures = dict()
+
+        return errors
+
+    def fetch(self):
+        """
+        Downloads all the sources, and waits for the downloads to finish
+
+        Raises
+        ------
+        Exception
+            The first error encountered, after all downloads have finished
+        """
+
+        self.start()
+        errors = self.join()
+        if len(errors) != 0:
+            raise next(iter(errors.values()))
@@ -0,0 +1,186 @@
+import os
+import sys
+import threading
+from pathlib import Path
+
+
+def get_process_tree_rss(pid, proc_dir='/proc'):
+    """
+    Returns the resident memory of a process and all its descendants
+
+    Notes
+    -----
+    The processes are read from the `/proc` file system, and the result is
+    None where it is not available (e.g. on macOS)
+
+    Parameters
+    ----------
+    pid : int
+        The process id of the root of the tree
+    proc_dir : Path or str
+        The proc file system
+
+    Returns
+    -------
+    rss : None or int
+        The resident memory of the process tree in bytes
+    """
+
+    proc_dir = Path(proc_dir)
+    if not proc_dir.is_dir():
+        return None
+
+    children = dict()
+    rss_pages = dict()
+    for stat_path in proc_dir.glob('[0-9]*/stat'):
+        try:
+            stat = stat_path.read_text()
+        except OSError:
+            # The process exited while reading
+            continue
+        # The command name is in parentheses and may contain spaces
+        fields = stat.rsplit(')', 1)[1].split()
+        process_id = int(stat_path.parent.name)
+        parent_id = int(fields[1])
+        children.setdefault(parent_id, list()).append(process_id)
+        rss_pages[process_id] = int(fields[21])
+
+    if pid not in rss_pages:
+        return None
+
+    rss = 0
+    stack = [pid]
+    while len(stack) != 0:
+        process_id = stack.pop()
+        rss += rss_pages.get(process_id, 0)
+        stack.extend(children.get(process_id, list()))
+    return rss * os.sysconf('SC_PAGE_SIZE')
+
+
+def get_usage(rusage):
+    """
+    Returns the resource usage of a waited for process tree
+
+    Notes
+    -----
+    The maximum resident memory reported by the operating system is the
+    maximum of the largest single process of the tree.
+    The bytes read and written are counted from the blocks transferred to
+    and from the storage, so reads served by the page cache are not included
+
+    Parameters
+    ----------
+    rusage : resource.struct_rusage
+        The resource usage as returned by os.wait4
+
+    Returns
+    -------
+    usage : dict
+        The cpu seconds spent in user and system mode, the maximum resident
+        memory in bytes and the bytes read and written
+    """
+
+    # ru_maxrss is given in bytes on macOS and in kilobytes elsewhere
+    max_rss_unit = 1 if sys.platform == 'darwin' else 1024
+    return {'cpu_user': rusage.ru_utime,
+            'cpu_system': rusage.ru_stime,
+            'max_rss': rusage.ru_maxrss * max_rss_unit,
+            'read_bytes': rusage.ru_inblock * 512,
+            'write_bytes': rusage.ru_oublock * 512}
+
+
+def add_usage(total, usage):
+    """
+    Adds the resource usage of a process to a total
+
+    Parameters
+    ----------
+    total : dict
+        The total usage, which is updated in place
+    usage : dict
+        The usage of the process (see `get_usage`)
+    """
+
+    for key, value in usage.items():
+        if key == 'max_rss':
+            total[key] = max(total.get(key, 0), value)
+        else:
+            total[key] = total.get(key, 0) + value
+
+
+class ResourceMonitor(object):
+    """
+    Class for sampling the peak resident memory of a process tree
+
+    A background thread sums the resident memory of the process and its
+    descendants at a fixed interval, and keeps the largest sum.
+    This captures the memory of parallel compilations, which is not
+    reported by the operating system when the processes are waited for.
+
+    Examples
+    --------
+    >>> from bout_install.ResourceMonitor import ResourceMonitor
+    >>>
+    >>> process = subprocess.Popen(['make', '-j8'])
+    >>> with ResourceMonitor(process.pid, interval=0.5) as monitor:
+    >>>     process.wait()
+    >>> print(monitor.peak_rss)
+    """
+
+    def __init__(self, pid, interval):
+        """
+        Sets the process to monitor and the sampling interval
+
+        Parameters
+        ----------
+        pid : int
+            The process id of the root of the tree
+        interval : float
+            The seconds between the samples. The tree is not sampled if
+            not positive
+        """
+
+        self.pid = pid
+        self.interval = interval
+
+        # The largest sampled resident memory in bytes
+        self.peak_rss = 0
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        """
+        Starts sampling
+
+        Returns
+        -------
+        self : ResourceMonitor
+            The monitor
+        """
+
+        if self.interval > 0:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        """
+        Stops sampling
+        """
+
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _sample(self):
+        """
+        Samples the tree until stopped or the process has exited
+        """
+
+        while True:
+            rss = get_process_tree_rss(self.pid)
+            if rss is None:
+                return
+            self.peak_rss = max(self.peak_rss, rss)
+            if self._stop.wait(self.interval):
+                return
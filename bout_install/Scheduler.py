@@ -0,0 +1,212 @@
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+
+class Scheduler(object):
+    """
+    Class for running the nodes of a dependency graph concurrently
+
+    A node is started as soon as all the nodes it depends on have finished,
+    and at most `max_workers` nodes are running at the same time.
+    The total wall-clock time is therefore roughly given by the critical path
+    of the graph rather than by the sum of all the nodes.
+    When the durations of the nodes are known, the ready nodes heading the
+    longest chains are started first, so that the critical path is not
+    delayed by short nodes.
+
+    Examples
+    --------
+    >>> from bout_install.Scheduler import Scheduler
+    >>>
+    >>> graph = {'mpi': (), 'petsc': ('mpi',), 'fftw': ()}
+    >>> scheduler = Scheduler(graph,
+    ...                       max_workers=2,
+    ...                       priorities={'petsc': 300.0, 'fftw': 60.0})
+    >>> scheduler.run(print)
+    """
+
+    def __init__(self, graph, max_workers=1, priorities=None):
+        """
+        Stores the graph and checks that it is a directed acyclic graph
+
+        Parameters
+        ----------
+        graph : dict
+            Dictionary where the keys are the node names and the values are
+            iterables of the names of the nodes the key depends on.
+            The insertion order of the keys is used to order nodes which are
+            ready at the same time
+        max_workers : int
+            Maximum number of nodes to run concurrently
+        priorities : None or dict
+            The predicted seconds of the nodes indexed by node name, which
+            the ready nodes are ordered by the longest chain of.
+            Nodes without a prediction count as instant
+
+        Raises
+        ------
+        ValueError
+            If a node depends on a node which is not in the graph, or if the
+            graph contains a cycle
+        """
+
+        self.graph = {name: tuple(dependencies)
+                      for name, dependencies in graph.items()}
+        self.max_workers = max(int(max_workers), 1)
+        self.priorities = priorities if priorities is not None else dict()
+
+        for name, dependencies in self.graph.items():
+            for dependency in dependencies:
+                if dependency not in self.graph:
+                    raise ValueError(f'{name} depends on {dependency}, which '
+                                     f'is not in the graph')
+
+        # Raises ValueError on cycles, and is therefore checked before the
+        # chains are followed
+        self.critical_paths = dict()
+        self.get_order()
+
+        self.critical_paths = get_critical_paths(
+            self.graph,
+            {name: self.priorities.get(name) or 0 for name in self.graph})
+
+    def get_ready(self, remaining, done):
+        """
+        Returns the nodes whose dependencies have all finished
+
+        Parameters
+        ----------
+        remaining : list
+            The names of the nodes which have not been started
+        done : set
+            The names of the finished nodes
+
+        Returns
+        -------
+        ready : list
+            The ready nodes, heading the longest chains first.
+            Nodes with chains of equal length keep the order of remaining
+        """
+
+        ready = [name for name in remaining
+                 if all(dep in done for dep in self.graph[name])]
+        return sorted(ready,
+                      key=lambda name: -self.critical_paths.get(name, 0))
+
+    def get_order(self):
+        """
+        Returns the nodes in a topological order
+
+        Returns
+        -------
+        order : list
+            The node names ordered so that every node appears after its
+            dependencies
+
+        Raises
+        ------
+        ValueError
+            If the graph contains a cycle
+        """
+
+        order = list()
+        done = set()
+        remaining = list(self.graph)
+        while len(remaining) != 0:
+            ready = self.get_ready(remaining, done)
+            if len(ready) == 0:
+                raise ValueError(f'Cycle detected in the dependency graph '
+                                 f'among {remaining}')
+            # Take the first ready node to preserve the priorities and the
+            # insertion order
+            order.append(ready[0])
+            done.add(ready[0])
+            remaining.remove(ready[0])
+
+        return order
+
+    def run(self, task):
+        """
+        Runs task for all the nodes in the graph
+
+        Notes
+        -----
+        If a task raises an exception, no new tasks are started, the running
+        tasks are allowed to finish and the first exception is re-raised
+
+        Parameters
+        ----------
+        task : callable
+            Function taking the node name as the only argument
+        """
+
+        done = set()
+        remaining = list(self.graph)
+        running = dict()
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(remaining) != 0 or len(running) != 0:
+                if error is None:
+                    ready = self.get_ready(remaining, done)
+                    for name in ready[:self.max_workers - len(running)]:
+                        remaining.remove(name)
+                        running[executor.submit(task, name)] = name
+
+                if len(running) == 0:
+                    # Only reachable if an error stopped the scheduling
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        if error is None:
+                            error = future.exception()
+                    else:
+                        done.add(name)
+
+        if error is not None:
+            raise error
+
+
+def get_critical_paths(graph, weights):
+    """
+    Returns the longest chain of weights starting at each node of a graph
+
+    Parameters
+    ----------
+    graph : dict
+        Dictionary where the keys are the node names and the values are
+        iterables of the names of the nodes the key depends on.
+        The graph must be acyclic
+    weights : dict
+        The weight (e.g. the predicted seconds) of each node indexed by node
+        name
+
+    Returns
+    -------
+    critical_paths : dict
+        The largest sum of weights along a chain starting at the node and
+        followed by the nodes depending on it, indexed by node name
+    """
+
+    dependants = {name: list() for name in graph}
+    for name, dependencies in graph.items():
+        for dependency in dependencies:
+            dependants[dependency].append(name)
+
+    critical_paths = dict()
+
+    def get_critical_path(name):
+        if name not in critical_paths:
+            critical_paths[name] = weights[name] + max(
+                (get_critical_path(dependant)
+                 for dependant in dependants[name]),
+                default=0)
+        return critical_paths[name]
+
+    for name in graph:
+        get_critical_path(name)
+    return critical_paths
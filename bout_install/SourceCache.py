@@ -0,0 +1,387 @@
+import contextlib
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+
+def parse_size(size):
+    """
+    Returns the number of bytes of a size string like 500M or 10G
+
+    Parameters
+    ----------
+    size : str or int
+        The size. The suffixes K, M, G and T are understood as powers of 1024
+
+    Returns
+    -------
+    n_bytes : int
+        The number of bytes
+    """
+
+    size = str(size).strip().upper().rstrip('B')
+    factors = {'K': 2**10, 'M': 2**20, 'G': 2**30, 'T': 2**40}
+    if size != '' and size[-1] in factors:
+        return int(float(size[:-1]) * factors[size[-1]])
+    return int(float(size)) if size != '' else 0
+
+
+def get_default_cache_dir():
+    """
+    Returns the default directory of the caches of bout_install
+
+    Returns
+    -------
+    cache_dir : Path
+        $XDG_CACHE_HOME/bout_install, where XDG_CACHE_HOME defaults to
+        ~/.cache
+    """
+
+    cache_home = os.environ.get('XDG_CACHE_HOME', '')
+    if cache_home == '':
+        cache_home = Path.home().joinpath('.cache')
+    return Path(cache_home).joinpath('bout_install')
+
+
+@contextlib.contextmanager
+def file_lock(lock_path, thread_lock=None):
+    """
+    Holds an exclusive lock on a file, shared by all processes
+
+    Notes
+    -----
+    The lock is taken with flock, so that installations running
+    concurrently on the same cache wait for each other.
+    The lock is released when the file is closed, also if the process dies
+
+    Parameters
+    ----------
+    lock_path : Path
+        Path to the lock file, which is created if missing
+    thread_lock : None or threading.Lock
+        Lock of the threads of this process, taken first
+    """
+
+    # NOTE: suppress() without exceptions is a no-op context manager, as
+    #       contextlib.nullcontext requires python 3.7
+    with thread_lock or contextlib.suppress():
+        with Path(lock_path).open('a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+
+class SourceCache(object):
+    """
+    Class for caching downloaded source files across installations
+
+    The files are stored by their SHA-256 checksum, and an index maps the
+    urls to the checksums.
+    Files are handed out as hard links where possible (falling back to
+    copies), so that several installations share the same disk blocks.
+    When the cache grows beyond its maximum size, the least recently used
+    files are evicted.
+    The index is only read and written under a lock file, as the cache may
+    be used by several installations at once.
+
+    Examples
+    --------
+    >>> from bout_install.SourceCache import SourceCache
+    >>>
+    >>> cache = SourceCache('/tmp/cache', max_size=2**30)
+    >>> cache.put(url, tar_file_path)
+    >>> # In another installation
+    >>> found = cache.get(url, other_tar_file_path)
+    """
+
+    def __init__(self, cache_dir, max_size):
+        """
+        Sets the cache directory and maximum size
+
+        Parameters
+        ----------
+        cache_dir : Path or str
+            The directory of the cache
+        max_size : int
+            The maximum size of the cache in bytes
+        """
+
+        self.cache_dir = Path(cache_dir).absolute()
+        self.objects_dir = self.cache_dir.joinpath('objects')
+        self.index_path = self.cache_dir.joinpath('index.json')
+        self.lock_path = self.cache_dir.joinpath('index.lock')
+        self.max_size = max_size
+
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+        self.logger = logging.getLogger('bout_install')
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+        self._lock = threading.Lock()
+
+    def _read_index(self):
+        """
+        Returns the index of the cache
+
+        Returns
+        -------
+        index : dict
+            Dictionary with the keys `urls` (checksum indexed by url) and
+            `objects` (size and last use indexed by checksum)
+        """
+
+        try:
+            with self.index_path.open() as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'urls': dict(), 'objects': dict()}
+
+    def _write_index(self, index):
+        """
+        Writes the index atomically
+
+        Parameters
+        ----------
+        index : dict
+            The index to write
+        """
+
+        tmp_path = self.index_path.with_name(f'index.json.{os.getpid()}')
+        with tmp_path.open('w') as f:
+            json.dump(index, f, indent=4)
+        tmp_path.replace(self.index_path)
+
+    def get_object_path(self, checksum):
+        """
+        Returns the path of a cached file
+
+        Parameters
+        ----------
+        checksum : str
+            The SHA-256 checksum of the file
+
+        Returns
+        -------
+        object_path : Path
+            The path of the file in the cache
+        """
+
+        return self.objects_dir.joinpath(checksum[:2], checksum)
+
+    @staticmethod
+    def get_checksum(path):
+        """
+        Returns the SHA-256 checksum of a file
+
+        Parameters
+        ----------
+        path : Path
+            Path to the file
+
+        Returns
+        -------
+        checksum : str
+            The hex digest of the checksum
+        """
+
+        sha = hashlib.sha256()
+        with Path(path).open('rb') as f:
+            for chunk in iter(lambda: f.read(2**20), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    @staticmethod
+    def _link_or_copy(src, dst):
+        """
+        Hard links src to dst, or copies if linking is not possible
+
+        Parameters
+        ----------
+        src : Path
+            The source file
+        dst : Path
+            The destination, which is replaced atomically
+        """
+
+        tmp_path = dst.with_name(f'{dst.name}.{os.getpid()}.tmp')
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            shutil.copy2(src, tmp_path)
+        tmp_path.replace(dst)
+
+    def contains(self, url):
+        """
+        Returns whether the file of url is in the cache
+
+        Notes
+        -----
+        Unlike `get`, this neither places the file nor counts as a use
+
+        Parameters
+        ----------
+        url : str
+            The url the file was downloaded from
+
+        Returns
+        -------
+        found : bool
+            Whether the file is in the cache
+        """
+
+        with file_lock(self.lock_path, self._lock):
+            checksum = self._read_index()['urls'].get(url)
+        return checksum is not None and \
+            self.get_object_path(checksum).is_file()
+
+    def get(self, url, path):
+        """
+        Places the cached file of url at path
+
+        Parameters
+        ----------
+        url : str
+            The url the file was downloaded from
+        path : Path
+            Where to place the file
+
+        Returns
+        -------
+        found : bool
+            Whether the file was found in the cache
+        """
+
+        with file_lock(self.lock_path, self._lock):
+            index = self._read_index()
+            checksum = index['urls'].get(url)
+            object_path = None
+            if checksum is not None:
+                object_path = self.get_object_path(checksum)
+
+            if object_path is None or not object_path.is_file():
+                self.misses += 1
+                return False
+
+            self._link_or_copy(object_path, Path(path))
+
+            size = object_path.stat().st_size
+            index['objects'][checksum] = {'size': size,
+                                          'last_used': time.time()}
+            self._write_index(index)
+
+            self.hits += 1
+            self.bytes_saved += size
+
+        self.logger.info(f'Found {url} in the source cache')
+        return True
+
+    def put(self, url, path):
+        """
+        Adds a downloaded file to the cache
+
+        Parameters
+        ----------
+        url : str
+            The url the file was downloaded from
+        path : Path
+            Path to the downloaded file
+        """
+
+        path = Path(path)
+        size = path.stat().st_size
+        if size > self.max_size:
+            return
+
+        checksum = self.get_checksum(path)
+        object_path = self.get_object_path(checksum)
+
+        with file_lock(self.lock_path, self._lock):
+            if not object_path.is_file():
+                object_path.parent.mkdir(parents=True, exist_ok=True)
+                self._link_or_copy(path, object_path)
+
+            index = self._read_index()
+            index['urls'][url] = checksum
+            index['objects'][checksum] = {'size': size,
+                                          'last_used': time.time()}
+            self._evict(index)
+            self._write_index(index)
+
+    def _evict(self, index):
+        """
+        Removes the least recently used files until the cache fits
+
+        Parameters
+        ----------
+        index : dict
+            The index, which is modified in place
+        """
+
+        total = sum(entry['size'] for entry in index['objects'].values())
+        by_age = sorted(index['objects'],
+                        key=lambda checksum:
+                        index['objects'][checksum]['last_used'])
+
+        for checksum in by_age:
+            if total <= self.max_size:
+                break
+            total -= index['objects'][checksum]['size']
+            del index['objects'][checksum]
+            object_path = self.get_object_path(checksum)
+            if object_path.is_file():
+                object_path.unlink()
+            self.logger.info(f'Evicted {checksum} from the source cache')
+
+        index['urls'] = {url: checksum
+                         for url, checksum in index['urls'].items()
+                         if checksum in index['objects']}
+
+    def get_summary(self):
+        """
+        Returns a summary of the cache usage of this run
+
+        Returns
+        -------
+        summary : str
+            The number of hits, misses and bytes saved
+        """
+
+        return (f'Source cache: {self.hits} hits, {self.misses} misses, '
+                f'{self.bytes_saved / 2**20:.1f} MiB saved')
+
+
+def get_source_cache(config):
+    """
+    Returns the source cache configured by the cache section
+
+    Parameters
+    ----------
+    config : configparser.ConfigParser
+        The configuration
+
+    Returns
+    -------
+    source_cache : None or SourceCache
+        The source cache. None if the cache is disabled
+    """
+
+    cache_dir = config.get('cache', 'source_cache_dir', fallback='')
+    max_size = parse_size(config.get('cache',
+                                     'source_cache_size',
+                                     fallback='0'))
+
+    if max_size == 0:
+        return None
+
+    if cache_dir == '':
+        cache_dir = get_default_cache_dir().joinpath('sources')
+
+    return SourceCache(cache_dir, max_size)
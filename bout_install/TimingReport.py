@@ -0,0 +1,213 @@
+import datetime
+import json
+import threading
+import time
+from pathlib import Path
+
+
+class TimingReport(object):
+    """
+    Class for recording the duration of the phases of the installations
+
+    Each installer records its phases (e.g. download, configure and make)
+    together with the package version and whether the phase was run,
+    skipped or taken from a cache.
+    Phases running subprocesses also record the resources they used, like
+    the cpu time and peak resident memory.
+    At the end of the run, the records are written to a json file and
+    summarized in a table sorted by duration.
+
+    Examples
+    --------
+    >>> from bout_install.TimingReport import TimingReport
+    >>>
+    >>> report = TimingReport()
+    >>> report.record('fftw', '3.3.6-pl2', 'make', 'done', 0.0, 42.0)
+    >>> report.write('timing_report.json')
+    >>> print(report.get_summary())
+    """
+
+    def __init__(self):
+        """
+        Starts the clock of the run
+        """
+
+        self.started = datetime.datetime.now().isoformat(timespec='seconds')
+        self.start_time = time.monotonic()
+        self.records = list()
+
+        self._lock = threading.Lock()
+
+    def record(self, package, version, phase, status, start, seconds,
+               **usage):
+        """
+        Records a phase
+
+        Parameters
+        ----------
+        package : None or str
+            Name of the package
+        version : None or str
+            Version of the package
+        phase : str
+            Name of the phase
+        status : str
+            Outcome of the phase, e.g. `done`, `skipped`, `cached` or
+            `failed`
+        start : float
+            The time.monotonic() time the phase started at
+        seconds : float
+            The duration of the phase
+        usage : dict
+            The resources used by the subprocesses of the phase, e.g.
+            `cpu_user`, `cpu_system`, `max_rss`, `read_bytes`,
+            `write_bytes` and the number of `jobs` (see
+            `bout_install.ResourceMonitor.get_usage`)
+        """
+
+        record = {'package': package,
+                  'version': version,
+                  'phase': phase,
+                  'status': status,
+                  'start': round(start - self.start_time, 3),
+                  'seconds': round(seconds, 3)}
+        for key, value in usage.items():
+            record[key] = round(value, 3) if isinstance(value, float) \
+                else value
+
+        with self._lock:
+            self.records.append(record)
+
+    def get_package_totals(self):
+        """
+        Returns the total duration of the phases of each package
+
+        Returns
+        -------
+        package_totals : dict
+            The seconds spent indexed by package name
+        """
+
+        package_totals = dict()
+        with self._lock:
+            for record in self.records:
+                package = record['package']
+                package_totals[package] = \
+                    package_totals.get(package, 0) + record['seconds']
+        return package_totals
+
+    def write(self, path):
+        """
+        Writes the report as json
+
+        Parameters
+        ----------
+        path : Path or str
+            Path to the report
+        """
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            records = list(self.records)
+        report = {'started': self.started,
+                  'seconds': round(time.monotonic() - self.start_time, 3),
+                  'packages': self.get_package_totals(),
+                  'phases': records}
+
+        with path.open('w') as f:
+            json.dump(report, f, indent=4)
+
+    def get_summary(self):
+        """
+        Returns a table of the phases sorted by duration
+
+        Notes
+        -----
+        Phases taking less than a tenth of a second (like skipped phases)
+        are left out.
+        The cpu time and peak resident memory are left blank for phases not
+        running subprocesses
+
+        Returns
+        -------
+        summary : str
+            The table
+        """
+
+        with self._lock:
+            records = sorted(self.records,
+                             key=lambda record: record['seconds'],
+                             reverse=True)
+
+        lines = [f'{"Package":<16}{"Phase":<16}{"Status":<10}{"Seconds":>10}'
+                 f'{"CPU":>10}{"Max RSS":>10}']
+        for record in records:
+            if record['seconds'] < 0.1:
+                continue
+            line = (f'{str(record["package"]):<16}'
+                    f'{record["phase"]:<16}'
+                    f'{record["status"]:<10}'
+                    f'{record["seconds"]:>10.1f}')
+            if 'cpu_user' in record:
+                cpu = record['cpu_user'] + record['cpu_system']
+                line += (f'{cpu:>10.1f}'
+                         f'{format_bytes(record["max_rss"]):>10}')
+            lines.append(line)
+        lines.append(f'{"Total":<42}'
+                     f'{time.monotonic() - self.start_time:>10.1f}')
+        return '\n'.join(lines)
+
+
+def read_durations(path):
+    """
+    Returns the durations of the phases run in an earlier report
+
+    Parameters
+    ----------
+    path : Path or str
+        Path to the report
+
+    Returns
+    -------
+    durations : dict
+        The seconds of the phases which were run (rather than skipped or
+        taken from a cache) indexed by package and phase name. Empty if the
+        report can not be read
+    """
+
+    try:
+        with Path(path).open() as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return dict()
+
+    durations = dict()
+    for record in report.get('phases', list()):
+        if record['status'] == 'done':
+            key = (record['package'], record['phase'])
+            durations[key] = durations.get(key, 0) + record['seconds']
+    return durations
+
+
+def format_bytes(size):
+    """
+    Returns a number of bytes in a human readable form
+
+    Parameters
+    ----------
+    size : int
+        The number of bytes
+
+    Returns
+    -------
+    formatted : str
+        The size with a binary unit, e.g. `1.5G`
+    """
+
+    for unit in ('', 'K', 'M', 'G'):
+        if size < 1024:
+            return f'{size:.1f}{unit}' if unit != '' else f'{size}'
+        size /= 1024
+    return f'{size:.1f}T'
@@ -7,11 +7,15 @@ class SundialsInstaller(InstallerUsingCMake):
     Installer object for installing Sundials
     """
 
+    name = 'sundials'
+    dependencies = ('mpi', 'cmake')
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
                  log_path=Path(__file__).parents[1].joinpath('log',
                                                              'sundials.log'),
-                 overwrite_on_exist=False):
+                 overwrite_on_exist=False,
+                 registry=None):
         """
         Gets the Sundials version, sets the url and calls the super constructor
 
@@ -22,15 +26,24 @@ class SundialsInstaller(InstallerUsingCMake):
         log_path : None or Path or str
             Path to the log file containing the log of Installer.
             If None, the log will directed to stderr
+        overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
         self.overwrite_on_exist = overwrite_on_exist
 
-        super().__init__(config_path=config_path, log_path=log_path)
+        super().__init__(config_path=config_path,
+                         log_path=log_path,
+                         registry=registry)
 
         self.sundials_version = self.config['versions']['sundials']
         self.sundials_url = (f'https://computing.llnl.gov/sites/default/files/inline-files/sundials-{self.sundials_version}.tar.gz')
+        self.mirrors[self.sundials_url] = \
+            [f'https://github.com/LLNL/sundials/releases/download/'
+             f'v{self.sundials_version}/'
+             f'sundials-{self.sundials_version}.tar.gz']
 
         self.file_from_make = self.local_dir.joinpath('lib',
                                                       'libsundials_cvode.a')
@@ -50,6 +63,6 @@ class SundialsInstaller(InstallerUsingCMake):
         self.logger.info('Installing Sundials')
         self.install_package(url=self.sundials_url,
                              file_from_make=self.file_from_make,
-                             extra_cmake_option=self.extra_config_options,
+                             extra_config_option=self.extra_config_options,
                              overwrite_on_exist=self.overwrite_on_exist)
         self.logger.info('Installation completed successfully')
@@ -7,11 +7,16 @@ class BOUTPPInstaller(InstallerUsingGit):
     Installer object for installing BOUT++
     """
 
+    name = 'boutpp'
+    dependencies = ('mpi', 'fftw', 'hdf5', 'netcdf', 'netcdf_cxx',
+                    'sundials', 'petsc', 'slepc')
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
                  log_path=Path(__file__).parents[1].joinpath('log',
                                                              'boutpp.log'),
-                 overwrite_on_exist=False):
+                 overwrite_on_exist=False,
+                 registry=None):
         """
         Gets the BOUT++ version, sets the BOUT++ url and calls the super
         constructor
@@ -30,6 +35,8 @@ class BOUTPPInstaller(InstallerUsingGit):
             If None, the log will directed to stderr
         overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
         self.overwrite_on_exist = overwrite_on_exist
@@ -39,7 +46,8 @@ class BOUTPPInstaller(InstallerUsingGit):
         super().__init__(name,
                          section,
                          config_path=config_path,
-                         log_path=log_path)
+                         log_path=log_path,
+                         registry=registry)
 
         self.boutpp_url = 'https://github.com/boutproject/BOUT-dev.git'
         self.file_from_make = self.git_dir.joinpath('lib', 'libbout++.a')
@@ -7,11 +7,15 @@ class CMakeInstaller(Installer):
     Installer object for installing CMake
     """
 
+    name = 'cmake'
+    dependencies = ()
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
                  log_path=Path(__file__).parents[1].joinpath('log',
                                                              'cmake.log'),
-                 overwrite_on_exist=False):
+                 overwrite_on_exist=False,
+                 registry=None):
         """
         Gets the CMake version, sets the CMake url, calls the super constructor
 
@@ -24,11 +28,15 @@ class CMakeInstaller(Installer):
             If None, the log will directed to stderr
         overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
         self.overwrite_on_exist = overwrite_on_exist
 
-        super().__init__(config_path=config_path, log_path=log_path)
+        super().__init__(config_path=config_path,
+                         log_path=log_path,
+                         registry=registry)
 
         self.cmake_version = self.config['versions']['cmake']
         cmake_major_minor_version = '.'.join(self.cmake_version.split('.')[:2])
@@ -38,13 +46,12 @@ class CMakeInstaller(Installer):
 
         self.file_from_make = self.local_dir.joinpath('bin', 'cmake')
 
-    def run_configure(self,
-                      tar_dir,
-                      config_log_path,
-                      extra_config_option,
-                      overwrite_on_exist):
+    def get_configure_step(self,
+                           tar_dir,
+                           config_log_path,
+                           extra_config_option):
         """
-        Configures the package with the bootstrap script
+        Returns the bootstrap command configuring the package
 
         Parameters
         ----------
@@ -55,28 +62,37 @@ class CMakeInstaller(Installer):
         extra_config_option:
             Configure option to include.
             --prefix=self.local_dir is already added as an option
-        overwrite_on_exist : bool
-            Whether to overwrite the package if it is already found
+
+        Returns
+        -------
+        config_str : str
+            The bootstrap command
+        fingerprint : str
+            The fingerprint of the inputs of configuring
+        output_path : Path
+            The Makefile created by the bootstrap script
         """
 
         # The bootstrap of CMake does not necessarily create a config.log
         # file, but it will at least create a Makefile which didn't exist before
-
         make_path = Path(config_log_path).parent.joinpath('Makefile')
 
-        if not make_path.is_file() or overwrite_on_exist:
-            config_options = dict(prefix=str(self.local_dir))
-            if extra_config_option is not None:
-                config_options = {**config_options, **extra_config_option}
-            self.logger.info(f'Configuring with options {config_options}')
-            config_str = \
-                self.get_configure_command(config_options=config_options)
-
-            # Calling the bootstrap script rather than configure
-            config_str = config_str.replace('configure', 'bootstrap')
-            self.run_subprocess(config_str, tar_dir)
-        else:
-            self.logger.info(f'{make_path} found, skipping configuring')
+        config_options = dict(prefix=str(self.local_dir))
+        if extra_config_option is not None:
+            config_options = {**config_options, **extra_config_option}
+        # The number of jobs does not change the result, so it is left out of
+        # the fingerprint
+        fingerprint = self.get_configure_fingerprint(tar_dir, config_options)
+
+        # The bootstrap script builds CMake itself, so it must also be told
+        # about the parallelism
+        config_options['parallel'] = self.jobs
+        config_str = self.get_configure_command(config_options=config_options)
+
+        # Calling the bootstrap script rather than configure
+        config_str = config_str.replace('configure', 'bootstrap')
+
+        return config_str, fingerprint, make_path
 
     def install(self):
         """
@@ -8,6 +8,9 @@ class FFMPEGInstaller(Installer):
     Installer object for installing FFMPEG
     """
 
+    name = 'ffmpeg'
+    dependencies = ('nasm', 'yasm', 'x264')
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
                  ffmpeg_log_path=
@@ -18,7 +21,8 @@ class FFMPEGInstaller(Installer):
                  Path(__file__).parents[1].joinpath('log', 'yasm.log'),
                  x264_log_path=
                  Path(__file__).parents[1].joinpath('log', 'x264.log'),
-                 overwrite_on_exist=False):
+                 overwrite_on_exist=False,
+                 registry=None):
         """
         Gets the version and url of FFMPEG and calls the super constructor
 
@@ -42,11 +46,15 @@ class FFMPEGInstaller(Installer):
             If None, the log will directed to stderr
         overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
         self.overwrite_on_exist = overwrite_on_exist
 
-        super().__init__(config_path=config_path, log_path=ffmpeg_log_path)
+        super().__init__(config_path=config_path,
+                         log_path=ffmpeg_log_path,
+                         registry=registry)
 
         self.ffmpeg_version = self.config['versions']['ffmpeg']
         self.ffmpeg_url = (f'http://www.ffmpeg.org/releases/ffmpeg-'
@@ -54,12 +62,17 @@ class FFMPEGInstaller(Installer):
         self.file_from_make = self.local_dir.joinpath('bin', 'ffmpeg')
 
         # Create dependency installers
-        self.nasm = \
-            NASMInstaller(config_path=config_path, log_path=nasm_log_path)
-        self.yasm = \
-            YASMInstaller(config_path=config_path, log_path=yasm_log_path)
-        self.x264 = \
-            X264Installer(config_path=config_path, log_path=x264_log_path)
+        if registry is not None:
+            self.nasm = registry.get_installer('nasm')
+            self.yasm = registry.get_installer('yasm')
+            self.x264 = registry.get_installer('x264')
+        else:
+            self.nasm = \
+                NASMInstaller(config_path=config_path, log_path=nasm_log_path)
+            self.yasm = \
+                YASMInstaller(config_path=config_path, log_path=yasm_log_path)
+            self.x264 = \
+                X264Installer(config_path=config_path, log_path=x264_log_path)
 
         self.extra_config_options = \
             {'enable-gpl': None,
@@ -90,9 +103,9 @@ class FFMPEGInstaller(Installer):
         Installs FFMPEG dependencies
         """
 
-        self.nasm.install()
-        self.yasm.install()
-        self.x264.install()
+        self.install_dependency(self.nasm)
+        self.install_dependency(self.yasm)
+        self.install_dependency(self.x264)
 
 
 class NASMInstaller(Installer):
@@ -100,10 +113,14 @@ class NASMInstaller(Installer):
     Installer object for installing NASM
     """
 
+    name = 'nasm'
+    dependencies = ()
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
                  log_path=Path(__file__).parents[1].joinpath('log', 'nasm.log'),
-                 overwrite_on_exist=False):
+                 overwrite_on_exist=False,
+                 registry=None):
         """
         Gets the NASM version, sets the NASM url and calls the super
         constructor
@@ -117,11 +134,15 @@ class NASMInstaller(Installer):
             If None, the log will directed to stderr
         overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
         self.overwrite_on_exist = overwrite_on_exist
 
-        super().__init__(config_path=config_path, log_path=log_path)
+        super().__init__(config_path=config_path,
+                         log_path=log_path,
+                         registry=registry)
 
         self.nasm_version = self.config['versions']['nasm']
         self.nasm_url = (f'http://www.nasm.us/pub/nasm/releasebuilds/'
@@ -151,10 +172,14 @@ class YASMInstaller(Installer):
     Installer object for installing YASM
     """
 
+    name = 'yasm'
+    dependencies = ()
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
                  log_path=Path(__file__).parents[1].joinpath('log', 'yasm.log'),
-                 overwrite_on_exist=False):
+                 overwrite_on_exist=False,
+                 registry=None):
         """
         Gets the YASM version, sets the YASM url and calls the super
         constructor
@@ -168,11 +193,15 @@ class YASMInstaller(Installer):
             If None, the log will directed to stderr
         overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
         self.overwrite_on_exist = overwrite_on_exist
 
-        super().__init__(config_path=config_path, log_path=log_path)
+        super().__init__(config_path=config_path,
+                         log_path=log_path,
+                         registry=registry)
 
         self.yasm_version = self.config['versions']['yasm']
         self.yasm_url = (
@@ -202,10 +231,14 @@ class X264Installer(Installer):
     Installer object for installing X264
     """
 
+    name = 'x264'
+    dependencies = ('nasm',)
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
                  log_path=Path(__file__).parents[1].joinpath('log', 'x264.log'),
-                 overwrite_on_exist=False):
+                 overwrite_on_exist=False,
+                 registry=None):
         """
         Gets the X264 version, sets the X264 url and calls the super
         constructor
@@ -219,11 +252,15 @@ class X264Installer(Installer):
             If None, the log will directed to stderr
         overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
         self.overwrite_on_exist = overwrite_on_exist
 
-        super().__init__(config_path=config_path, log_path=log_path)
+        super().__init__(config_path=config_path,
+                         log_path=log_path,
+                         registry=registry)
 
         self.x264_version = self.config['versions']['x264']
         self.x264_url = (f'https://download.videolan.org/pub/videolan/x264/' 
@@ -7,10 +7,14 @@ class FFTWInstaller(Installer):
     Installer object for installing FFTW
     """
 
+    name = 'fftw'
+    dependencies = ()
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
                  log_path=Path(__file__).parents[1].joinpath('log', 'fftw.log'),
-                 overwrite_on_exist=False):
+                 overwrite_on_exist=False,
+                 registry=None):
         """
         Gets the FFTW version, sets the FFTW url and calls the super constructor
 
@@ -23,11 +27,15 @@ class FFTWInstaller(Installer):
             If None, the log will directed to stderr
         overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
         self.overwrite_on_exist = overwrite_on_exist
 
-        super().__init__(config_path=config_path, log_path=log_path)
+        super().__init__(config_path=config_path,
+                         log_path=log_path,
+                         registry=registry)
 
         self.fftw_version = self.config['versions']['fftw']
         self.fftw_url = f'http://www.fftw.org/fftw-{self.fftw_version}.tar.gz'
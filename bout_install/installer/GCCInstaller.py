@@ -1,16 +1,27 @@
 from pathlib import Path
 from bout_install.Installer import Installer
+from bout_install.Installer import get_path_lock
 
 
 class GCCInstaller(Installer):
     """
     Installer object for installing GCC
+
+    References
+    ----------
+    http://luiarthur.github.io/gccinstall
     """
 
+    name = 'gcc'
+    dependencies = ()
+    # The test suite is not needed for building
+    untar_excludes = ('gcc/testsuite',)
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
                  log_path=Path(__file__).parents[1].joinpath('log', 'gcc.log'),
-                 overwrite_on_exist=False):
+                 overwrite_on_exist=False,
+                 registry=None):
         """
         Gets the GCC version, sets the GCC url and calls the super constructor
 
@@ -23,67 +34,124 @@ class GCCInstaller(Installer):
             If None, the log will directed to stderr
         overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
         self.overwrite_on_exist = overwrite_on_exist
 
-        super().__init__(config_path=config_path, log_path=log_path)
+        super().__init__(config_path=config_path,
+                         log_path=log_path,
+                         registry=registry)
 
         self.gcc_version = self.config['versions']['gcc']
-        self.gcc_url = (f'http://mirror.koddos.net/gcc/releases/'
-                        f'gcc-{self.gcc_version}/gcc-{self.gcc_version}.tar.gz')
+        gcc_path = f'gcc-{self.gcc_version}/gcc-{self.gcc_version}.tar.gz'
+        self.gcc_url = f'https://ftp.gnu.org/gnu/gcc/{gcc_path}'
+        self.mirrors[self.gcc_url] = \
+            [f'https://ftpmirror.gnu.org/gcc/{gcc_path}',
+             f'http://mirror.koddos.net/gcc/releases/{gcc_path}']
         self.file_from_make = self.local_dir.joinpath('bin', 'gcc')
 
-    def install_package(self,
-                        url,
-                        file_from_make,
-                        path_config_log='config.log',
-                        overwrite_on_exist=False,
-                        extra_config_option=None):
+        # The prerequisites contrib/download_prerequisites would download
+        infrastructure = 'https://gcc.gnu.org/pub/gcc/infrastructure'
+        for name, suffix in (('gmp', 'tar.bz2'),
+                             ('mpfr', 'tar.bz2'),
+                             ('mpc', 'tar.gz'),
+                             ('isl', 'tar.bz2')):
+            version = self.config['versions'][name]
+            self.extra_sources[name] = \
+                f'{infrastructure}/{name}-{version}.{suffix}'
+
+    def prepare_source(self, url, overwrite_on_exist=False):
         """
-        Installs GCC if it's not installed
+        Downloads and untars GCC and its prerequisites
+
+        Notes
+        -----
+        As in contrib/download_prerequisites, the prerequisites are linked
+        into the source of GCC, so that they are built with it.
+        They are downloaded like the source, so that they are cached and
+        bundled
 
         Parameters
         ----------
         url : str
-            Url to the tar file of the package
-        file_from_make : Path or str
-            File originating from the make processes (used to check if the
-            package has been made)
-        path_config_log : str or Path
-            Name of the log file for configure relative to the configuration
-            file
+            The url of the source
         overwrite_on_exist : bool
-            Whether to overwrite the package if it is already found
-        extra_config_option : dict
-            Configure option to include.
-            --prefix=self.local_dir is already added as an option
+            Whether to overwrite the source if it is already found
+
+        Returns
+        -------
+        tar_dir : Path
+            The directory of the untarred source
+        """
+
+        tar_dir = super().prepare_source(url, overwrite_on_exist)
+
+        # NOTE: The prerequisites were downloaded with the source
+        for name, prerequisite_url in self.extra_sources.items():
+            prerequisite_path = self.get_tar_file_path(prerequisite_url)
+            prerequisite_dir = self.get_tar_dir(prerequisite_path)
+            self.run_untar(prerequisite_path,
+                           prerequisite_dir,
+                           overwrite_on_exist)
+            link_path = tar_dir.joinpath(name)
+            with get_path_lock(link_path):
+                if not link_path.exists():
+                    # Replace links to removed directories
+                    if link_path.is_symlink():
+                        link_path.unlink()
+                    link_path.symlink_to(prerequisite_dir)
+
+        return tar_dir
+
+    def plan_source(self, url, overwrite_on_exist):
+        """
+        Returns the phases preparing the source, including the prerequisites
 
-        References
+        Parameters
         ----------
-        http://luiarthur.github.io/gccinstall
+        url : str
+            The url of the source
+        overwrite_on_exist : bool
+            Whether to overwrite the source if it is already found
+
+        Returns
+        -------
+        phases : list of dict
+            The download and untar phases of the source and the
+            prerequisites
+        tar_dir : Path
+            The directory of the untarred source
         """
 
-        # Download the tar file
-        tar_file_path = self.get_tar_file_path(url)
-        self.run_download_tar(url, tar_file_path, overwrite_on_exist)
+        phases, tar_dir = super().plan_source(url, overwrite_on_exist)
 
-        # Untar
-        tar_dir = self.get_tar_dir(tar_file_path)
-        self.run_untar(tar_file_path, tar_dir, overwrite_on_exist)
+        for name in self.extra_sources:
+            if tar_dir.joinpath(name).exists() and not overwrite_on_exist:
+                phases.append({'phase': 'untar', 'status': 'skipped'})
+            else:
+                phases.append({'phase': 'untar', 'status': 'run'})
 
-        # Download prerequisites
-        self.logger.info('Downloading prerequisites')
-        prereq_path = Path('contrib').joinpath('download_prerequisites')
-        self.run_subprocess(f'./{prereq_path}', tar_dir)
+        return phases, tar_dir
 
-        # Configure and make
-        config_log_path = tar_dir.joinpath(path_config_log)
-        self.run_configure(tar_dir,
-                           config_log_path,
-                           extra_config_option,
-                           overwrite_on_exist)
-        self.run_make(tar_dir, file_from_make, overwrite_on_exist)
+    def clean_build_dir(self, tar_dir):
+        """
+        Removes the untarred source and prerequisites from the build root
+
+        Parameters
+        ----------
+        tar_dir : Path
+            The untarred source
+        """
+
+        prerequisite_dirs = \
+            [self.get_tar_dir(self.get_tar_file_path(url))
+             for url in self.extra_sources.values()]
+
+        super().clean_build_dir(tar_dir)
+        for prerequisite_dir in prerequisite_dirs:
+            super().clean_build_dir(prerequisite_dir)
 
     def install(self):
         """
@@ -8,10 +8,14 @@ class HDF5Installer(Installer):
     Installer object for installing HDF5
     """
 
+    name = 'hdf5'
+    dependencies = ()
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
                  log_path=Path(__file__).parents[1].joinpath('log', 'hdf5.log'),
-                 overwrite_on_exist=False):
+                 overwrite_on_exist=False,
+                 registry=None):
         """
         Gets the HDF5 version, sets the HDF5 url and calls the super constructor
 
@@ -24,11 +28,15 @@ class HDF5Installer(Installer):
             If None, the log will directed to stderr
         overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
         self.overwrite_on_exist = overwrite_on_exist
 
-        super().__init__(config_path=config_path, log_path=log_path)
+        super().__init__(config_path=config_path,
+                         log_path=log_path,
+                         registry=registry)
 
         self.hdf5_version = self.config['versions']['hdf5']
         hdf5_major_minor_version = '.'.join(self.hdf5_version.split('.')[:2])
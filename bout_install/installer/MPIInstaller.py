@@ -8,10 +8,14 @@ class MPIInstaller(Installer):
     Installer object for installing MPI
     """
 
+    name = 'mpi'
+    dependencies = ()
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
                  log_path=Path(__file__).parents[1].joinpath('log', 'mpi.log'),
-                 overwrite_on_exist=False):
+                 overwrite_on_exist=False,
+                 registry=None):
         """
         Gets the MPI version, sets the MPI url and calls the super constructor
 
@@ -24,11 +28,15 @@ class MPIInstaller(Installer):
             If None, the log will directed to stderr
         overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
         self.overwrite_on_exist = overwrite_on_exist
 
-        super().__init__(config_path=config_path, log_path=log_path)
+        super().__init__(config_path=config_path,
+                         log_path=log_path,
+                         registry=registry)
 
         self.mpi_version = self.config['versions']['mpi']
         self.mpi_url = (f'http://www.mpich.org/static/downloads/'
@@ -1,15 +1,50 @@
-import os
 import shutil
 from pathlib import Path
 from bout_install.Installer import Installer
 from bout_install.installer.HDF5Installer import HDF5Installer
 
 
+def add_local_flags(environment, local_dir):
+    """
+    Adds the include and library directories of local_dir to the flags
+
+    Notes
+    -----
+    CPPFLAGS and LDFLAGS must be exported for configure to find HDF5 and
+    NetCDF
+    https://www.unidata.ucar.edu/support/help/MailArchives/netcdf/msg13261.html
+    http://www.unidata.ucar.edu/software/netcdf/docs/getting_and_building_netcdf.html#build_default
+
+    Parameters
+    ----------
+    environment : dict
+        The environment variables, which are modified in place
+    local_dir : Path
+        The installation directory
+
+    Returns
+    -------
+    environment : dict
+        The environment variables
+    """
+
+    flags = (('CPPFLAGS', f'-I{local_dir.joinpath("include")}'),
+             ('LDFLAGS', f'-L{local_dir.joinpath("lib")}'))
+    for variable, flag in flags:
+        environment[variable] = \
+            f'{flag} {environment.get(variable, "")}'.strip()
+
+    return environment
+
+
 class NetCDFInstaller(Installer):
     """
     Installer object for installing NetCDF
     """
 
+    name = 'netcdf'
+    dependencies = ('hdf5',)
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
                  netcdf_log_path=
@@ -18,7 +53,8 @@ class NetCDFInstaller(Installer):
                  Path(__file__).parents[1].joinpath('log', 'netcdf_cxx.log'),
                  hdf5_log_path=
                  Path(__file__).parents[1].joinpath('log', 'hdf5.log'),
-                 overwrite_on_exist=False):
+                 overwrite_on_exist=False,
+                 registry=None):
         """
         Gets the version and url of NetCDF and calls the super constructor
 
@@ -40,34 +76,53 @@ class NetCDFInstaller(Installer):
             If None, the log will directed to stderr
         overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
         self.overwrite_on_exist = overwrite_on_exist
 
-        super().__init__(config_path=config_path, log_path=netcdf_log_path)
+        super().__init__(config_path=config_path,
+                         log_path=netcdf_log_path,
+                         registry=registry)
 
         self.netcdf_version = self.config['versions']['netcdf']
         self.netcdf_url = (f'https://github.com/Unidata/netcdf-c/'
                            f'archive/v{self.netcdf_version}.tar.gz')
 
-        # CPPFLAGS and LDFLAGS must be exported
-        # https://www.unidata.ucar.edu/support/help/MailArchives/netcdf/msg13261.html
-        # http://www.unidata.ucar.edu/software/netcdf/docs/getting_and_building_netcdf.html#build_default
-        os.environ['CPPFLAGS'] = f'-I{self.local_dir.joinpath("include")}'
-        os.environ['LDFLAGS'] = f'-L{self.local_dir.joinpath("lib")}'
-
-        # Create dependency installer
-        self.hdf5 = HDF5Installer(config_path=config_path,
-                                  log_path=hdf5_log_path)
-
-        # Create the cxx interface installer
-        self.netcdf_cxx = NetCDFCXXInstaller(config_path=config_path,
-                                             log_path=netcdf_cxx_log_path)
+        # Create dependency installer and the cxx interface installer
+        if registry is not None:
+            self.hdf5 = registry.get_installer('hdf5')
+            self.netcdf_cxx = registry.get_installer('netcdf_cxx')
+        else:
+            self.hdf5 = HDF5Installer(config_path=config_path,
+                                      log_path=hdf5_log_path)
+            self.netcdf_cxx = \
+                NetCDFCXXInstaller(config_path=config_path,
+                                   log_path=netcdf_cxx_log_path)
 
         self.file_from_make = self.local_dir.joinpath('bin', 'ncdump')
 
         self.extra_config_options = {'disable-dap': None}
 
+    def get_subprocess_environment(self):
+        """
+        Returns the environment of the subprocesses
+
+        Notes
+        -----
+        The flags of local_dir are only set for the subprocesses of this
+        package, see `add_local_flags`
+
+        Returns
+        -------
+        environment : dict
+            The environment variables
+        """
+
+        return add_local_flags(super().get_subprocess_environment(),
+                               self.local_dir)
+
     def install(self):
         """
         Installs HDF5, the NetCDF package and the CXX interface
@@ -87,14 +142,14 @@ class NetCDFInstaller(Installer):
             self.logger.info('Found ncdump in PATH, skipping...')
 
         # Install the cxx interface
-        self.netcdf_cxx.install()
+        self.install_dependency(self.netcdf_cxx)
 
     def install_dependencies(self):
         """
         Installs NetCDF dependencies
         """
 
-        self.hdf5.install()
+        self.install_dependency(self.hdf5)
 
 
 class NetCDFCXXInstaller(Installer):
@@ -102,11 +157,15 @@ class NetCDFCXXInstaller(Installer):
     Installer object for installing NetCDFs CXX interface
     """
 
+    name = 'netcdf_cxx'
+    dependencies = ('netcdf',)
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
                  log_path=
                  Path(__file__).parents[1].joinpath('log', 'netcdf_cxx.log'),
-                 overwrite_on_exist=False):
+                 overwrite_on_exist=False,
+                 registry=None):
         """
         Gets the NetCDF CXX version, sets the NetCDF CXX url and calls the
         super constructor
@@ -120,11 +179,15 @@ class NetCDFCXXInstaller(Installer):
             If None, the log will directed to stderr
         overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
         self.overwrite_on_exist = overwrite_on_exist
 
-        super().__init__(config_path=config_path, log_path=log_path)
+        super().__init__(config_path=config_path,
+                         log_path=log_path,
+                         registry=registry)
 
         self.netcdf_cxx_version = self.config['versions']['netcdf_cxx']
         self.netcdf_cxx_url = (f'http://github.com/Unidata/netcdf-cxx4/archive/'
@@ -132,6 +195,24 @@ class NetCDFCXXInstaller(Installer):
 
         self.file_from_make = self.local_dir.joinpath('bin', 'ncxx4-config')
 
+    def get_subprocess_environment(self):
+        """
+        Returns the environment of the subprocesses
+
+        Notes
+        -----
+        The flags of local_dir are only set for the subprocesses of this
+        package, see `add_local_flags`
+
+        Returns
+        -------
+        environment : dict
+            The environment variables
+        """
+
+        return add_local_flags(super().get_subprocess_environment(),
+                               self.local_dir)
+
     def install(self):
         """
         Installs the NetCDF CXX interface
@@ -1,4 +1,3 @@
-import requests
 from pathlib import Path
 from bout_install.Installer import Installer
 from bout_install.installer.MPIInstaller import MPIInstaller
@@ -9,13 +8,17 @@ class PETScInstaller(Installer):
     Installer object for installing PETSc
     """
 
+    name = 'petsc'
+    dependencies = ('mpi',)
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
                  petsc_log_path=Path(__file__).parents[1].joinpath('log',
                                                                    'petsc.log'),
                  mpi_log_path=Path(__file__).parents[1].joinpath('log',
                                                                  'mpi.log'),
-                 overwrite_on_exist=False):
+                 overwrite_on_exist=False,
+                 registry=None):
         """
         Gets the version and url of PETSc and calls the super constructor
 
@@ -33,11 +36,15 @@ class PETScInstaller(Installer):
             If None, the log will directed to stderr
         overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
         self.overwrite_on_exist = overwrite_on_exist
 
-        super().__init__(config_path=config_path, log_path=petsc_log_path)
+        super().__init__(config_path=config_path,
+                         log_path=petsc_log_path,
+                         registry=registry)
 
         self.petsc_version = self.config['versions']['petsc']
         self.petsc_url = (f'http://ftp.mcs.anl.gov/pub/petsc/release-snapshots/'
@@ -45,10 +52,23 @@ class PETScInstaller(Installer):
         self.petsc_mirror = (f'http://www.mcs.anl.gov/petsc/mirror/'
                              f'release-snapshots/petsc-{self.petsc_version}'
                              f'.tar.gz')
+        self.mirrors[self.petsc_url] = [self.petsc_mirror]
 
         # Create dependency installer
-        self.mpi = MPIInstaller(config_path=config_path,
-                                log_path=mpi_log_path)
+        if registry is not None:
+            self.mpi = registry.get_installer('mpi')
+        else:
+            self.mpi = MPIInstaller(config_path=config_path,
+                                    log_path=mpi_log_path)
+
+        # The BLAS/LAPACK packages configure would otherwise download
+        # NOTE: Configure is given the downloaded tar files, so that PETSc
+        #       can be installed without network access
+        externalpackages = 'http://ftp.mcs.anl.gov/pub/petsc/externalpackages'
+        for name in ('fblaslapack', 'f2cblaslapack'):
+            version = self.config['versions'][name]
+            self.extra_sources[name] = \
+                f'{externalpackages}/{name}-{version}.tar.gz'
 
         self.file_from_make = self.local_dir.joinpath('lib', 'libpetsc.a')
 
@@ -56,9 +76,10 @@ class PETScInstaller(Installer):
                                      'with-mpi': 1,
                                      'with-precision': 'double',
                                      'with-scalar-type': 'real',
-                                     'with-shared-libraries': 0,
-                                     'download-fblaslapack': 1,
-                                     'download-f2cblaslapack': 1}
+                                     'with-shared-libraries': 0}
+        for name, url in self.extra_sources.items():
+            self.extra_config_options[f'download-{name}'] = \
+                self.get_tar_file_path(url)
 
         if self.config.getboolean('required', 'mpi') or \
                 not self.use_preinstalled:
@@ -98,44 +119,69 @@ class PETScInstaller(Installer):
         config_str = f'python2 ./configure{options}'
         return config_str
 
-    def get_petsc_arch(self):
+    def get_petsc_arch(self, tar_dir):
         """
         Returns the os dependent PETSC_ARCH variable
 
+        Parameters
+        ----------
+        tar_dir : Path
+            Directory of the configured source
+
         Returns
         -------
         petsc_arch : str
-            The PETSC_ARCH variable
+            The PETSC_ARCH variable. As the arch directory is made when
+            configuring, `<arch>` is returned when planning an unconfigured
+            source
         """
 
-        tar_dir = self.get_tar_dir(self.get_tar_file_path(self.petsc_url))
+        arch_dirs = list(Path(tar_dir).glob('arch*'))
+        if len(arch_dirs) == 0 and self.is_planning():
+            return '<arch>'
 
-        petsc_arch = list(tar_dir.glob('arch*'))[0].name
+        petsc_arch = arch_dirs[0].name
 
         return petsc_arch
 
-    def make(self, path):
+    def get_make_commands(self, path):
         """
-        Make the package using make all and make test
+        Returns the commands making the package using make all and make test
 
         Parameters
         ----------
         path : Path or str
             Path to the get_configure_command file
+
+        Returns
+        -------
+        make_commands : list of tuple
+            The phase and command of each step, run in order
         """
 
-        petsc_dir = f'PETSC_DIR={self.install_dir}/petsc-{self.petsc_version}'
+        petsc_dir = f'PETSC_DIR={Path(path).absolute()}'
+
+        petsc_arch = f'PETSC_ARCH={self.get_petsc_arch(path)}'
+
+        # PETSc runs its own parallel make, controlled by MAKE_NP
+        make_np = f'MAKE_NP={self.jobs}'
 
-        petsc_arch = f'PETSC_ARCH={self.get_petsc_arch()}'
+        make_all_str = f'make {petsc_dir} {petsc_arch} {make_np} all'
 
-        make_all_str = f'make {petsc_dir} {petsc_arch} all'
-        self.run_subprocess(make_all_str, path)
+        make_install_str = \
+            f'make {petsc_dir} {petsc_arch} install{self.get_destdir()}'
 
-        make_install_str = f'make {petsc_dir} {petsc_arch} install'
-        self.run_subprocess(make_install_str, path)
+        # A staged installation is promoted only after the tests pass, so
+        # the tests are run in the build tree
+        if self.is_staging():
+            make_test_str = f'make {petsc_dir} {petsc_arch} test'
+        else:
+            make_test_str = \
+                f'make PETSC_DIR={self.local_dir} PETSC_ARCH= test'
 
-        make_test_str = f'make PETSC_DIR={self.local_dir} PETSC_ARCH= test'
-        self.run_subprocess(make_test_str, path)
+        return [('make', make_all_str),
+                ('install', make_install_str),
+                ('test', make_test_str)]
 
     def install(self):
         """
@@ -146,19 +192,12 @@ class PETScInstaller(Installer):
 
         self.logger.info('Installing PETSc')
 
-        try:
-            self.install_package(url=self.petsc_url,
-                                 file_from_make=self.file_from_make,
-                                 path_config_log='configure.log',
-                                 extra_config_option=self.extra_config_options,
-                                 overwrite_on_exist=self.overwrite_on_exist)
-        except requests.exceptions.HTTPError as e:
-            self.logger.warning(f'Trying mirror after error: {e}')
-            self.install_package(url=self.petsc_mirror,
-                                 file_from_make=self.file_from_make,
-                                 path_config_log='configure.log',
-                                 extra_config_option=self.extra_config_options,
-                                 overwrite_on_exist=self.overwrite_on_exist)
+        # NOTE: The mirror is tried if the download fails
+        self.install_package(url=self.petsc_url,
+                             file_from_make=self.file_from_make,
+                             path_config_log='configure.log',
+                             extra_config_option=self.extra_config_options,
+                             overwrite_on_exist=self.overwrite_on_exist)
 
         self.logger.info('Installation completed successfully')
 
@@ -167,4 +206,4 @@ class PETScInstaller(Installer):
         Install PETSc dependencies
         """
 
-        self.mpi.install()
+        self.install_dependency(self.mpi)
@@ -8,6 +8,9 @@ class SLEPcInstaller(Installer):
     Installer object for installing SLEPc
     """
 
+    name = 'slepc'
+    dependencies = ('petsc',)
+
     def __init__(self,
                  config_path=Path(__file__).parent.joinpath('config.ini'),
                  slepc_log_path=Path(__file__).parents[1].joinpath('log',
@@ -16,7 +19,8 @@ class SLEPcInstaller(Installer):
                                                                    'petsc.log'),
                  mpi_log_path=Path(__file__).parents[1].joinpath('log',
                                                                  'mpi.log'),
-                 overwrite_on_exist=False):
+                 overwrite_on_exist=False,
+                 registry=None):
         """
         Gets the SLEPc version, sets the SLEPc url and calls the super
         constructor
@@ -36,19 +40,26 @@ class SLEPcInstaller(Installer):
             If None, the log will directed to stderr
         overwrite_on_exist : bool
             Whether to overwrite the package if it is already found
+        registry : None or InstallerRegistry
+            Registry shared by the installers of one run
         """
 
         self.overwrite_on_exist = overwrite_on_exist
 
-        super().__init__(config_path=config_path, log_path=slepc_log_path)
+        super().__init__(config_path=config_path,
+                         log_path=slepc_log_path,
+                         registry=registry)
 
         self.petsc_version = self.config['versions']['petsc']
         self.slepc_version = self.config['versions']['slepc']
 
         # Create dependency installer
-        self.petsc = PETScInstaller(config_path=config_path,
-                                    petsc_log_path=petsc_log_path,
-                                    mpi_log_path=mpi_log_path)
+        if registry is not None:
+            self.petsc = registry.get_installer('petsc')
+        else:
+            self.petsc = PETScInstaller(config_path=config_path,
+                                        petsc_log_path=petsc_log_path,
+                                        mpi_log_path=mpi_log_path)
 
         self.slepc_url = (f'http://slepc.upv.es/download/distrib/'
                           f'slepc-{self.slepc_version}.tar.gz')
@@ -88,32 +99,47 @@ class SLEPcInstaller(Installer):
         config_str = f'python2 ./configure{options}'
         return config_str
 
-    def make(self, path):
+    def get_make_commands(self, path):
         """
-        Make the package using make all and make test
+        Returns the commands making the package using make all and make check
 
         Parameters
         ----------
         path : Path or str
             Path to the get_configure_command file
+
+        Returns
+        -------
+        make_commands : list of tuple
+            The phase and command of each step, run in order
         """
 
+        # SLEPc runs its own parallel make, controlled by MAKE_NP
         make_options = \
-            (f'SLEPC_DIR={self.install_dir}/slepc-{self.slepc_version}'
-             f' PETSC_DIR={self.local_dir}')
+            (f'SLEPC_DIR={Path(path).absolute()}'
+             f' PETSC_DIR={self.local_dir}'
+             f' MAKE_NP={self.jobs}')
 
         make_str = f'make {make_options}'
-        self.run_subprocess(make_str, path)
 
-        make_install_str = f'make {make_options} install'
-        self.run_subprocess(make_install_str, path)
+        make_install_str = f'make {make_options} install{self.get_destdir()}'
 
-        make_test_options =  \
-            (f'SLEPC_DIR={self.local_dir}'
-             f' PETSC_DIR={self.local_dir}'
-             f' PETSC_ARCH=')
+        # A staged installation is promoted only after the tests pass, so
+        # the tests are run in the build tree
+        if self.is_staging():
+            make_test_options = \
+                (f'SLEPC_DIR={Path(path).absolute()}'
+                 f' PETSC_DIR={self.local_dir}')
+        else:
+            make_test_options = \
+                (f'SLEPC_DIR={self.local_dir}'
+                 f' PETSC_DIR={self.local_dir}'
+                 f' PETSC_ARCH=')
         make_test_str = f'make {make_test_options} check'
-        self.run_subprocess(make_test_str, path)
+
+        return [('make', make_str),
+                ('install', make_install_str),
+                ('test', make_test_str)]
 
     def install(self):
         """
@@ -125,8 +151,9 @@ class SLEPcInstaller(Installer):
         # Set config log path
         # NOTE: The configuration log is hiding in strange places in SLEPc,
         #       we'll therefore try to glob us to the configure.log
-        tar_dir = Path(self.get_tar_file_path(self.slepc_url)).\
-            absolute().parent.joinpath(f'slepc-{self.slepc_version}')
+        tar_file_path = self.get_tar_file_path(self.slepc_url)
+        tar_dir = self.get_extract_dir(tar_file_path).\
+            joinpath(f'slepc-{self.slepc_version}')
         path_config_logs = sorted(tar_dir.glob('**/configure.log'))
         if len(path_config_logs) == 0:
             # No configuration file found, might as well set it to configure.log
@@ -147,4 +174,4 @@ class SLEPcInstaller(Installer):
         Installs SLEPc dependencies
         """
 
-        self.petsc.install()
+        self.install_dependency(self.petsc)
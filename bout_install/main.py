@@ -2,22 +2,57 @@
 # -*- coding: utf-8 -*-
 
 import argparse
-import configparser
+import logging
 from pathlib import Path
+from bout_install.BuildHistory import Progress
+from bout_install.BuildHistory import get_build_history
+from bout_install.Bundle import Bundle
+from bout_install.Installer import Installer
+from bout_install.InstallerRegistry import InstallerRegistry
+from bout_install.Plan import Plan
+from bout_install.Prefetcher import Prefetcher
+from bout_install.Scheduler import Scheduler
+from bout_install.TimingReport import read_durations
 from bout_install.git_installer.BOUTPPInstaller import BOUTPPInstaller
 from bout_install.installer.CMakeInstaller import CMakeInstaller
 from bout_install.installer.FFMPEGInstaller import FFMPEGInstaller
+from bout_install.installer.FFMPEGInstaller import NASMInstaller
+from bout_install.installer.FFMPEGInstaller import X264Installer
+from bout_install.installer.FFMPEGInstaller import YASMInstaller
 from bout_install.installer.FFTWInstaller import FFTWInstaller
 from bout_install.installer.GCCInstaller import GCCInstaller
 from bout_install.installer.HDF5Installer import HDF5Installer
 from bout_install.installer.MPIInstaller import MPIInstaller
+from bout_install.installer.NetCDFInstaller import NetCDFCXXInstaller
 from bout_install.installer.NetCDFInstaller import NetCDFInstaller
 from bout_install.installer.PETScInstaller import PETScInstaller
 from bout_install.installer.SLEPcInstaller import SLEPcInstaller
 from bout_install.cmake_installer.SundialsInstaller import SundialsInstaller
 
-
-def install_bout(config_path=None, add_to_bashrc=False):
+# The installer classes indexed by their package name
+INSTALLER_CLASSES = {installer_class.name: installer_class
+                     for installer_class in (GCCInstaller,
+                                             MPIInstaller,
+                                             CMakeInstaller,
+                                             NASMInstaller,
+                                             YASMInstaller,
+                                             X264Installer,
+                                             FFMPEGInstaller,
+                                             FFTWInstaller,
+                                             HDF5Installer,
+                                             NetCDFInstaller,
+                                             NetCDFCXXInstaller,
+                                             SundialsInstaller,
+                                             PETScInstaller,
+                                             SLEPcInstaller,
+                                             BOUTPPInstaller)}
+
+
+def install_bout(config_path=None,
+                 add_to_bashrc=False,
+                 jobs=None,
+                 workers=None,
+                 bundle_path=None):
     """
     Function which installs BOUT++ and its dependencies.
 
@@ -30,88 +65,109 @@ def install_bout(config_path=None, add_to_bashrc=False):
     add_to_bashrc : bool
         Whether or not to add binaries and library path of the dependencies
         to .bashrc
+    jobs : None or int
+        Number of parallel jobs to use when making.
+        If None, the value from the configuration file is used
+    workers : None or int
+        Maximum number of packages to build concurrently.
+        If None, the value from the configuration file is used
+    bundle_path : None or str or Path
+        Path to a bundle created by `create_bundle`.
+        If set, the sources are taken from the bundle, and no network access
+        is made
     """
 
-    if config_path is None:
-        root_dir = Path(__file__).absolute().parents[1]
-        config_path = root_dir.joinpath('bout_install', 'config.ini')
+    registry = get_registry(config_path)
+    config = registry.config
+
+    # The installers read the number of jobs from the configuration
+    if jobs is not None:
+        config['install_options']['jobs'] = str(jobs)
+
+    if workers is None:
+        workers = config.get('install_options', 'workers', fallback='')
+        workers = int(workers) if workers != '' else 1
+
+    packages = get_packages(config)
+    graph = get_dependency_graph(packages)
+
+    # The durations of earlier builds are used to start the longest chains
+    # of packages first, and to estimate when the installation ends
+    build_history = get_build_history(config)
+    build_options = get_build_options(registry, packages)
+    predictions = {name: sum(durations.values())
+                   for name, durations in
+                   get_build_durations(registry,
+                                       packages,
+                                       build_history,
+                                       build_options).items()
+                   if len(durations) != 0}
+    progress = Progress(graph, predictions, workers)
+
+    if bundle_path is not None:
+        registry.downloader.offline = True
+        print(f'Extracting sources from {bundle_path}...')
+        Bundle(bundle_path).extract(registry, packages)
+        print('...done')
+
+    # Download (and untar if pipelining) the sources in the background while
+    # building
+    prefetcher = None
+    if config.getboolean('download_options', 'pipeline', fallback=False):
+        order = Scheduler(graph, priorities=predictions).get_order()
+        prefetcher = get_prefetcher(registry, order, pipeline=True)
+        prefetcher.start()
+    elif config.getboolean('download_options', 'prefetch', fallback=False):
+        prefetcher = get_prefetcher(registry, packages)
+        prefetcher.start()
+
+    def install_node(name):
+        """
+        Installs a single node of the dependency graph
+
+        Parameters
+        ----------
+        name : str
+            Name of the package to install
+        """
+
+        progress.start(name)
+        print(get_progress_line(f'Installing {name}...', progress))
+        registry.install(name)
+        progress.finish(name)
+        print(get_progress_line(f'...{name} done', progress))
+
+    scheduler = Scheduler(graph, max_workers=workers, priorities=predictions)
+    try:
+        scheduler.run(install_node)
+    finally:
+        if prefetcher is not None:
+            prefetcher.join(cancel=True)
+        build_history.record(registry.timing_report.records, build_options)
+        # The timings are most useful when the installation failed
+        report_path = write_timing_report(registry)
+        print(registry.timing_report.get_summary())
+        print(f'Timing report written to {report_path}')
+
+    if registry.source_cache is not None:
+        print(registry.source_cache.get_summary())
+    if registry.artifact_cache is not None:
+        print(registry.artifact_cache.get_summary())
+    if registry.compiler_cache is not None:
+        print(registry.compiler_cache.get_summary())
+
+    boutpp_installer = registry.get_installer('boutpp')
 
     # String to print when installation is complete
     final_str = '\n'
 
-    config = configparser.ConfigParser(allow_no_value=True)
-    with config_path.open() as f:
-        config.read_file(f)
-
-    if config.getboolean('optional', 'gcc'):
-        print('Installing gcc...')
-        gcc_installer = GCCInstaller(config_path=config_path)
-        gcc_installer.install()
+    if 'gcc' in packages:
+        gcc_installer = registry.get_installer('gcc')
         final_str += (f'export PATH="'
                       f'{gcc_installer.local_dir.joinpath("bin")}:$PATH"\n')
         final_str += (f'export LD_LIBRARY_PATH = '
                       f'{gcc_installer.local_dir.joinpath("lib64")}:'
                       f'$LD_LIBRARY_PATH"\n')
-        print('..done')
-
-    if config.getboolean('required', 'mpi'):
-        print('Installing mpi...')
-        mpi_installer = MPIInstaller(config_path=config_path)
-        mpi_installer.install()
-        print('...done')
-
-    if config.getboolean('optional', 'cmake'):
-        print('Installing cmake...')
-        cmake_installer = CMakeInstaller(config_path=config_path)
-        cmake_installer.install()
-        print('...done')
-
-    if config.getboolean('optional', 'ffmpeg'):
-        print('Installing ffmpeg...')
-        ffmpeg_installer = FFMPEGInstaller(config_path=config_path)
-        ffmpeg_installer.install()
-        print('...done')
-
-    if config.getboolean('required', 'fftw'):
-        print('Installing fftw...')
-        fftw_installer = FFTWInstaller(config_path=config_path)
-        fftw_installer.install()
-        print('...done')
-
-    if config.getboolean('required', 'hdf5'):
-        print('Installing hd5...')
-        hdf5_installer = HDF5Installer(config_path=config_path)
-        hdf5_installer.install()
-        print('...done')
-
-    if config.getboolean('required', 'netcdf'):
-        print('Installing netcdf...')
-        netcdf_installer = NetCDFInstaller(config_path=config_path)
-        netcdf_installer.install()
-        print('...done')
-
-    if config.getboolean('optional', 'sundials'):
-        print('Installing sundials...')
-        sundials_installer = SundialsInstaller(config_path=config_path)
-        sundials_installer.install()
-        print('...done')
-
-    if config.getboolean('optional', 'petsc'):
-        print('Installing petsc...')
-        petsc_installer = PETScInstaller(config_path=config_path)
-        petsc_installer.install()
-        print('...done')
-
-    if config.getboolean('optional', 'slepc'):
-        print('Installing slepc...')
-        slepc_installer = SLEPcInstaller(config_path=config_path)
-        slepc_installer.install()
-        print('...done')
-
-    print('Installing BOUT++...')
-    boutpp_installer = BOUTPPInstaller(config_path=config_path)
-    boutpp_installer.install()
-    print('...done')
 
     final_str += (f'export PATH="'
                   f'{boutpp_installer.local_dir.joinpath("bin")}:$PATH"\n')
@@ -127,6 +183,404 @@ def install_bout(config_path=None, add_to_bashrc=False):
         print(final_str)
 
 
+def plan_bout(config_path=None, jobs=None, plan_path=None):
+    """
+    Function which shows what install_bout would do, without doing it.
+
+    Every package is listed with the phases which would run or be skipped,
+    the commands which would run, the sizes of the downloads and the
+    durations estimated from the timing report of the previous run.
+    Nothing is downloaded, built or recorded, but the sizes of the sources
+    to download are requested from the servers
+
+    Parameters
+    ----------
+    config_path : None or str or Path
+        Path to the configuration file
+        If None, the default configuration in bout_install.config.ini is
+        used
+    jobs : None or int
+        Number of parallel jobs to use when making.
+        If None, the value from the configuration file is used
+    plan_path : None or str or Path
+        Path to write the plan to as json.
+        If None, the plan is only printed
+
+    Returns
+    -------
+    plan : Plan
+        The plan
+    """
+
+    registry = get_registry(config_path)
+    packages = get_packages(registry.config)
+
+    # The installers read the number of jobs from the configuration
+    if jobs is not None:
+        registry.config['install_options']['jobs'] = str(jobs)
+    graph = get_dependency_graph(packages)
+
+    # The installers would log as if installing, which is misleading
+    installers = {name: registry.get_installer(name) for name in packages}
+    logger = logging.getLogger('bout_install')
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+
+    # The build history is preferred over the previous report, as it is
+    # specific to the versions and options
+    durations = read_durations(get_timing_report_path(registry))
+    predictions = dict()
+    for name, history_durations in get_build_durations(
+            registry,
+            packages,
+            get_build_history(registry.config),
+            get_build_options(registry, packages)).items():
+        for phase, seconds in history_durations.items():
+            durations[(name, phase)] = seconds
+        if len(history_durations) != 0:
+            predictions[name] = sum(history_durations.values())
+    order = Scheduler(graph, priorities=predictions).get_order()
+
+    registry.plan = Plan(durations)
+    try:
+        for name in order:
+            registry.install(name)
+            # Packages found preinstalled are not planned by the installers
+            if name not in registry.plan:
+                registry.plan.add(name,
+                                  installers[name].get_version(),
+                                  None,
+                                  list())
+    finally:
+        logger.setLevel(level)
+
+    print(registry.plan.get_summary())
+    if plan_path is not None:
+        registry.plan.write(plan_path)
+        print(f'Plan written to {plan_path}')
+
+    return registry.plan
+
+
+def fetch_sources(config_path=None):
+    """
+    Function which downloads the sources of BOUT++ and its dependencies.
+
+    The sources are downloaded concurrently into the install directory,
+    without building anything
+
+    Parameters
+    ----------
+    config_path : None or str or Path
+        Path to the configuration file
+        If None, the default configuration in bout_install.config.ini is
+        used
+    """
+
+    registry = get_registry(config_path)
+    packages = get_packages(registry.config)
+
+    print('Fetching sources...')
+    prefetcher = get_prefetcher(registry, packages)
+    prefetcher.fetch()
+    print('...done')
+
+    if registry.source_cache is not None:
+        print(registry.source_cache.get_summary())
+
+
+def create_bundle(bundle_path, config_path=None):
+    """
+    Function which packs the sources of BOUT++ and its dependencies.
+
+    The resulting bundle can be installed with `install_bout` on machines
+    without network access
+
+    Parameters
+    ----------
+    bundle_path : str or Path
+        Path to the bundle to create
+    config_path : None or str or Path
+        Path to the configuration file
+        If None, the default configuration in bout_install.config.ini is
+        used
+    """
+
+    registry = get_registry(config_path)
+    packages = get_packages(registry.config)
+
+    print('Fetching sources...')
+    prefetcher = get_prefetcher(registry, packages)
+    prefetcher.fetch()
+    print('...done')
+
+    print(f'Creating {bundle_path}...')
+    Bundle(bundle_path).create(registry, packages)
+    print('...done')
+
+
+def get_registry(config_path=None):
+    """
+    Returns the installer registry of a run
+
+    Parameters
+    ----------
+    config_path : None or str or Path
+        Path to the configuration file
+        If None, the default configuration in bout_install.config.ini is
+        used
+
+    Returns
+    -------
+    registry : InstallerRegistry
+        The registry of the installers
+    """
+
+    if config_path is None:
+        root_dir = Path(__file__).absolute().parents[1]
+        config_path = root_dir.joinpath('bout_install', 'config.ini')
+
+    return InstallerRegistry(config_path, INSTALLER_CLASSES)
+
+
+def get_timing_report_path(registry):
+    """
+    Returns the path to the timing report of the run
+
+    Parameters
+    ----------
+    registry : InstallerRegistry
+        The registry of the run
+
+    Returns
+    -------
+    report_path : Path
+        Path to the report, given by `timing_report` in the
+        `install_options` section of the configuration.
+        If empty, the report is timing_report.json in the .bout_install
+        directory of local_dir
+    """
+
+    report_path = registry.config.get('install_options',
+                                      'timing_report',
+                                      fallback='')
+    if report_path == '':
+        local_dir = registry.get_installer('boutpp').local_dir
+        report_path = local_dir.joinpath('.bout_install',
+                                         'timing_report.json')
+
+    return Path(report_path)
+
+
+def write_timing_report(registry):
+    """
+    Writes the timing report of the run
+
+    Parameters
+    ----------
+    registry : InstallerRegistry
+        The registry of the run
+
+    Returns
+    -------
+    report_path : Path
+        Path to the report (see `get_timing_report_path`)
+    """
+
+    report_path = get_timing_report_path(registry)
+    registry.timing_report.write(report_path)
+    return report_path
+
+
+def get_build_options(registry, packages):
+    """
+    Returns the fingerprints of the build options of the packages
+
+    Parameters
+    ----------
+    registry : InstallerRegistry
+        The registry of the run
+    packages : list
+        Names of the packages to install
+
+    Returns
+    -------
+    build_options : dict
+        The fingerprints of the configure (or cmake) options indexed by
+        package name
+    """
+
+    # Installers building with the default options have no extra options
+    return {name: Installer.get_fingerprint(
+                build_options=getattr(registry.get_installer(name),
+                                      'extra_config_options',
+                                      None))
+            for name in packages}
+
+
+def get_build_durations(registry, packages, build_history, build_options):
+    """
+    Returns the durations of the phases of the packages predicted from the
+    build history
+
+    Parameters
+    ----------
+    registry : InstallerRegistry
+        The registry of the run
+    packages : list
+        Names of the packages to install
+    build_history : BuildHistory
+        The history of the earlier builds
+    build_options : dict
+        The fingerprints of the build options indexed by package name (see
+        `get_build_options`)
+
+    Returns
+    -------
+    durations : dict
+        The predicted seconds indexed by phase name, indexed by package name.
+        Empty for packages which have not been built before
+    """
+
+    builds = build_history.read()
+    return {name: build_history.get_durations(
+                name,
+                registry.get_installer(name).get_version(),
+                build_options[name],
+                builds)
+            for name in packages}
+
+
+def get_progress_line(line, progress):
+    """
+    Returns a progress line with the estimated end of the installation
+
+    Parameters
+    ----------
+    line : str
+        The line to print
+    progress : Progress
+        The progress of the installation
+
+    Returns
+    -------
+    line : str
+        The line, followed by the estimate if there is one
+    """
+
+    eta = progress.get_eta()
+    return f'{line} ({eta})' if eta is not None else line
+
+
+def get_prefetcher(registry, packages, pipeline=False):
+    """
+    Returns the prefetcher of the sources of the packages
+
+    Parameters
+    ----------
+    registry : InstallerRegistry
+        The registry of the installers
+    packages : list
+        Names of the packages to install
+    pipeline : bool
+        Whether the sources should also be untarred in the order of packages
+
+    Returns
+    -------
+    prefetcher : Prefetcher
+        The prefetcher
+    """
+
+    max_downloads = registry.config.get('download_options',
+                                        'max_downloads',
+                                        fallback='')
+    max_downloads = int(max_downloads) if max_downloads != '' else 4
+
+    installers = [registry.get_installer(name) for name in packages]
+
+    return Prefetcher(installers,
+                      max_workers=max_downloads,
+                      pipeline=pipeline)
+
+
+def get_packages(config):
+    """
+    Returns the names of the packages to install
+
+    Parameters
+    ----------
+    config : configparser.ConfigParser
+        The configuration
+
+    Returns
+    -------
+    packages : list
+        Names of the packages to install in a valid sequential order
+    """
+
+    packages = list()
+
+    if config.getboolean('optional', 'gcc'):
+        packages.append('gcc')
+    if config.getboolean('required', 'mpi'):
+        packages.append('mpi')
+    if config.getboolean('optional', 'cmake'):
+        packages.append('cmake')
+    if config.getboolean('optional', 'ffmpeg'):
+        packages.extend(['nasm', 'yasm', 'x264', 'ffmpeg'])
+    if config.getboolean('required', 'fftw'):
+        packages.append('fftw')
+    if config.getboolean('required', 'hdf5'):
+        packages.append('hdf5')
+    if config.getboolean('required', 'netcdf'):
+        packages.extend(['netcdf', 'netcdf_cxx'])
+    if config.getboolean('optional', 'sundials'):
+        packages.append('sundials')
+    # NOTE: SLEPc installs PETSc, so we add it as a separate node in order
+    #       to let it be scheduled independently
+    if config.getboolean('optional', 'petsc') or \
+            config.getboolean('optional', 'slepc'):
+        packages.append('petsc')
+    if config.getboolean('optional', 'slepc'):
+        packages.append('slepc')
+    packages.append('boutpp')
+
+    return packages
+
+
+def get_dependency_graph(packages):
+    """
+    Returns the dependency graph of the packages
+
+    The graph is derived from the `dependencies` attribute of the installer
+    classes.
+    Dependencies which are not installed in this run are left out, and all
+    the packages are made dependent on gcc if gcc is installed
+
+    Parameters
+    ----------
+    packages : list
+        Names of the packages to install
+
+    Returns
+    -------
+    graph : dict
+        Dictionary with the package names as keys and a list of the names of
+        the packages it depends on as values
+    """
+
+    graph = dict()
+    for name in packages:
+        dependencies = [dependency
+                        for dependency in INSTALLER_CLASSES[name].dependencies
+                        if dependency in packages]
+        if 'gcc' in packages and name != 'gcc':
+            dependencies.insert(0, 'gcc')
+        graph[name] = dependencies
+
+    return graph
+
+
 def add_str_to_bashrc(bashrc_str):
     """
     Adds the bashrc_str to .bashrc
@@ -151,46 +605,150 @@ def add_str_to_bashrc(bashrc_str):
         f.write(bashrc_str)
 
 
-def get_args():
+def add_common_arguments(parser, config_path, suppress_defaults=False):
     """
-    Returns the argument from the argument parser
+    Adds the arguments common to all commands to a parser
 
-    Returns
-    -------
-    config_path : None or str or Path
-        Path to the configuration file
-        If None, the default configuration in bout_install.config.ini is
-        used
-    add_to_bashrc : bool
-        Whether or not to add binaries and library path of the dependencies
-        to .bashrc
+    Parameters
+    ----------
+    parser : argparse.ArgumentParser
+        The parser to add the arguments to
+    config_path : Path
+        The default configuration file
+    suppress_defaults : bool
+        Whether to suppress the defaults.
+        Used for the sub-commands, so that they don't override arguments
+        given prior to the sub-command
     """
 
-    root_dir = Path(__file__).absolute().parents[1]
-    config_path = root_dir.joinpath('bout_install', 'config.ini')
-
-    parser = \
-        argparse.ArgumentParser(description='Install BOUT++ with dependencies')
+    def default(value):
+        return argparse.SUPPRESS if suppress_defaults else value
 
     parser.add_argument('-c',
                         '--config',
                         help=f'Path to the configuration file. '
                              f'Default is {config_path}',
-                        default=str(config_path))
+                        default=default(str(config_path)))
     parser.add_argument('-a',
                         '--add_to_bashrc',
                         help='If set, paths to binaries and libraries of '
                              'dependencies will be added to .bashrc. '
                              'Default is false',
                         action='store_true',
-                        default=False)
+                        default=default(False))
+    parser.add_argument('-j',
+                        '--jobs',
+                        help='Number of parallel jobs to use when making. '
+                             'Default is the value of jobs in the '
+                             'configuration file, or the number of available '
+                             'cores if not set',
+                        type=int,
+                        default=default(None))
+    parser.add_argument('-w',
+                        '--workers',
+                        help='Maximum number of packages to build '
+                             'concurrently. Default is the value of workers '
+                             'in the configuration file',
+                        type=int,
+                        default=default(None))
+
+
+def get_args(argv=None):
+    """
+    Returns the arguments from the argument parser
+
+    Parameters
+    ----------
+    argv : None or list
+        The arguments to parse.
+        If None, the arguments are taken from sys.argv
 
-    args = parser.parse_args()
+    Returns
+    -------
+    args : argparse.Namespace
+        The arguments with the attributes
+        command : str
+            The command to run, either `install` (default), `plan`, `fetch`
+            or `bundle`
+        bundle_command : str
+            The bundle command to run, either `create` or `install`.
+            Only set for the `bundle` command
+        bundle : Path
+            Path to the bundle. Only set for the `bundle` command
+        output : None or Path
+            Path to write the plan to. Only set for the `plan` command
+        config : Path
+            Path to the configuration file
+        add_to_bashrc : bool
+            Whether or not to add binaries and library path of the
+            dependencies to .bashrc
+        jobs : None or int
+            Number of parallel jobs to use when making
+        workers : None or int
+            Maximum number of packages to build concurrently
+    """
 
-    config_path = Path(args.config).absolute()
-    add_to_bashrc = args.add_to_bashrc
+    root_dir = Path(__file__).absolute().parents[1]
+    config_path = root_dir.joinpath('bout_install', 'config.ini')
 
-    return config_path, add_to_bashrc
+    parser = \
+        argparse.ArgumentParser(description='Install BOUT++ with dependencies')
+    add_common_arguments(parser, config_path)
+
+    subparsers = parser.add_subparsers(dest='command', title='commands')
+    install_parser = \
+        subparsers.add_parser('install',
+                              help='Install BOUT++ and its dependencies. '
+                                   'This is the default command')
+    add_common_arguments(install_parser, config_path, suppress_defaults=True)
+    plan_parser = \
+        subparsers.add_parser('plan',
+                              help='Show what would be installed, how and how '
+                                   'long it is estimated to take, without '
+                                   'installing')
+    plan_parser.add_argument('-o',
+                             '--output',
+                             help='Path to write the plan to as json')
+    add_common_arguments(plan_parser, config_path, suppress_defaults=True)
+    fetch_parser = \
+        subparsers.add_parser('fetch',
+                              help='Download the sources of BOUT++ and its '
+                                   'dependencies without installing')
+    add_common_arguments(fetch_parser, config_path, suppress_defaults=True)
+    bundle_parser = \
+        subparsers.add_parser('bundle',
+                              help='Pack the sources into one archive, or '
+                                   'install from such an archive without '
+                                   'network access')
+    bundle_subparsers = bundle_parser.add_subparsers(dest='bundle_command',
+                                                     title='bundle commands')
+    # NOTE: The required keyword of add_subparsers requires python 3.7
+    bundle_subparsers.required = True
+    bundle_create_parser = \
+        bundle_subparsers.add_parser('create',
+                                     help='Download the sources and pack '
+                                          'them into a bundle')
+    bundle_install_parser = \
+        bundle_subparsers.add_parser('install',
+                                     help='Install BOUT++ and its '
+                                          'dependencies from a bundle')
+    for bundle_subparser in (bundle_create_parser, bundle_install_parser):
+        bundle_subparser.add_argument('bundle', help='Path to the bundle')
+        add_common_arguments(bundle_subparser,
+                             config_path,
+                             suppress_defaults=True)
+
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        args.command = 'install'
+    args.config = Path(args.config).absolute()
+    if args.command == 'bundle':
+        args.bundle = Path(args.bundle).absolute()
+    if args.command == 'plan' and args.output is not None:
+        args.output = Path(args.output).absolute()
+
+    return args
 
 
 def bout_install_command_line():
@@ -199,5 +757,19 @@ def bout_install_command_line():
 
     Can be used for command line interface
     """
-    config_path, add_to_bashrc = get_args()
-    install_bout(config_path, add_to_bashrc=add_to_bashrc)
+
+    args = get_args()
+
+    if args.command == 'plan':
+        plan_bout(args.config, jobs=args.jobs, plan_path=args.output)
+    elif args.command == 'fetch':
+        fetch_sources(args.config)
+    elif args.command == 'bundle' and args.bundle_command == 'create':
+        create_bundle(args.bundle, args.config)
+    else:
+        install_bout(args.config,
+                     add_to_bashrc=args.add_to_bashrc,
+                     jobs=args.jobs,
+                     workers=args.workers,
+                     bundle_path=args.bundle
+                     if args.command == 'bundle' else None)
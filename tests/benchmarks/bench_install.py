@@ -0,0 +1,462 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks of the installers on synthetic packages served locally
+
+Run with
+
+    python -m tests.benchmarks.bench_install --history benchmarks.jsonl
+
+The packages are generated (see `tests.benchmarks.synthetic`) and served by
+a local http server, so that only the overhead of bout_install and the
+controlled work of the packages are measured
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import platform
+import shutil
+import statistics
+import subprocess
+import time
+from pathlib import Path
+from bout_install.Installer import Installer
+from bout_install.InstallerUsingCMake import InstallerUsingCMake
+from bout_install.InstallerUsingGit import InstallerUsingGit
+from tests.benchmarks.synthetic import get_cmake_files
+from tests.benchmarks.synthetic import get_configure_files
+from tests.benchmarks.synthetic import make_synthetic_repository
+from tests.benchmarks.synthetic import make_synthetic_tar_file
+from tests.utils import BaseTestSetup
+from tests.utils import LocalServer
+
+KINDS = ('configure', 'cmake', 'git')
+
+# Phases running the build of the package rather than bout_install itself
+BUILD_PHASES = ('configure', 'make', 'install', 'test')
+
+# Phases transferring the source
+TRANSFER_PHASES = ('download', 'untar', 'clone')
+
+
+class Benchmark(object):
+    """
+    Class for timing installations of synthetic packages
+
+    Each package is installed twice in a fresh installation directory: a
+    cold installation building the package, and a warm one finding it up to
+    date.
+
+    Examples
+    --------
+    >>> from tests.benchmarks.bench_install import Benchmark
+    >>>
+    >>> benchmark = Benchmark(sleep=0.0, cpu=0)
+    >>> benchmark.start()
+    >>> result = benchmark.run('configure', n_files=100, file_size=1024)
+    >>> benchmark.stop()
+    """
+
+    def __init__(self, sleep=0.0, cpu=0):
+        """
+        Sets the work done by the packages
+
+        Parameters
+        ----------
+        sleep : float
+            Seconds each build step of the packages sleeps
+        cpu : int
+            Iterations of the busy loop of each build step (see
+            `tests.benchmarks.synthetic.get_busy_loop`)
+        """
+
+        self.sleep = sleep
+        self.cpu = cpu
+
+        self.base_setup = BaseTestSetup('benchmark')
+        self.served_dir = self.base_setup.other_dir.joinpath('served')
+        self.server = LocalServer(self.served_dir)
+
+    def start(self):
+        """
+        Starts the server
+        """
+
+        self.served_dir.mkdir(parents=True, exist_ok=True)
+        self.server.start()
+
+    def stop(self):
+        """
+        Stops the server and removes the served packages
+        """
+
+        self.server.stop()
+        shutil.rmtree(self.base_setup.other_dir, ignore_errors=True)
+
+    def make_package(self, kind, n_files, file_size):
+        """
+        Makes a synthetic package and returns where it is served
+
+        Parameters
+        ----------
+        kind : str
+            How the package is built, one of `KINDS`
+        n_files : int
+            Number of data files of the package
+        file_size : int
+            Size of each data file in bytes
+
+        Returns
+        -------
+        url : str
+            The url of the package
+        size : int
+            The size of the served package in bytes
+        """
+
+        dir_name = f'{kind}-{n_files}-{file_size}'
+        if kind == 'cmake':
+            files = get_cmake_files('pkg',
+                                    n_files,
+                                    file_size,
+                                    sleep=self.sleep,
+                                    cpu=self.cpu)
+        else:
+            files = get_configure_files('pkg',
+                                        n_files,
+                                        file_size,
+                                        sleep=self.sleep,
+                                        cpu=self.cpu)
+
+        if kind == 'git':
+            file_name = f'{dir_name}.git'
+            path = self.served_dir.joinpath(file_name)
+            if path.is_dir():
+                size = sum(p.stat().st_size
+                           for p in path.rglob('*') if p.is_file())
+            else:
+                size = make_synthetic_repository(path, files)
+        else:
+            file_name = f'{dir_name}.tar.gz'
+            path = self.served_dir.joinpath(file_name)
+            if path.is_file():
+                size = path.stat().st_size
+            else:
+                size = make_synthetic_tar_file(path, dir_name, files)
+
+        return f'{self.server.url}/{file_name}', size
+
+    def get_installer(self, kind):
+        """
+        Returns an installer of the synthetic package in a fresh directory
+
+        Parameters
+        ----------
+        kind : str
+            How the package is built, one of `KINDS`
+
+        Returns
+        -------
+        installer : Installer
+            The installer
+        file_from_make : Path
+            The file made by the package
+        """
+
+        self.base_setup.set_up()
+        config_path = self.base_setup.test_config_ini_path
+        log_path = self.base_setup.main_dir.joinpath('benchmark.log')
+
+        if kind == 'git':
+            installer = InstallerUsingGit('pkg',
+                                          'bout_options',
+                                          config_path=config_path,
+                                          log_path=log_path)
+        elif kind == 'cmake':
+            installer = InstallerUsingCMake(config_path=config_path,
+                                            log_path=log_path)
+        else:
+            installer = Installer(config_path=config_path,
+                                  log_path=log_path)
+        installer.setup_install_dirs(main_dir=self.base_setup.main_dir)
+        installer.name = 'pkg'
+
+        if kind == 'git':
+            file_from_make = installer.git_dir.joinpath('built')
+        else:
+            file_from_make = installer.local_dir.joinpath('bin', 'pkg')
+        return installer, file_from_make
+
+    def run(self, kind, n_files, file_size):
+        """
+        Times a cold and a warm installation of a synthetic package
+
+        Parameters
+        ----------
+        kind : str
+            How the package is built, one of `KINDS`
+        n_files : int
+            Number of data files of the package
+        file_size : int
+            Size of each data file in bytes
+
+        Returns
+        -------
+        result : dict
+            The seconds of the cold and warm installation, and of each phase
+            of the cold installation.
+            The overhead is the time of the cold installation not spent in
+            the build of the package, and the throughput is the bytes of
+            source transferred per second
+        """
+
+        url, size = self.make_package(kind, n_files, file_size)
+        installer, file_from_make = self.get_installer(kind)
+        try:
+            start = time.perf_counter()
+            installer.install_package(url, file_from_make)
+            cold = time.perf_counter() - start
+            phases = dict()
+            for record in installer.timing_report.records:
+                phases[record['phase']] = \
+                    phases.get(record['phase'], 0) + record['seconds']
+
+            start = time.perf_counter()
+            installer.install_package(url, file_from_make)
+            warm = time.perf_counter() - start
+        finally:
+            close_logger()
+            self.base_setup.tear_down()
+
+        build = sum(phases.get(phase, 0) for phase in BUILD_PHASES)
+        transfer = sum(phases.get(phase, 0) for phase in TRANSFER_PHASES)
+        return {'kind': kind,
+                'files': n_files,
+                'file_size': file_size,
+                'source_bytes': size,
+                'cold': round(cold, 3),
+                'warm': round(warm, 3),
+                'overhead': round(cold - build, 3),
+                'throughput': round(size / transfer) if transfer > 0 else None,
+                'phases': {phase: round(seconds, 3)
+                           for phase, seconds in phases.items()}}
+
+
+def close_logger():
+    """
+    Removes the handlers the installers added to the logger
+
+    Notes
+    -----
+    Each installer adds a handler, which would otherwise accumulate over the
+    runs
+    """
+
+    logger = logging.getLogger('bout_install')
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def get_median(results):
+    """
+    Returns the median of repeated runs of a scenario
+
+    Parameters
+    ----------
+    results : list of dict
+        The results of the runs (see `Benchmark.run`)
+
+    Returns
+    -------
+    result : dict
+        The result with the median of each timing
+    """
+
+    result = dict(results[0])
+    for key in ('cold', 'warm', 'overhead', 'throughput'):
+        values = [r[key] for r in results if r[key] is not None]
+        result[key] = statistics.median(values) if len(values) != 0 else None
+    phases = {phase for r in results for phase in r['phases']}
+    result['phases'] = {phase: statistics.median(r['phases'].get(phase, 0)
+                                                 for r in results)
+                        for phase in sorted(phases)}
+    result['repeat'] = len(results)
+    return result
+
+
+def get_commit():
+    """
+    Returns the current commit of the repository
+
+    Returns
+    -------
+    commit : None or str
+        The commit hash. None if not in a git repository
+    """
+
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'],
+                              cwd=Path(__file__).parent,
+                              check=True,
+                              capture_output=True,
+                              text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_last_run(history_path):
+    """
+    Returns the last run recorded in the history
+
+    Parameters
+    ----------
+    history_path : Path
+        The history, with one json run per line
+
+    Returns
+    -------
+    run : None or dict
+        The last run. None if the history is empty
+    """
+
+    if not history_path.is_file():
+        return None
+    lines = history_path.read_text().splitlines()
+    return json.loads(lines[-1]) if len(lines) != 0 else None
+
+
+def get_summary(results, last_run=None):
+    """
+    Returns a table of the results
+
+    Parameters
+    ----------
+    results : list of dict
+        The results of the scenarios
+    last_run : None or dict
+        A previous run with the same work of the packages to compare the
+        cold installations with
+
+    Returns
+    -------
+    summary : str
+        The table
+    """
+
+    previous = dict()
+    if last_run is not None:
+        for result in last_run['results']:
+            key = (result['kind'], result['files'], result['file_size'])
+            previous[key] = result
+
+    lines = [f'{"Kind":<10}{"Files":>7}{"Bytes":>11}{"Cold":>9}'
+             f'{"Warm":>9}{"Overhead":>10}{"MB/s":>8}{"Change":>9}']
+    for result in results:
+        key = (result['kind'], result['files'], result['file_size'])
+        throughput = result['throughput']
+        throughput = f'{throughput / 1e6:.1f}' if throughput else '-'
+        change = '-'
+        if key in previous and previous[key]['cold'] > 0:
+            ratio = result['cold'] / previous[key]['cold']
+            change = f'{100 * (ratio - 1):+.0f}%'
+        lines.append(f'{result["kind"]:<10}'
+                     f'{result["files"]:>7}'
+                     f'{result["source_bytes"]:>11}'
+                     f'{result["cold"]:>9.3f}'
+                     f'{result["warm"]:>9.3f}'
+                     f'{result["overhead"]:>10.3f}'
+                     f'{throughput:>8}'
+                     f'{change:>9}')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """
+    Runs the benchmarks
+
+    Parameters
+    ----------
+    argv : None or list of str
+        The command line arguments. If None, sys.argv is used
+
+    Returns
+    -------
+    run : dict
+        The results and parameters of the run
+    """
+
+    parser = argparse.ArgumentParser(
+        description='Benchmark bout_install on synthetic packages')
+    parser.add_argument('--kinds',
+                        nargs='+',
+                        choices=KINDS,
+                        default=list(KINDS),
+                        help='How the packages are built. Default is all')
+    parser.add_argument('--files',
+                        nargs='+',
+                        type=int,
+                        default=[10, 100, 1000],
+                        help='Numbers of files of the packages. '
+                             'Default is 10 100 1000')
+    parser.add_argument('--file_size',
+                        type=int,
+                        default=4096,
+                        help='Size of the files in bytes. Default is 4096')
+    parser.add_argument('--sleep',
+                        type=float,
+                        default=0.0,
+                        help='Seconds each build step sleeps. Default is 0')
+    parser.add_argument('--cpu',
+                        type=int,
+                        default=0,
+                        help='Iterations of the busy loop of each build '
+                             'step. Default is 0')
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=3,
+                        help='Number of runs of each scenario, of which the '
+                             'median is reported. Default is 3')
+    parser.add_argument('--history',
+                        help='Path to a json lines file the run is appended '
+                             'to and compared with')
+    args = parser.parse_args(argv)
+
+    run = {'started': datetime.datetime.now().isoformat(timespec='seconds'),
+           'commit': get_commit(),
+           'python': platform.python_version(),
+           'platform': platform.platform(),
+           'sleep': args.sleep,
+           'cpu': args.cpu,
+           'results': list()}
+
+    benchmark = Benchmark(sleep=args.sleep, cpu=args.cpu)
+    benchmark.start()
+    try:
+        for kind in args.kinds:
+            for n_files in args.files:
+                results = [benchmark.run(kind, n_files, args.file_size)
+                           for _ in range(args.repeat)]
+                run['results'].append(get_median(results))
+    finally:
+        benchmark.stop()
+
+    last_run = None
+    if args.history is not None:
+        history_path = Path(args.history)
+        last_run = read_last_run(history_path)
+        if last_run is not None and \
+                (last_run['sleep'], last_run['cpu']) != (args.sleep, args.cpu):
+            last_run = None
+        with history_path.open('a') as f:
+            f.write(json.dumps(run) + '\n')
+
+    print(get_summary(run['results'], last_run))
+    return run
+
+
+if __name__ == '__main__':
+    main()
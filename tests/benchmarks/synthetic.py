@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import random
+import shutil
+import subprocess
+from pathlib import Path
+from tests.utils import make_tar_file
+
+
+def get_busy_loop(cpu):
+    """
+    Returns a shell command keeping one cpu busy
+
+    Parameters
+    ----------
+    cpu : int
+        Number of iterations of the loop. One million iterations take about
+        a second
+
+    Returns
+    -------
+    command : str
+        The command
+    """
+
+    return (f'i=0; while [ $$i -lt {cpu} ]; do i=$$((i+1)); done'
+            if cpu > 0 else 'true')
+
+
+def get_data_files(name, n_files, file_size, seed=0):
+    """
+    Returns the data files of a synthetic package
+
+    Notes
+    -----
+    The content is pseudo random hex digits, so that the files compress
+    like source code rather than to nothing
+
+    Parameters
+    ----------
+    name : str
+        Name of the package
+    n_files : int
+        Number of data files
+    file_size : int
+        Size of each data file in bytes
+    seed : int
+        Seed of the content
+
+    Returns
+    -------
+    files : dict
+        The content of the files indexed by their path
+    """
+
+    rng = random.Random(f'{name}-{seed}')
+    return {f'data/file_{i:05d}.txt':
+            ''.join(rng.choices('0123456789abcdef\n', k=file_size))
+            for i in range(n_files)}
+
+
+def get_configure_files(name, n_files, file_size, sleep=0.0, cpu=0):
+    """
+    Returns the files of a synthetic package built with configure and make
+
+    Notes
+    -----
+    `configure` and `make` each sleep and keep a cpu busy, and `make install`
+    copies the data files and a `bin/<name>` file to the prefix
+
+    Parameters
+    ----------
+    name : str
+        Name of the package
+    n_files : int
+        Number of data files
+    file_size : int
+        Size of each data file in bytes
+    sleep : float
+        Seconds configure and make sleep
+    cpu : int
+        Iterations of the busy loops of configure and make (see
+        `get_busy_loop`)
+
+    Returns
+    -------
+    files : dict
+        The content of the files indexed by their path
+    """
+
+    loop = get_busy_loop(cpu).replace('$$', '$')
+    files = get_data_files(name, n_files, file_size)
+    files['configure'] = ('#!/bin/sh\n'
+                          'echo "PREFIX=${1#--prefix=}" > config.mk\n'
+                          f'sleep {sleep}\n'
+                          f'{loop}\n'
+                          'touch config.log\n')
+    files['Makefile'] = ('include config.mk\n'
+                         'all:\n'
+                         f'\t@sleep {sleep}\n'
+                         f'\t@{get_busy_loop(cpu)}\n'
+                         '\t@touch built\n'
+                         'install:\n'
+                         f'\tmkdir -p $(DESTDIR)$(PREFIX)/bin '
+                         f'$(DESTDIR)$(PREFIX)/share/{name}\n'
+                         f'\tcp -R data/. $(DESTDIR)$(PREFIX)/share/{name}\n'
+                         f'\techo {name} > $(DESTDIR)$(PREFIX)/bin/{name}\n')
+    return files
+
+
+def get_cmake_files(name, n_files, file_size, sleep=0.0, cpu=0):
+    """
+    Returns the files of a synthetic package built with CMake
+
+    Notes
+    -----
+    The project does not use any compiler, the build sleeps and keeps a
+    cpu busy, and the install copies the data files and a `bin/<name>` file
+    to the prefix
+
+    Parameters
+    ----------
+    name : str
+        Name of the package
+    n_files : int
+        Number of data files
+    file_size : int
+        Size of each data file in bytes
+    sleep : float
+        Seconds the build sleeps
+    cpu : int
+        Iterations of the busy loop of the build (see `get_busy_loop`)
+
+    Returns
+    -------
+    files : dict
+        The content of the files indexed by their path
+    """
+
+    loop = get_busy_loop(cpu).replace('$$', '$')
+    files = get_data_files(name, n_files, file_size)
+    files['work.sh'] = ('#!/bin/sh\n'
+                        f'sleep {sleep}\n'
+                        f'{loop}\n'
+                        f'echo {name} > {name}\n')
+    files['CMakeLists.txt'] = (
+        'cmake_minimum_required(VERSION 3.5)\n'
+        f'project({name} NONE)\n'
+        f'add_custom_command(OUTPUT {name}\n'
+        '                   COMMAND ${CMAKE_SOURCE_DIR}/work.sh)\n'
+        f'add_custom_target(work ALL DEPENDS {name})\n'
+        f'install(PROGRAMS ${{CMAKE_BINARY_DIR}}/{name} DESTINATION bin)\n'
+        f'install(DIRECTORY data/ DESTINATION share/{name})\n')
+    return files
+
+
+def make_synthetic_tar_file(tar_path, dir_name, files):
+    """
+    Makes the tar file of a synthetic package
+
+    Parameters
+    ----------
+    tar_path : Path
+        Path to the tar file to make. The compression is given by the suffix
+    dir_name : str
+        Name of the top directory in the tar file
+    files : dict
+        The content of the files indexed by their path relative to dir_name
+
+    Returns
+    -------
+    size : int
+        The size of the tar file in bytes
+    """
+
+    tar_path.parent.mkdir(parents=True, exist_ok=True)
+    make_tar_file(tar_path, dir_name, files)
+    return tar_path.stat().st_size
+
+
+def make_synthetic_repository(repo_path, files):
+    """
+    Makes a bare git repository of a synthetic package
+
+    Notes
+    -----
+    The repository is prepared for the dumb http protocol, so that it can be
+    cloned from a plain http server
+
+    Parameters
+    ----------
+    repo_path : Path
+        Path to the bare repository to make, e.g. `pkg.git`
+    files : dict
+        The content of the files indexed by their path
+
+    Returns
+    -------
+    size : int
+        The size of the repository in bytes
+    """
+
+    work_path = repo_path.parent.joinpath(f'.{repo_path.stem}_work')
+    for name, content in files.items():
+        path = work_path.joinpath(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        if content.startswith('#!'):
+            path.chmod(0o755)
+
+    def git(*args, cwd=work_path):
+        subprocess.run(['git',
+                        '-c', 'user.name=benchmark',
+                        '-c', 'user.email=benchmark@localhost',
+                        *args],
+                       cwd=cwd,
+                       check=True,
+                       stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+
+    git('init', '-b', 'master')
+    git('add', '.')
+    git('commit', '-m', 'Synthetic package')
+    git('clone', '--bare', str(work_path), str(repo_path),
+        cwd=repo_path.parent)
+    git('update-server-info', cwd=repo_path)
+    shutil.rmtree(work_path)
+
+    return sum(path.stat().st_size
+               for path in Path(repo_path).rglob('*') if path.is_file())
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from tests.benchmarks.bench_install import main
+
+
+class TestBenchInstall(unittest.TestCase):
+    @unittest.skipUnless(shutil.which('cmake') and shutil.which('git'),
+                         'requires cmake and git')
+    def test_main(self):
+        """
+        Tests that the smallest scenarios run and are appended to the history
+        """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            history_path = Path(tmp_dir).joinpath('history.jsonl')
+            argv = ['--files', '3',
+                    '--file_size', '64',
+                    '--repeat', '1',
+                    '--history', str(history_path)]
+            with redirect_stdout(io.StringIO()):
+                main(argv)
+            with redirect_stdout(io.StringIO()) as output:
+                run = main(argv)
+            history = [json.loads(line)
+                       for line in history_path.read_text().splitlines()]
+
+        self.assertEqual(len(history), 2)
+        self.assertEqual([result['kind'] for result in run['results']],
+                         ['configure', 'cmake', 'git'])
+        phases = {result['kind']: result['phases']
+                  for result in run['results']}
+        self.assertIn('untar', phases['configure'])
+        self.assertIn('configure', phases['cmake'])
+        self.assertIn('clone', phases['git'])
+        # The second run is compared with the first
+        self.assertIn('%', output.getvalue().splitlines()[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from bout_install.ArtifactCache import ArtifactCache
+
+
+class TestArtifactCache(unittest.TestCase):
+    def setUp(self):
+        """
+        Create a cache and an installation directory in a temporary directory
+        """
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.cache = ArtifactCache(self.tmp_path.joinpath('cache'),
+                                   max_size=2**20)
+
+        self.local_dir = self.tmp_path.joinpath('local')
+        self.local_dir.joinpath('lib').mkdir(parents=True)
+        self.local_dir.joinpath('lib', 'libpkg.so.1').write_text('pkg')
+        os.symlink('libpkg.so.1', self.local_dir.joinpath('lib', 'libpkg.so'))
+
+    def tearDown(self):
+        """
+        Remove the temporary directory
+        """
+
+        self.tmp_dir.cleanup()
+
+    def test_get_put(self):
+        """
+        Tests that stored files and links are unpacked again
+        """
+
+        other_dir = self.tmp_path.joinpath('other')
+
+        self.assertFalse(self.cache.get('key', other_dir))
+        self.cache.put('key', self.local_dir, ['lib/libpkg.so.1',
+                                               'lib/libpkg.so'])
+        self.assertTrue(self.cache.get('key', other_dir))
+
+        self.assertEqual(other_dir.joinpath('lib', 'libpkg.so').read_text(),
+                         'pkg')
+        self.assertTrue(other_dir.joinpath('lib', 'libpkg.so').is_symlink())
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_evict(self):
+        """
+        Tests that the least recently used artifacts are evicted
+        """
+
+        self.cache.put('old', self.local_dir, ['lib/libpkg.so.1'])
+        old_path = self.cache.get_artifact_path('old')
+        os.utime(old_path, (0, 0))
+
+        self.cache.max_size = old_path.stat().st_size * 3 // 2
+        self.cache.put('new', self.local_dir, ['lib/libpkg.so.1'])
+
+        self.assertFalse(old_path.exists())
+        self.assertTrue(self.cache.get_artifact_path('new').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
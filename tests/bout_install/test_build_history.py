@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import tempfile
+import unittest
+from pathlib import Path
+from bout_install.BuildHistory import BuildHistory
+from bout_install.BuildHistory import Progress
+from bout_install.BuildHistory import format_seconds
+from bout_install.TimingReport import TimingReport
+
+
+class TestBuildHistory(unittest.TestCase):
+    def setUp(self):
+        """
+        Create a history in a temporary directory
+        """
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.history_path = Path(self.tmp_dir.name).joinpath('history.json')
+        self.history = BuildHistory(self.history_path, max_builds=2, cores=8)
+
+    def tearDown(self):
+        """
+        Remove the temporary directory
+        """
+
+        self.tmp_dir.cleanup()
+
+    def record(self, version, make_seconds, options='a'):
+        """
+        Record a run building fftw
+        """
+
+        report = TimingReport()
+        start = report.start_time
+        report.record('fftw', version, 'download', 'cached', start, 0.5)
+        report.record('fftw', version, 'configure', 'done', start, 10.0)
+        report.record('fftw', version, 'make', 'done', start, make_seconds)
+        self.history.record(report.records, {'fftw': options})
+
+    def test_record(self):
+        """
+        Test that only the phases which were run are recorded
+        """
+
+        self.record('3.3.6', 30.0)
+
+        builds = self.history.read()
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(builds[0]['cores'], 8)
+        self.assertEqual(builds[0]['options'], 'a')
+        self.assertEqual(builds[0]['phases'],
+                         {'configure': 10.0, 'make': 30.0})
+
+        # Only the most recent builds are kept
+        self.record('3.3.6', 40.0)
+        self.record('3.3.6', 50.0)
+        self.assertEqual([build['phases']['make']
+                          for build in self.history.read()],
+                         [40.0, 50.0])
+
+    def test_predict(self):
+        """
+        Test that the most similar builds are used for the prediction
+        """
+
+        self.assertIsNone(self.history.predict('fftw', '3.3.6'))
+
+        self.record('3.3.6', 30.0)
+        self.record('3.3.6', 50.0)
+        self.record('3.3.7', 100.0)
+        self.record('3.3.6', 1000.0, options='b')
+
+        self.assertEqual(self.history.get_durations('fftw', '3.3.6', 'a'),
+                         {'configure': 10.0, 'make': 40.0})
+        self.assertEqual(self.history.predict('fftw', '3.3.7', 'a'), 110.0)
+        # Other options of the same version are used before other versions
+        self.assertEqual(self.history.predict('fftw', '3.3.6', 'c'), 60.0)
+        self.assertEqual(self.history.predict('fftw', '3.4.0', 'a'), 85.0)
+
+        # Builds on hosts with other core counts are used as a last resort
+        other_host = BuildHistory(self.history_path, cores=64)
+        self.assertEqual(other_host.predict('fftw', '3.3.7', 'a'), 110.0)
+        self.assertIsNone(other_host.predict('petsc', '3.10.0'))
+
+    def test_progress(self):
+        """
+        Test that the remaining time follows the critical path
+        """
+
+        graph = {'mpi': (), 'fftw': (), 'petsc': ('mpi',)}
+        predictions = {'mpi': 60.0, 'fftw': 100.0, 'petsc': 300.0}
+
+        self.assertIsNone(Progress(graph, dict()).get_eta())
+
+        # Sequentially, all the durations add up
+        progress = Progress(graph, predictions, workers=1)
+        self.assertAlmostEqual(progress.get_remaining_seconds(), 460.0)
+
+        # Concurrently, the chain through mpi and petsc dominates
+        progress = Progress(graph, predictions, workers=2)
+        self.assertAlmostEqual(progress.get_remaining_seconds(), 360.0)
+
+        progress.start('mpi')
+        progress.finish('mpi')
+        progress.start('fftw')
+        self.assertAlmostEqual(progress.get_remaining_seconds(), 300.0,
+                               places=1)
+        self.assertIn('(5m 0s left)', progress.get_eta())
+
+    def test_format_seconds(self):
+        """
+        Test that durations are formatted
+        """
+
+        self.assertEqual(format_seconds(5.4), '5s')
+        self.assertEqual(format_seconds(725), '12m 5s')
+        self.assertEqual(format_seconds(3720), '1h 2m')
+
+
+if __name__ == '__main__':
+    unittest.main()
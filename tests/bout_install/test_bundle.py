@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import shutil
+import subprocess
+import unittest
+from bout_install.Bundle import Bundle
+from bout_install.Installer import Installer
+from bout_install.InstallerRegistry import InstallerRegistry
+from bout_install.InstallerUsingGit import InstallerUsingGit
+from tests.utils import BaseTestSetup
+from tests.utils import LocalServer
+from tests.utils import make_tar_file
+
+
+def make_repository(git_dir, files):
+    """
+    Makes a git repository with one commit
+
+    Parameters
+    ----------
+    git_dir : Path
+        The directory of the repository
+    files : dict
+        The content of the files indexed by their names
+    """
+
+    git_dir.mkdir(parents=True)
+    for name, content in files.items():
+        git_dir.joinpath(name).write_text(content)
+    for command in (['git', 'init', '-q'],
+                    ['git', 'add', '.'],
+                    ['git', '-c', 'user.name=test',
+                     '-c', 'user.email=test@example.invalid',
+                     'commit', '-q', '-m', 'Initial commit']):
+        subprocess.run(command, cwd=git_dir, check=True)
+
+
+class PkgInstaller(Installer):
+    """
+    Installer of a package from a tar file
+    """
+
+    name = 'pkg'
+
+    def __init__(self, config_path, log_path=None, registry=None):
+        super().__init__(config_path=config_path,
+                         log_path=log_path,
+                         registry=registry)
+        self.pkg_url = 'http://example.invalid/pkg-1.0.tar.gz'
+
+
+class RepoInstaller(InstallerUsingGit):
+    """
+    Installer of a package from a git repository
+    """
+
+    name = 'repo'
+
+    def __init__(self, config_path, log_path=None, registry=None):
+        super().__init__('repo',
+                         'bout_options',
+                         config_path=config_path,
+                         log_path=log_path,
+                         registry=registry)
+        self.repo_url = 'http://example.invalid/repo.git'
+
+
+class TestBundle(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up global test parameters, and modify config.ini
+        """
+
+        self.base_setup = BaseTestSetup('bundle')
+        self.base_setup.set_up()
+
+        self.registry = \
+            InstallerRegistry(self.base_setup.test_config_ini_path,
+                              {'pkg': PkgInstaller, 'repo': RepoInstaller})
+        self.packages = ['pkg', 'repo']
+
+        self.bundle_path = \
+            self.base_setup.other_dir.joinpath('bout_sources.tar')
+
+    def tearDown(self):
+        """
+        Remove created directories and files, restore config.ini
+        """
+
+        self.base_setup.tear_down()
+
+    def test_create_extract(self):
+        """
+        Test that the sources are restored from the bundle without network
+        """
+
+        pkg = self.registry.get_installer('pkg')
+        tar_file_path = pkg.get_tar_file_path(pkg.pkg_url)
+        make_tar_file(tar_file_path, 'pkg-1.0', {'configure': '#!/bin/sh\n'})
+        content = tar_file_path.read_bytes()
+
+        # And a tar file the build would otherwise download
+        pkg.extra_sources['blas'] = 'http://example.invalid/blas-1.0.tar.gz'
+        blas_path = pkg.get_tar_file_path(pkg.extra_sources['blas'])
+        make_tar_file(blas_path, 'blas-1.0', {'Makefile': 'all:\n'})
+
+        repo = self.registry.get_installer('repo')
+        make_repository(repo.git_dir, {'README': 'repo\n'})
+
+        # With a submodule
+        sub_dir = self.base_setup.other_dir.joinpath('sub')
+        make_repository(sub_dir, {'README': 'sub\n'})
+        for command in (['git', '-c', 'protocol.file.allow=always',
+                         'submodule', '-q', 'add', str(sub_dir), 'sub'],
+                        ['git', '-c', 'user.name=test',
+                         '-c', 'user.email=test@example.invalid',
+                         'commit', '-q', '-m', 'Add submodule']):
+            subprocess.run(command, cwd=repo.git_dir, check=True)
+        shutil.rmtree(sub_dir)
+
+        Bundle(self.bundle_path).create(self.registry, self.packages)
+
+        tar_file_path.unlink()
+        blas_path.unlink()
+        shutil.rmtree(repo.git_dir)
+        self.registry.downloader.offline = True
+
+        Bundle(self.bundle_path).extract(self.registry, self.packages)
+
+        self.assertEqual(tar_file_path.read_bytes(), content)
+        self.assertTrue(blas_path.is_file())
+        self.assertEqual(repo.git_dir.joinpath('README').read_text(),
+                         'repo\n')
+        self.assertEqual(repo.git_dir.joinpath('sub', 'README').read_text(),
+                         'sub\n')
+        pkg.prepare_source(pkg.pkg_url)
+
+    def test_extract_missing(self):
+        """
+        Test that bundles without the sources of a package are rejected
+        """
+
+        pkg = self.registry.get_installer('pkg')
+        make_tar_file(pkg.get_tar_file_path(pkg.pkg_url),
+                      'pkg-1.0',
+                      {'configure': '#!/bin/sh\n'})
+        Bundle(self.bundle_path).create(self.registry, ['pkg'])
+
+        with self.assertRaises(ValueError):
+            Bundle(self.bundle_path).extract(self.registry, self.packages)
+
+    def test_extract_versions(self):
+        """
+        Test that bundles created with other versions are rejected
+        """
+
+        pkg = self.registry.get_installer('pkg')
+        make_tar_file(pkg.get_tar_file_path(pkg.pkg_url),
+                      'pkg-1.0',
+                      {'configure': '#!/bin/sh\n'})
+        Bundle(self.bundle_path).create(self.registry, ['pkg'])
+
+        self.registry.config['versions']['pkg'] = '2.0'
+        with self.assertRaises(ValueError):
+            Bundle(self.bundle_path).extract(self.registry, ['pkg'])
+
+    def test_create_without_tar_files(self):
+        """
+        Test that tar files which were not kept are fetched for the bundle
+        """
+
+        self.registry.config['download_options']['stream_extract'] = 'true'
+        self.registry.config['download_options']['keep_tar_files'] = 'false'
+
+        served_dir = self.base_setup.other_dir.joinpath('served')
+        make_tar_file(served_dir.joinpath('pkg-1.0.tar.gz'),
+                      'pkg-1.0',
+                      {'configure': '#!/bin/sh\n'})
+
+        pkg = self.registry.get_installer('pkg')
+        server = LocalServer(served_dir)
+        server.start()
+        try:
+            pkg.pkg_url = f'{server.url}/pkg-1.0.tar.gz'
+            pkg.prepare_source(pkg.pkg_url)
+            self.assertFalse(pkg.get_tar_file_path(pkg.pkg_url).is_file())
+            Bundle(self.bundle_path).create(self.registry, ['pkg'])
+        finally:
+            server.stop()
+
+        sources = Bundle(self.bundle_path).read_manifest()['sources']
+        self.assertEqual([entry['url'] for entry in sources], [pkg.pkg_url])
+
+
+if __name__ == '__main__':
+    unittest.main()
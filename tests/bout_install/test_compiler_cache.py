@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from bout_install.CompilerCache import CompilerCache
+
+
+class TestCompilerCache(unittest.TestCase):
+    def setUp(self):
+        """
+        Create a cache in a temporary directory
+        """
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.cache = CompilerCache(self.tmp_path.joinpath('ccache'),
+                                   max_size=2**30)
+
+    def tearDown(self):
+        """
+        Remove the temporary directory
+        """
+
+        self.tmp_dir.cleanup()
+
+    def test_get_environment(self):
+        """
+        Tests that ccache is configured through the environment
+        """
+
+        stats_log_path = self.tmp_path.joinpath('pkg.ccache.log')
+        environment = self.cache.get_environment(stats_log_path)
+
+        self.assertEqual(environment['CCACHE_DIR'],
+                         str(self.tmp_path.joinpath('ccache')))
+        self.assertEqual(environment['CCACHE_MAXSIZE'], f'{2**20}Ki')
+        self.assertEqual(environment['CCACHE_STATSLOG'], str(stats_log_path))
+
+    def test_get_masquerade_dir(self):
+        """
+        Tests that the compiler names are linked to ccache
+        """
+
+        masquerade_dir = self.cache.get_masquerade_dir(('gcc-12',))
+        self.assertEqual(os.readlink(masquerade_dir.joinpath('gcc-12')),
+                         'ccache')
+        self.assertEqual(os.readlink(masquerade_dir.joinpath('gfortran')),
+                         'ccache')
+
+        # Links to another ccache executable are replaced
+        self.cache.executable = '/opt/ccache/bin/ccache'
+        self.cache.get_masquerade_dir()
+        self.assertEqual(os.readlink(masquerade_dir.joinpath('cc')),
+                         '/opt/ccache/bin/ccache')
+
+    def test_collect(self):
+        """
+        Tests that the hits and misses are counted from the stats log
+        """
+
+        stats_log_path = self.tmp_path.joinpath('pkg.ccache.log')
+        stats_log_path.write_text('# a.c\n'
+                                  'direct_cache_hit\n'
+                                  '# b.c\n'
+                                  'preprocessed_cache_hit\n'
+                                  '# c.c\n'
+                                  'cache_miss\n'
+                                  '# d.o\n'
+                                  'called_for_link\n')
+
+        self.cache.collect('pkg', stats_log_path)
+        self.cache.collect('other', self.tmp_path.joinpath('missing.log'))
+
+        self.assertEqual(self.cache.stats, {'pkg': (2, 1)})
+        self.assertFalse(stats_log_path.exists())
+        self.assertIn('pkg: 2 of 3 compilations cached (67%)',
+                      self.cache.get_summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
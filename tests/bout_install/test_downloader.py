@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import tempfile
+import unittest
+from pathlib import Path
+from bout_install.Downloader import Downloader
+from tests.utils import LocalServer
+
+
+class TestDownloader(unittest.TestCase):
+    def setUp(self):
+        """
+        Serve a file from a temporary directory
+        """
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.content = b'0123456789' * 100
+        Path(self.tmp_dir.name).joinpath('file.tar').write_bytes(self.content)
+
+        self.server = LocalServer(self.tmp_dir.name)
+        self.server.start()
+
+        self.downloader = Downloader(timeout=5, pool_size=2)
+
+    def tearDown(self):
+        """
+        Stop the server and remove the temporary directory
+        """
+
+        self.server.stop()
+        self.tmp_dir.cleanup()
+
+    def test_get(self):
+        """
+        Test that files can be downloaded through the session
+        """
+
+        response = self.downloader.get(f'{self.server.url}/file.tar')
+        response.raise_for_status()
+        self.assertEqual(response.content, self.content)
+
+    def test_head(self):
+        """
+        Test that the size can be obtained from a HEAD request
+        """
+
+        response = self.downloader.head(f'{self.server.url}/file.tar')
+        self.assertEqual(int(response.headers['Content-Length']),
+                         len(self.content))
+
+    def test_rank_urls(self):
+        """
+        Test that unhealthy urls are ranked last
+        """
+
+        missing_url = f'{self.server.url}/missing.tar'
+        url = f'{self.server.url}/file.tar'
+        self.assertEqual(self.downloader.rank_urls([missing_url, url]),
+                         [url, missing_url])
+
+    def test_record_throughput(self):
+        """
+        Test that the throughput of the hosts is persisted
+        """
+
+        history_path = Path(self.tmp_dir.name).joinpath('history.json')
+        downloader = Downloader(history_path=history_path)
+
+        response = downloader.get(f'{self.server.url}/file.tar')
+        downloader.record_throughput(response, 2**21, 2.0)
+
+        host = self.server.url.split('://')[1]
+        history = Downloader(history_path=history_path).read_history()
+        self.assertEqual(history[host]['throughput'], 2**20)
+        self.assertEqual(history[host]['downloads'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
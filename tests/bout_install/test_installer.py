@@ -1,9 +1,22 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import _thread
+import os
+import shutil
+import subprocess
+import threading
 import unittest
+from bout_install.CompilerCache import CompilerCache
 from bout_install.Installer import Installer
+from bout_install.Installer import get_compiler_identity
+from bout_install.Installer import read_manifest
+from bout_install.InstallerRegistry import InstallerRegistry
+from bout_install.Plan import Plan
 from tests.utils import BaseTestSetup
+from tests.utils import LocalServer
+from tests.utils import make_package_tar_file
+from tests.utils import make_tar_file
 
 
 class TestInstall(unittest.TestCase):
@@ -71,6 +84,16 @@ class TestInstall(unittest.TestCase):
         self.assertTrue(local_dir.is_dir())
         self.assertTrue(examples_dir.is_dir())
 
+    def test_get_jobs(self):
+        """
+        Tests that the number of parallel jobs is obtained from the config
+        """
+
+        self.assertGreaterEqual(self.installer.get_jobs(), 1)
+
+        self.installer.config['install_options']['jobs'] = '3'
+        self.assertEqual(self.installer.get_jobs(), 3)
+
     def test_get_tar_file(self):
         """
         Tests that the .tar files can be downloaded
@@ -83,6 +106,491 @@ class TestInstall(unittest.TestCase):
         self.installer.get_tar_file(url=self.fftw_url)
         self.assertTrue(tar_file_path.is_file())
 
+    def test_get_tar_file_local(self):
+        """
+        Tests that a download replaces a stale .part file
+        """
+
+        self.installer.setup_install_dirs(main_dir=self.main_dir)
+        self.other_dir.mkdir(parents=True)
+        make_tar_file(self.other_dir.joinpath('pkg-1.0.tar.gz'),
+                      'pkg-1.0',
+                      {'configure': '#!/bin/sh\n'})
+
+        server = LocalServer(self.other_dir)
+        server.start()
+        try:
+            url = f'{server.url}/pkg-1.0.tar.gz'
+            tar_file_path = self.installer.get_tar_file_path(url=url)
+            part_path = tar_file_path.with_name('pkg-1.0.tar.gz.part')
+            part_path.write_bytes(b'stale')
+            self.installer.get_tar_file(url=url)
+        finally:
+            server.stop()
+
+        self.assertFalse(part_path.exists())
+        self.installer.validate_tar_file(tar_file_path)
+
+    def test_source_cache(self):
+        """
+        Tests that downloaded tar files are reused from the source cache
+        """
+
+        self.installer.setup_install_dirs(main_dir=self.main_dir)
+        self.other_dir.mkdir(parents=True)
+        make_tar_file(self.other_dir.joinpath('pkg-1.0.tar.gz'),
+                      'pkg-1.0',
+                      {'configure': '#!/bin/sh\n'})
+
+        server = LocalServer(self.other_dir)
+        server.start()
+        try:
+            url = f'{server.url}/pkg-1.0.tar.gz'
+            self.installer.fetch_source(url)
+        finally:
+            server.stop()
+
+        # The server is gone, so the tar file must come from the cache
+        tar_file_path = self.installer.get_tar_file_path(url=url)
+        tar_file_path.unlink()
+        tar_dir = self.installer.prepare_source(url)
+        self.assertTrue(tar_dir.joinpath('configure').is_file())
+        self.assertEqual(self.installer.source_cache.hits, 1)
+
+    def test_artifact_cache(self):
+        """
+        Tests that installed files are unpacked from the artifact cache
+        """
+
+        self.installer.setup_install_dirs(main_dir=self.main_dir)
+        self.installer.name = 'pkg'
+        url = 'http://example.invalid/pkg-1.0.tar.gz'
+        tar_file_path = self.installer.get_tar_file_path(url=url)
+        make_package_tar_file(tar_file_path, 'pkg-1.0')
+
+        bin_file = self.installer.local_dir.joinpath('bin', 'pkg')
+        self.installer.install_package(url, bin_file)
+        self.assertEqual(self.installer.artifact_cache.stored, 1)
+        self.installer.file_from_make = bin_file
+        self.assertFalse(self.installer.is_source_needed(url))
+
+        # Nothing is built, as neither the source nor the tar file is needed
+        bin_file.unlink()
+        tar_file_path.unlink()
+        self.assertFalse(self.installer.is_source_needed(url))
+        self.installer.install_package(url, bin_file)
+        self.assertEqual(bin_file.read_text(), 'pkg\n')
+        self.assertEqual(self.installer.artifact_cache.hits, 1)
+        # The artifact is unpacked into the staging directory and promoted
+        self.assertEqual(self.installer.promoted_paths, ['bin/pkg'])
+        self.assertFalse(self.installer.get_stage_dir().exists())
+
+    def test_fingerprints(self):
+        """
+        Tests that only the phases with changed inputs are rerun
+        """
+
+        self.installer.setup_install_dirs(main_dir=self.main_dir)
+        self.installer.name = 'pkg'
+        self.installer.artifact_cache = None
+        url = 'http://example.invalid/pkg-1.0.tar.gz'
+        make_package_tar_file(
+            self.installer.get_tar_file_path(url=url),
+            'pkg-1.0',
+            configure_lines=('echo "$@" >> configure.runs',),
+            install_lines=('echo pkg > $(DESTDIR)$(PREFIX)/bin/pkg',
+                           'echo pkg >> make.runs'))
+
+        bin_file = self.installer.local_dir.joinpath('bin', 'pkg')
+        tar_dir = self.installer.install_dir.joinpath('pkg-1.0')
+
+        def get_runs():
+            return tuple(len(tar_dir.joinpath(name).read_text().splitlines())
+                         for name in ('configure.runs', 'make.runs'))
+
+        self.installer.install_package(url, bin_file)
+        self.assertEqual(get_runs(), (1, 1))
+
+        # Nothing runs when nothing changed
+        self.installer.install_package(url, bin_file)
+        self.assertEqual(get_runs(), (1, 1))
+
+        # Changed options rerun configuring and making
+        self.installer.install_package(url,
+                                       bin_file,
+                                       extra_config_option={'enable-x': None})
+        self.assertEqual(get_runs(), (2, 2))
+        self.installer.install_package(url,
+                                       bin_file,
+                                       extra_config_option={'enable-x': None})
+        self.assertEqual(get_runs(), (2, 2))
+
+        # The phases are timed with their status
+        phases = [(record['phase'], record['status'])
+                  for record in self.installer.timing_report.records]
+        self.assertEqual(phases[:5], [('download', 'skipped'),
+                                      ('untar', 'done'),
+                                      ('configure', 'done'),
+                                      ('make', 'done'),
+                                      ('install', 'done')])
+        self.assertEqual(phases[-1], ('install_package', 'skipped'))
+
+    def test_compiler_identity(self):
+        """
+        Tests that compilers installed in local_dir keep the build keys
+        """
+
+        self.installer.setup_install_dirs(main_dir=self.main_dir)
+        self.installer.name = 'pkg'
+        url = 'http://example.invalid/pkg-1.0.tar.gz'
+        bin_dir = self.installer.local_dir.joinpath('bin')
+        self.other_dir.mkdir(parents=True)
+
+        path = os.environ['PATH']
+        os.environ['PATH'] = \
+            f'{self.other_dir}{os.pathsep}{bin_dir}{os.pathsep}{path}'
+        try:
+            build_key = self.installer.get_build_key(url, 'options')
+
+            # Stand-in for the compilers installed by the gcc package
+            bin_dir.mkdir(parents=True)
+            for name in ('cc', 'c++', 'gfortran'):
+                bin_dir.joinpath(name).write_text('#!/bin/sh\necho local\n')
+                bin_dir.joinpath(name).chmod(0o755)
+            self.assertEqual(self.installer.get_build_key(url, 'options'),
+                             build_key)
+
+            # Compilers outside of local_dir are looked up again
+            compiler_path = self.other_dir.joinpath('c++')
+            compiler_path.write_text('#!/bin/sh\necho other\n')
+            compiler_path.chmod(0o755)
+            identity = get_compiler_identity(self.installer.local_dir)
+        finally:
+            os.environ['PATH'] = path
+        self.assertEqual(identity['CXX'],
+                         {'path': str(compiler_path), 'version': 'other'})
+
+    def test_plan_package(self):
+        """
+        Tests that the phases are planned without installing
+        """
+
+        registry = InstallerRegistry(self.config, dict())
+        registry.plan = Plan()
+        installer = Installer(config_path=self.config, registry=registry)
+        installer.setup_install_dirs(main_dir=self.main_dir)
+        installer.name = 'pkg'
+        url = 'http://example.invalid/pkg-1.0.tar.gz'
+        make_package_tar_file(installer.get_tar_file_path(url=url), 'pkg-1.0')
+        bin_file = installer.local_dir.joinpath('bin', 'pkg')
+
+        installer.install_package(url, bin_file)
+        entry = registry.plan.packages[-1]
+        self.assertEqual(entry['status'], 'build')
+        self.assertEqual([(phase['phase'], phase['status'])
+                          for phase in entry['phases']],
+                         [('download', 'skipped'),
+                          ('untar', 'run'),
+                          ('configure', 'run'),
+                          ('make', 'run'),
+                          ('install', 'run'),
+                          ('promote', 'run')])
+        self.assertEqual(entry['phases'][2]['command'],
+                         f'./configure --prefix={installer.local_dir}')
+        # Nothing was untarred, built or recorded
+        self.assertFalse(installer.install_dir.joinpath('pkg-1.0').exists())
+        self.assertEqual(installer.read_install_record(), dict())
+
+        # Once installed, the package is up to date
+        registry.plan = None
+        installer.install_package(url, bin_file)
+        registry.plan = Plan()
+        installer.install_package(url, bin_file)
+        self.assertEqual(registry.plan.packages[-1]['status'], 'up to date')
+
+    def test_build_root(self):
+        """
+        Tests that the sources are built in the build root and removed
+        """
+
+        scratch_dir = self.other_dir.joinpath('scratch')
+        scratch_dir.mkdir(parents=True)
+        config = self.installer.config['install_options']
+        config['build_root'] = \
+            f'{self.other_dir.joinpath("missing")} {scratch_dir}'
+
+        # The build root is skipped if it is too full
+        config['build_root_min_free'] = '1000000T'
+        self.installer.setup_install_dirs(main_dir=self.main_dir)
+        self.assertEqual(self.installer.build_dir,
+                         self.installer.install_dir)
+
+        config['build_root_min_free'] = '0'
+        self.installer.setup_install_dirs(main_dir=self.main_dir)
+        self.assertEqual(self.installer.build_dir.parent, scratch_dir)
+
+        self.installer.name = 'pkg'
+        url = 'http://example.invalid/pkg-1.0.tar.gz'
+        tar_file_path = self.installer.get_tar_file_path(url=url)
+        make_package_tar_file(
+            tar_file_path,
+            'pkg-1.0',
+            install_lines=('cp config.log $(DESTDIR)$(PREFIX)/bin/pkg',))
+
+        bin_file = self.installer.local_dir.joinpath('bin', 'pkg')
+        self.installer.install_package(url, bin_file)
+
+        tar_dir = self.installer.build_dir.joinpath('pkg-1.0')
+        self.assertEqual(bin_file.read_text().strip(), str(tar_dir))
+        self.assertFalse(tar_dir.exists())
+        self.assertTrue(tar_file_path.is_file())
+        fingerprint = \
+            self.installer.get_configure_fingerprint(tar_dir, './configure')
+
+        # The free space is checked again when untarring
+        config['build_root_min_free'] = '1000000T'
+        tar_dir = self.installer.prepare_source(url)
+        self.assertEqual(tar_dir.parent, self.installer.install_dir)
+
+        # The fingerprints do not depend on the build root
+        self.assertEqual(
+            self.installer.get_configure_fingerprint(tar_dir, './configure'),
+            fingerprint)
+
+    def test_stage_install(self):
+        """
+        Tests that only successful installations are promoted
+        """
+
+        self.installer.setup_install_dirs(main_dir=self.main_dir)
+        self.installer.name = 'pkg'
+        self.installer.artifact_cache = None
+        self.other_dir.mkdir(parents=True)
+        self.other_dir.joinpath('Makefile').write_text(
+            'all:\n'
+            'install:\n'
+            f'\tmkdir -p $(DESTDIR){self.installer.local_dir}/lib\n'
+            f'\techo pkg > $(DESTDIR){self.installer.local_dir}/lib/libpkg\n'
+            '\ttest ! -e fail\n')
+
+        lib_file = self.installer.local_dir.joinpath('lib', 'libpkg')
+        stage_dir = self.installer.get_stage_dir()
+
+        # The installation fails after installing the file
+        fail_path = self.other_dir.joinpath('fail')
+        fail_path.touch()
+        with self.assertRaises(subprocess.CalledProcessError):
+            self.installer.run_make(self.other_dir, lib_file, False)
+        self.assertFalse(lib_file.exists())
+
+        fail_path.unlink()
+        self.installer.run_make(self.other_dir, lib_file, False)
+        self.assertEqual(lib_file.read_text(), 'pkg\n')
+        self.assertFalse(stage_dir.exists())
+        self.assertEqual(self.installer.promoted_paths, ['lib/libpkg'])
+
+    def test_promote_stage(self):
+        """
+        Tests that conflicts are found before promoting, and that an
+        interrupted promotion is finished
+        """
+
+        self.installer.setup_install_dirs(main_dir=self.main_dir)
+        self.installer.name = 'pkg'
+        local_dir = self.installer.local_dir
+        staged_dir = self.installer.get_stage_dir().joinpath(
+            local_dir.relative_to('/'))
+        staged_dir.joinpath('lib').mkdir(parents=True)
+        staged_dir.joinpath('lib', 'libpkg').write_text('pkg\n')
+        staged_dir.joinpath('lib64').symlink_to('lib')
+
+        # A link can not replace a directory, and nothing is moved
+        local_dir.joinpath('lib64').mkdir()
+        with self.assertRaises(FileExistsError):
+            self.installer.promote_stage()
+        self.assertFalse(local_dir.joinpath('lib', 'libpkg').exists())
+        record = self.installer.read_install_record()
+        self.assertIsNone(record.get('promoting'))
+
+        # The files left in the staging directory are promoted
+        local_dir.joinpath('lib64').rmdir()
+        self.installer.update_install_record(
+            promoting=str(self.installer.get_stage_dir()))
+        self.installer.resume_promotion()
+        self.assertEqual(local_dir.joinpath('lib64', 'libpkg').read_text(),
+                         'pkg\n')
+        self.assertFalse(self.installer.get_stage_dir().exists())
+        self.assertIsNone(self.installer.read_install_record()['promoting'])
+
+    def test_run_subprocess(self):
+        """
+        Tests that the output is logged per phase, and the tail reported
+        """
+
+        self.installer.setup_install_dirs(main_dir=self.main_dir)
+        self.installer.name = 'pkg'
+        self.installer.config['install_options']['log_tail_lines'] = '3'
+        self.other_dir.mkdir(parents=True)
+        self.other_dir.joinpath('Makefile').write_text(
+            'all:\n'
+            '\t@seq 1000\n'
+            '\t@test ! -e fail\n')
+
+        with self.installer.phase('make'):
+            self.installer.run_subprocess('make', self.other_dir)
+        log_path = self.installer.get_phase_log_path('make')
+        self.assertEqual(log_path.read_text().splitlines()[1:],
+                         [str(i) for i in range(1, 1001)])
+
+        self.other_dir.joinpath('fail').touch()
+        with self.installer.phase('make'):
+            with self.assertRaises(subprocess.CalledProcessError) as context:
+                self.installer.run_subprocess('make', self.other_dir)
+        # The last lines are the output and the error of make
+        tail = context.exception.stdout.splitlines()
+        self.assertEqual(len(tail), 3)
+        self.assertEqual(tail[:2], ['999', '1000'])
+
+        # The log is appended to within one run
+        self.assertEqual(log_path.read_text().count('$ make'), 2)
+
+        # The exit status of the command is reported
+        self.other_dir.joinpath('fail.sh').write_text('exit 3\n')
+        with self.installer.phase('make'):
+            with self.assertRaises(subprocess.CalledProcessError) as context:
+                self.installer.run_subprocess('sh fail.sh', self.other_dir)
+        self.assertEqual(context.exception.returncode, 3)
+
+    def test_run_subprocess_interrupt(self):
+        """
+        Tests that an interrupted command is killed and reaped
+        """
+
+        self.installer.setup_install_dirs(main_dir=self.main_dir)
+        self.installer.name = 'pkg'
+        self.other_dir.mkdir(parents=True)
+        self.other_dir.joinpath('loop.sh').write_text(
+            'echo $$ > pid\n'
+            'while true; do echo running; sleep 0.1; done\n')
+
+        timer = threading.Timer(0.5, _thread.interrupt_main)
+        timer.start()
+        with self.assertRaises(KeyboardInterrupt):
+            self.installer.run_subprocess('sh loop.sh', self.other_dir)
+        timer.join()
+
+        pid = int(self.other_dir.joinpath('pid').read_text())
+        with self.assertRaises(ProcessLookupError):
+            os.kill(pid, 0)
+
+    def test_resource_usage(self):
+        """
+        Tests that the resources used by a phase are recorded
+        """
+
+        self.installer.setup_install_dirs(main_dir=self.main_dir)
+        self.installer.name = 'pkg'
+        self.other_dir.mkdir(parents=True)
+        # Hold 64 MiB in a grandchild of make for a few samples
+        self.other_dir.joinpath('Makefile').write_text(
+            'all:\n'
+            '\t@python3 -c "b = b\'x\' * 2**26; import time; '
+            'time.sleep(0.5)"\n')
+        self.installer.config['install_options'][
+            'resource_sample_interval'] = '0.1'
+
+        with self.installer.phase('make'):
+            self.installer.run_subprocess('make', self.other_dir)
+
+        record = self.installer.timing_report.records[-1]
+        self.assertEqual(record['phase'], 'make')
+        self.assertEqual(record['jobs'], self.installer.jobs)
+        self.assertGreaterEqual(record['max_rss'], 2**26)
+        for key in ('cpu_user', 'cpu_system', 'read_bytes', 'write_bytes'):
+            self.assertIn(key, record)
+
+        # Phases without subprocesses do not report any usage
+        with self.installer.phase('untar'):
+            pass
+        self.assertNotIn('max_rss', self.installer.timing_report.records[-1])
+
+    def test_compiler_cache(self):
+        """
+        Tests that the compilers are found through the masquerade directory
+        """
+
+        self.installer.setup_install_dirs(main_dir=self.main_dir)
+        self.other_dir.mkdir(parents=True)
+
+        # Stand-in for ccache, logging a miss for each compilation and
+        # running the compiler found after the masquerade directory
+        ccache_path = self.other_dir.joinpath('ccache')
+        ccache_path.write_text('#!/bin/sh\n'
+                               'echo cache_miss >> "$CCACHE_STATSLOG"\n'
+                               'PATH="${PATH#*:}" exec "${0##*/}" "$@"\n')
+        ccache_path.chmod(0o755)
+        self.installer.compiler_cache = \
+            CompilerCache(self.main_dir.joinpath('ccache'),
+                          max_size=2**30,
+                          executable=ccache_path)
+
+        environment = self.installer.get_subprocess_environment()
+        # The compilers are left unchanged, as packages record them
+        self.assertEqual(environment.get('CC'), os.environ.get('CC'))
+        masquerade_dir = self.main_dir.joinpath('ccache', 'masquerade')
+        self.assertTrue(environment['PATH'].startswith(f'{masquerade_dir}:'))
+        self.assertEqual(os.readlink(masquerade_dir.joinpath('cc')),
+                         str(ccache_path))
+
+        self.other_dir.joinpath('Makefile').write_text('all:\n'
+                                                       '\t$(CC) --version\n')
+        self.installer.run_subprocess('make', self.other_dir)
+
+        stats_log_path = self.installer.get_compiler_cache_log_path()
+        self.installer.compiler_cache.collect('pkg', stats_log_path)
+        self.assertEqual(self.installer.compiler_cache.stats['pkg'], (0, 1))
+
+    def test_validate_tar_file(self):
+        """
+        Tests that truncated tar files are detected
+        """
+
+        self.other_dir.mkdir(parents=True)
+        tar_file_path = self.other_dir.joinpath('pkg-1.0.tar.gz')
+        make_tar_file(tar_file_path, 'pkg-1.0', {'configure': 'a' * 10000})
+        self.installer.validate_tar_file(tar_file_path)
+
+        content = tar_file_path.read_bytes()
+        tar_file_path.write_bytes(content[:len(content) // 2])
+        for backend in ('auto', 'tarfile'):
+            self.installer.config['install_options']['untar_backend'] = \
+                backend
+            with self.assertRaises(IOError):
+                self.installer.validate_tar_file(tar_file_path)
+
+    def test_validate_tar_file_decompressor(self):
+        """
+        Tests that the decompressors of untar validate the tar files
+        """
+
+        self.other_dir.mkdir(parents=True)
+        tar_path = self.other_dir.joinpath('pkg-1.0.tar')
+        make_tar_file(tar_path, 'pkg-1.0', {'configure': 'a' * 10000})
+
+        for compressor, suffix in (('xz', '.xz'), ('zstd', '.zst')):
+            if shutil.which(compressor) is None:
+                continue
+            tar_file_path = tar_path.with_name(f'{tar_path.name}{suffix}')
+            with tar_path.open('rb') as f, tar_file_path.open('wb') as out:
+                subprocess.run([compressor, '-c'], stdin=f, stdout=out,
+                               check=True)
+            self.installer.validate_tar_file(tar_file_path)
+
+            content = tar_file_path.read_bytes()
+            tar_file_path.write_bytes(content[:len(content) // 2])
+            with self.assertRaises(IOError):
+                self.installer.validate_tar_file(tar_file_path)
+
     def test_untar(self):
         """
         Tests for successful untaring
@@ -98,6 +606,116 @@ class TestInstall(unittest.TestCase):
         tar_dir = self.installer.get_tar_dir(tar_file_path)
         self.assertTrue(tar_dir.is_dir())
 
+    def test_untar_backends(self):
+        """
+        Tests that the decompressors and tarfile untar the same files
+        """
+
+        self.other_dir.mkdir(parents=True)
+        for suffix in ('.gz', '.bz2', '.xz'):
+            tar_file_path = self.other_dir.joinpath(f'pkg-1.0.tar{suffix}')
+            make_tar_file(tar_file_path, 'pkg-1.0', {'configure': 'a' * 1000})
+
+            for backend in ('auto', 'tarfile'):
+                self.installer.config['install_options']['untar_backend'] = \
+                    backend
+                self.installer.untar(tar_file_path)
+                configure = self.other_dir.joinpath('pkg-1.0', 'configure')
+                self.assertEqual(configure.read_text(), 'a' * 1000)
+                configure.unlink()
+
+    def test_untar_patterns(self):
+        """
+        Tests that excluded files are not untarred
+        """
+
+        self.other_dir.mkdir(parents=True)
+        tar_file_path = self.other_dir.joinpath('pkg-1.0.tar.gz')
+        make_tar_file(tar_file_path,
+                      'pkg-1.0',
+                      {'configure': '#!/bin/sh\n',
+                       'doc/manual.pdf': 'manual',
+                       'src/main.c': 'int main;\n'})
+
+        self.installer.untar_excludes = ('doc',)
+        self.installer.untar(tar_file_path)
+
+        tar_dir = self.other_dir.joinpath('pkg-1.0')
+        self.assertTrue(tar_dir.joinpath('configure').is_file())
+        self.assertTrue(tar_dir.joinpath('src', 'main.c').is_file())
+        self.assertFalse(tar_dir.joinpath('doc').exists())
+
+        # The configuration replaces the defaults of the installer
+        self.installer.name = 'pkg'
+        self.installer.config['untar'] = {'pkg_includes': 'src/*.c',
+                                          'pkg_excludes': ''}
+        self.assertEqual(self.installer.get_untar_patterns(),
+                         (('src/*.c',), ()))
+
+    def test_get_tar_dir(self):
+        """
+        Tests that the tar directory is stored in the manifest
+        """
+
+        self.other_dir.mkdir(parents=True)
+        tar_file_path = self.other_dir.joinpath('pkg-1.0.tar.gz')
+        make_tar_file(tar_file_path, 'pkg-1.0', {'configure': '#!/bin/sh\n'})
+
+        tar_dir = self.installer.get_tar_dir(tar_file_path)
+        self.assertEqual(tar_dir, self.other_dir.joinpath('pkg-1.0'))
+        self.assertEqual(read_manifest(tar_file_path)['tar_dir'], 'pkg-1.0')
+
+        # The tar file is not read again if unchanged
+        stat = tar_file_path.stat()
+        tar_file_path.write_bytes(b'\0' * stat.st_size)
+        os.utime(tar_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(self.installer.get_tar_dir(tar_file_path), tar_dir)
+
+        # A replaced tar file is read again
+        make_tar_file(tar_file_path, 'pkg-2.0', {'configure': 'a' * 10000})
+        self.assertEqual(self.installer.get_tar_dir(tar_file_path),
+                         self.other_dir.joinpath('pkg-2.0'))
+
+    def test_prepare_source(self):
+        """
+        Tests that an already downloaded tar file is untarred
+        """
+
+        self.installer.setup_install_dirs(main_dir=self.main_dir)
+        url = 'http://example.invalid/pkg-1.0.tar.gz'
+        tar_file_path = self.installer.get_tar_file_path(url=url)
+
+        make_tar_file(tar_file_path, 'pkg-1.0', {'configure': '#!/bin/sh\n'})
+
+        tar_dir = self.installer.prepare_source(url)
+        expected = self.installer.install_dir.joinpath('pkg-1.0')
+        self.assertEqual(tar_dir, expected)
+        self.assertTrue(tar_dir.joinpath('configure').is_file())
+
+    def test_stream_untar(self):
+        """
+        Tests that a tar file is untarred while downloading
+        """
+
+        self.installer.setup_install_dirs(main_dir=self.main_dir)
+        self.other_dir.mkdir(parents=True)
+        make_tar_file(self.other_dir.joinpath('pkg-1.0.tar.bz2'),
+                      'pkg-1.0',
+                      {'configure': '#!/bin/sh\n'})
+
+        server = LocalServer(self.other_dir)
+        server.start()
+        try:
+            url = f'{server.url}/pkg-1.0.tar.bz2'
+            tar_dir = self.installer.stream_untar(url)
+        finally:
+            server.stop()
+
+        tar_file_path = self.installer.get_tar_file_path(url=url)
+        self.assertTrue(tar_dir.joinpath('configure').is_file())
+        self.assertTrue(tar_file_path.is_file())
+        self.assertEqual(read_manifest(tar_file_path)['tar_dir'], 'pkg-1.0')
+
     def test_configure(self):
         """
         Test for successful configuring
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import unittest
+from bout_install.InstallerRegistry import InstallerRegistry
+from bout_install.main import INSTALLER_CLASSES
+from tests.utils import BaseTestSetup
+
+
+class CountingInstaller(object):
+    """
+    Installer stand-in which counts the number of installations
+    """
+
+    name = 'counting'
+    installs = 0
+
+    def __init__(self, config_path=None, registry=None):
+        self.registry = registry
+
+    def install(self):
+        CountingInstaller.installs += 1
+
+
+class DependentInstaller(CountingInstaller):
+    """
+    Installer stand-in which installs its dependency through the registry
+    """
+
+    name = 'dependent'
+
+    def __init__(self, config_path=None, registry=None):
+        super().__init__(config_path=config_path, registry=registry)
+        self.dependency = registry.get_installer('counting')
+
+    def install(self):
+        self.registry.install('counting')
+
+
+class TestInstallerRegistry(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up global test parameters, and modify config.ini
+
+        A back-up of config.ini is made prior to modification
+        """
+
+        self.base_setup = BaseTestSetup('registry')
+        self.base_setup.set_up()
+
+        # Setup the config path
+        self.config = self.base_setup.test_config_ini_path
+
+        CountingInstaller.installs = 0
+        installer_classes = {'counting': CountingInstaller,
+                             'dependent': DependentInstaller}
+        self.registry = InstallerRegistry(self.config, installer_classes)
+
+    def tearDown(self):
+        """
+        Remove created directories and files, restore config.ini
+        """
+
+        self.base_setup.tear_down()
+
+    def test_get_installer(self):
+        """
+        Test that installers are only created once
+        """
+
+        dependent = self.registry.get_installer('dependent')
+        counting = self.registry.get_installer('counting')
+
+        self.assertIs(dependent.dependency, counting)
+        self.assertIs(self.registry.get_installer('dependent'), dependent)
+
+    def test_install(self):
+        """
+        Test that packages are only installed once
+        """
+
+        self.registry.install('dependent')
+        self.registry.install('counting')
+        self.registry.install('dependent')
+
+        self.assertEqual(CountingInstaller.installs, 1)
+
+    def test_environment(self):
+        """
+        Test that creating the installers leaves the flags of the other
+        packages untouched
+        """
+
+        flags = {variable: os.environ.get(variable)
+                 for variable in ('CPPFLAGS', 'LDFLAGS')}
+        registry = InstallerRegistry(self.config, INSTALLER_CLASSES)
+        netcdf = registry.get_installer('netcdf')
+        fftw = registry.get_installer('fftw')
+
+        self.assertEqual({variable: os.environ.get(variable)
+                          for variable in flags}, flags)
+        include_flag = f'-I{netcdf.local_dir.joinpath("include")}'
+        self.assertIn(include_flag,
+                      netcdf.get_subprocess_environment()['CPPFLAGS'])
+        self.assertNotIn(include_flag,
+                         fftw.get_subprocess_environment().get('CPPFLAGS',
+                                                               ''))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import os
 import re
 import unittest
 import shutil
@@ -8,6 +9,8 @@ import subprocess
 from pathlib import Path
 from bout_install.main import install_bout
 from bout_install.main import add_str_to_bashrc
+from bout_install.main import get_dependency_graph
+from bout_install.main import plan_bout
 from tests.utils import BaseTestSetup
 
 
@@ -86,6 +89,21 @@ class TestMain(unittest.TestCase):
                                 stderr=subprocess.PIPE)
         result.check_returncode()
 
+    def test_plan_jobs(self):
+        """
+        Test that the number of jobs reaches the commands, but not the
+        environment
+        """
+
+        plan = plan_bout(self.config, jobs=3)
+
+        commands = [phase['command']
+                    for entry in plan.packages
+                    for phase in entry['phases']
+                    if phase['phase'] == 'make']
+        self.assertIn('make -j3', commands)
+        self.assertNotIn('BOUT_INSTALL_JOBS', os.environ)
+
 
 class TestMainHelpers(unittest.TestCase):
     def setUp(self):
@@ -125,6 +143,18 @@ class TestMainHelpers(unittest.TestCase):
 
         self.assertEqual(expected, lines[-1])
 
+    def test_get_dependency_graph(self):
+        """
+        Test that the graph is restricted to the installed packages
+        """
+
+        graph = get_dependency_graph(['gcc', 'mpi', 'petsc', 'boutpp'])
+
+        self.assertEqual(graph['gcc'], [])
+        self.assertEqual(graph['mpi'], ['gcc'])
+        self.assertEqual(graph['petsc'], ['gcc', 'mpi'])
+        self.assertEqual(graph['boutpp'], ['gcc', 'mpi', 'petsc'])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from bout_install.Plan import Plan
+
+
+class TestPlan(unittest.TestCase):
+    def setUp(self):
+        """
+        Create a plan with a package to build and one up to date
+        """
+
+        self.plan = Plan(durations={('fftw', 'make'): 30.0})
+        self.plan.add('fftw',
+                      '3.3.6',
+                      'key',
+                      [{'phase': 'download', 'status': 'run', 'bytes': 2048,
+                        'seconds': 1.0},
+                       {'phase': 'configure', 'status': 'run',
+                        'command': './configure --prefix=/local'},
+                       {'phase': 'make', 'status': 'run',
+                        'command': 'make -j8'}])
+        self.plan.add('cmake',
+                      '3.12.3',
+                      None,
+                      [{'phase': 'install_package', 'status': 'skipped'}])
+        self.plan.add('mpi', '3.0.0', None, list())
+
+    def test_add(self):
+        """
+        Tests that the packages and phases are estimated
+        """
+
+        self.assertIn('fftw', self.plan)
+        self.assertEqual(self.plan.build_keys, {'fftw': 'key'})
+        self.assertEqual([entry['status'] for entry in self.plan.packages],
+                         ['build', 'up to date', 'preinstalled'])
+        self.assertEqual([phase['seconds']
+                          for phase in self.plan.packages[0]['phases']],
+                         [1.0, None, 30.0])
+
+        totals = self.plan.get_totals()
+        self.assertEqual(totals['download_bytes'], 2048)
+        self.assertEqual(totals['seconds'], 31.0)
+        self.assertEqual(totals['unestimated'], 1)
+
+    def test_write(self):
+        """
+        Tests that the plan is written as json
+        """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            plan_path = Path(tmp_dir).joinpath('plan.json')
+            self.plan.write(plan_path)
+            plan = json.loads(plan_path.read_text())
+
+        self.assertEqual(len(plan['packages']), 3)
+        self.assertEqual(plan['totals']['packages'],
+                         {'build': 1, 'preinstalled': 1, 'up to date': 1})
+
+    def test_get_summary(self):
+        """
+        Tests that the commands and estimates are shown
+        """
+
+        lines = self.plan.get_summary().splitlines()
+
+        self.assertEqual(lines[0], 'fftw 3.3.6: build')
+        self.assertEqual(lines[1].split(), ['download', 'run', '2.0K', '1s'])
+        self.assertEqual(lines[3], '        $ ./configure --prefix=/local')
+        self.assertEqual(lines[4].split(), ['make', 'run', '30s'])
+        self.assertIn('(and 1 phases without an earlier run)', lines[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from bout_install.Prefetcher import Prefetcher
+
+
+class SourceInstaller(object):
+    """
+    Installer stand-in with sources of known sizes
+    """
+
+    name = 'source'
+
+    def __init__(self, sizes, fetched, extra_sources=None):
+        """
+        Stores the sizes and the list to append the fetched urls to
+
+        Parameters
+        ----------
+        sizes : dict
+            The sizes of the sources indexed by url
+        fetched : list
+            List to append the fetched urls to
+        extra_sources : None or dict
+            The urls of the extra sources indexed by name
+        """
+
+        self.sizes = sizes
+        self.fetched = fetched
+        self.extra_sources = \
+            extra_sources if extra_sources is not None else dict()
+
+    def get_source_urls(self):
+        return list(self.sizes)
+
+    def is_source_needed(self, url):
+        return url != 'installed'
+
+    def get_source_size(self, url):
+        return self.sizes.get(url)
+
+    def fetch_source(self, url):
+        if url == 'broken':
+            raise RuntimeError('Download failed')
+        self.fetched.append(url)
+
+    def prepare_source(self, url):
+        self.fetched.append(f'prepared {url}')
+
+
+class TestPrefetcher(unittest.TestCase):
+    def test_fetch(self):
+        """
+        Test that sources are fetched once, largest first
+        """
+
+        fetched = list()
+        installers = [SourceInstaller({'small': 1, 'large': 100}, fetched),
+                      SourceInstaller({'git': None, 'large': 100}, fetched)]
+
+        Prefetcher(installers, max_workers=1).fetch()
+
+        self.assertEqual(fetched, ['git', 'large', 'small'])
+
+    def test_installed(self):
+        """
+        Test that the sources of installed packages are not fetched
+        """
+
+        fetched = list()
+        installers = [SourceInstaller({'installed': 1},
+                                      fetched,
+                                      {'blas': 'blas.tar.gz'}),
+                      SourceInstaller({'small': 1}, fetched)]
+
+        Prefetcher(installers, max_workers=1, pipeline=True).fetch()
+
+        self.assertEqual(fetched, ['prepared small'])
+
+    def test_pipeline(self):
+        """
+        Test that sources are prepared in the order of the installers
+        """
+
+        fetched = list()
+        installers = [SourceInstaller({'small': 1}, fetched),
+                      SourceInstaller({'large': 100}, fetched)]
+
+        Prefetcher(installers, max_workers=1, pipeline=True).fetch()
+
+        self.assertEqual(fetched, ['prepared small', 'prepared large'])
+
+    def test_extra_sources(self):
+        """
+        Test that the extra sources are downloaded, but not prepared
+        """
+
+        fetched = list()
+        installers = [SourceInstaller({'small': 1},
+                                      fetched,
+                                      {'blas': 'blas.tar.gz'})]
+
+        Prefetcher(installers, max_workers=1, pipeline=True).fetch()
+
+        self.assertEqual(fetched, ['prepared small', 'blas.tar.gz'])
+
+    def test_fetch_error(self):
+        """
+        Test that errors are raised after the other sources are fetched
+        """
+
+        fetched = list()
+        installers = [SourceInstaller({'broken': 100, 'small': 1}, fetched)]
+
+        with self.assertRaises(RuntimeError):
+            Prefetcher(installers, max_workers=1).fetch()
+
+        self.assertEqual(fetched, ['small'])
+
+
+if __name__ == '__main__':
+    unittest.main()
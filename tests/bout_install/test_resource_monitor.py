@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import time
+import unittest
+from pathlib import Path
+from bout_install.ResourceMonitor import ResourceMonitor
+from bout_install.ResourceMonitor import add_usage
+from bout_install.ResourceMonitor import get_process_tree_rss
+
+
+@unittest.skipUnless(Path('/proc/self/stat').is_file(), 'requires /proc')
+class TestResourceMonitor(unittest.TestCase):
+    def test_get_process_tree_rss(self):
+        """
+        Tests that the memory of the descendants is included
+        """
+
+        # A shell holding 64 MiB in a child process
+        process = subprocess.Popen(
+            ['sh', '-c',
+             'python3 -c "b = b\'x\' * 2**26; import sys; '
+             'sys.stdin.read()"'],
+            stdin=subprocess.PIPE)
+        try:
+            with ResourceMonitor(process.pid, interval=0.05) as monitor:
+                # Wait for the child to allocate, and a few samples
+                while (get_process_tree_rss(process.pid) or 0) < 2**26:
+                    time.sleep(0.01)
+                time.sleep(0.2)
+        finally:
+            process.communicate()
+
+        self.assertGreaterEqual(monitor.peak_rss, 2**26)
+        self.assertIsNone(get_process_tree_rss(process.pid))
+        self.assertGreater(get_process_tree_rss(os.getpid()), 0)
+
+    def test_add_usage(self):
+        """
+        Tests that the peak memory is maximized and the rest summed
+        """
+
+        total = dict()
+        add_usage(total, {'cpu_user': 1.0, 'max_rss': 10})
+        add_usage(total, {'cpu_user': 2.0, 'max_rss': 5})
+
+        self.assertEqual(total, {'cpu_user': 3.0, 'max_rss': 10})
+
+
+if __name__ == '__main__':
+    unittest.main()
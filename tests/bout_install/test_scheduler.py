@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import unittest
+from bout_install.Scheduler import Scheduler
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a small dependency graph
+        """
+
+        self.graph = {'gcc': (),
+                      'mpi': ('gcc',),
+                      'fftw': ('gcc',),
+                      'petsc': ('mpi',),
+                      'slepc': ('petsc',),
+                      'boutpp': ('fftw', 'slepc')}
+
+    def test_get_order(self):
+        """
+        Test that the nodes are topologically ordered
+        """
+
+        order = Scheduler(self.graph).get_order()
+        self.assertEqual(order,
+                         ['gcc', 'mpi', 'fftw', 'petsc', 'slepc', 'boutpp'])
+
+    def test_priorities(self):
+        """
+        Test that the ready nodes heading the longest chains are first
+        """
+
+        priorities = {'gcc': 10.0, 'mpi': 20.0, 'fftw': 100.0,
+                      'petsc': 300.0, 'slepc': 50.0, 'boutpp': 200.0}
+        scheduler = Scheduler(self.graph, priorities=priorities)
+
+        self.assertEqual(scheduler.critical_paths['mpi'], 570.0)
+        self.assertEqual(scheduler.critical_paths['fftw'], 300.0)
+        self.assertEqual(scheduler.get_order(),
+                         ['gcc', 'mpi', 'petsc', 'fftw', 'slepc', 'boutpp'])
+
+        started = list()
+        scheduler.run(started.append)
+        self.assertEqual(started, scheduler.get_order())
+
+    def test_invalid_graph(self):
+        """
+        Test that unknown dependencies and cycles are detected
+        """
+
+        with self.assertRaises(ValueError):
+            Scheduler({'petsc': ('mpi',)})
+        with self.assertRaises(ValueError):
+            Scheduler({'mpi': ('petsc',), 'petsc': ('mpi',)})
+
+    def test_run(self):
+        """
+        Test that nodes are run after their dependencies and concurrently
+        """
+
+        lock = threading.Lock()
+        finished = list()
+        running = set()
+        max_running = [0]
+
+        def task(name):
+            with lock:
+                for dependency in self.graph[name]:
+                    self.assertIn(dependency, finished)
+                running.add(name)
+                max_running[0] = max(max_running[0], len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(name)
+                finished.append(name)
+
+        Scheduler(self.graph, max_workers=2).run(task)
+
+        self.assertEqual(sorted(finished), sorted(self.graph))
+        # mpi and fftw are independent, and should be run together
+        self.assertEqual(max_running[0], 2)
+
+    def test_run_error(self):
+        """
+        Test that errors are re-raised and stop the scheduling
+        """
+
+        finished = list()
+
+        def task(name):
+            if name == 'mpi':
+                raise RuntimeError('mpi failed')
+            finished.append(name)
+
+        with self.assertRaises(RuntimeError):
+            Scheduler(self.graph, max_workers=1).run(task)
+
+        self.assertNotIn('petsc', finished)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import tempfile
+import unittest
+from pathlib import Path
+from bout_install.SourceCache import SourceCache
+from bout_install.SourceCache import parse_size
+
+
+def put_sources(cache_dir, tmp_path, worker):
+    """
+    Puts sources into a cache from another process
+
+    Parameters
+    ----------
+    cache_dir : Path
+        The directory of the cache
+    tmp_path : Path
+        Directory to write the sources to
+    worker : int
+        Number of the process
+    """
+
+    cache = SourceCache(cache_dir, max_size=2**20)
+    for i in range(20):
+        source_path = tmp_path.joinpath(f'pkg-{worker}-{i}.tar.gz')
+        source_path.write_bytes(f'{worker} {i}'.encode())
+        cache.put(f'http://example.invalid/{source_path.name}', source_path)
+
+
+class TestSourceCache(unittest.TestCase):
+    def setUp(self):
+        """
+        Create a cache and a source file in a temporary directory
+        """
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.cache = SourceCache(self.tmp_path.joinpath('cache'),
+                                 max_size=250)
+
+        self.url = 'http://example.invalid/pkg-1.0.tar.gz'
+        self.source_path = self.tmp_path.joinpath('pkg-1.0.tar.gz')
+        self.source_path.write_bytes(b'a' * 100)
+
+    def tearDown(self):
+        """
+        Remove the temporary directory
+        """
+
+        self.tmp_dir.cleanup()
+
+    def test_parse_size(self):
+        """
+        Tests that size strings are converted to bytes
+        """
+
+        self.assertEqual(parse_size('0'), 0)
+        self.assertEqual(parse_size('512'), 512)
+        self.assertEqual(parse_size('2K'), 2048)
+        self.assertEqual(parse_size('1.5G'), 3 * 2**29)
+
+    def test_get_put(self):
+        """
+        Tests that stored files are handed out again
+        """
+
+        dest_path = self.tmp_path.joinpath('other', 'pkg-1.0.tar.gz')
+        dest_path.parent.mkdir()
+
+        self.assertFalse(self.cache.get(self.url, dest_path))
+        self.cache.put(self.url, self.source_path)
+        self.assertTrue(self.cache.get(self.url, dest_path))
+
+        self.assertEqual(dest_path.read_bytes(), b'a' * 100)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(self.cache.bytes_saved, 100)
+
+    def test_evict(self):
+        """
+        Tests that the least recently used files are evicted
+        """
+
+        urls = [f'http://example.invalid/pkg-{i}.tar.gz' for i in range(3)]
+        for i, url in enumerate(urls):
+            source_path = self.tmp_path.joinpath(f'pkg-{i}.tar.gz')
+            source_path.write_bytes(bytes([i]) * 100)
+            self.cache.put(url, source_path)
+            if i == 1:
+                # Use the first file, so that the second is the oldest
+                self.cache.get(urls[0], self.tmp_path.joinpath('used'))
+
+        dest_path = self.tmp_path.joinpath('dest')
+        self.assertTrue(self.cache.get(urls[0], dest_path))
+        self.assertFalse(self.cache.get(urls[1], dest_path))
+        self.assertTrue(self.cache.get(urls[2], dest_path))
+
+
+    def test_concurrent_put(self):
+        """
+        Tests that no entry is lost when several processes use the cache
+        """
+
+        cache_dir = self.tmp_path.joinpath('shared')
+        processes = [multiprocessing.Process(target=put_sources,
+                                             args=(cache_dir,
+                                                   self.tmp_path,
+                                                   worker))
+                     for worker in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+
+        cache = SourceCache(cache_dir, max_size=2**20)
+        for worker in range(4):
+            for i in range(20):
+                self.assertTrue(cache.contains(f'http://example.invalid/'
+                                               f'pkg-{worker}-{i}.tar.gz'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from bout_install.TimingReport import TimingReport
+
+
+class TestTimingReport(unittest.TestCase):
+    def setUp(self):
+        """
+        Create a report with phases of two packages
+        """
+
+        self.report = TimingReport()
+        start = self.report.start_time
+        self.report.record('fftw', '3.3.6', 'download', 'cached', start, 0.01)
+        self.report.record('fftw', '3.3.6', 'make', 'done', start, 30.0)
+        self.report.record('petsc', '3.10.0', 'make', 'done', start, 120.0,
+                           cpu_user=900.0, cpu_system=60.0,
+                           max_rss=3 * 2**30, jobs=8)
+        self.report.record('petsc', '3.10.0', 'test', 'failed', start, 5.0)
+
+    def test_write(self):
+        """
+        Tests that the report is written as json
+        """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            report_path = Path(tmp_dir).joinpath('report.json')
+            self.report.write(report_path)
+            report = json.loads(report_path.read_text())
+
+        self.assertEqual(report['packages'], {'fftw': 30.01, 'petsc': 125.0})
+        self.assertEqual(len(report['phases']), 4)
+        self.assertEqual(report['phases'][0],
+                         {'package': 'fftw',
+                          'version': '3.3.6',
+                          'phase': 'download',
+                          'status': 'cached',
+                          'start': 0.0,
+                          'seconds': 0.01})
+        self.assertEqual(report['phases'][2]['max_rss'], 3 * 2**30)
+        self.assertEqual(report['phases'][2]['jobs'], 8)
+
+    def test_get_summary(self):
+        """
+        Tests that the summary is sorted by duration
+        """
+
+        lines = self.report.get_summary().splitlines()
+
+        # The header, three phases and the total
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[1].split(),
+                         ['petsc', 'make', 'done', '120.0', '960.0', '3.0G'])
+        self.assertEqual(lines[3].split(), ['petsc', 'test', 'failed', '5.0'])
+        self.assertTrue(lines[4].startswith('Total'))
+
+
+if __name__ == '__main__':
+    unittest.main()
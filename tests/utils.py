@@ -3,7 +3,12 @@
 
 
 import shutil
+import tarfile
+import threading
 import configparser
+import functools
+from http.server import SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer
 from pathlib import Path
 
 
@@ -49,6 +54,17 @@ class BaseTestSetup(object):
         self.config['install_options']['main_dir'] = str(self.main_dir)
         self.config['bout_options']['git_dir'] = \
             str(self.main_dir.joinpath('BOUT-dev'))
+        # Do not let the tests populate the cache of the user
+        self.config['cache']['source_cache_dir'] = \
+            str(self.main_dir.joinpath('cache'))
+        self.config['cache']['mirror_history'] = \
+            str(self.main_dir.joinpath('mirror_history.json'))
+        self.config['cache']['build_history'] = \
+            str(self.main_dir.joinpath('build_history.json'))
+        self.config['cache']['artifact_cache_dir'] = \
+            str(self.main_dir.joinpath('artifacts'))
+        self.config['cache']['compiler_cache_dir'] = \
+            str(self.main_dir.joinpath('ccache'))
         with self.test_config_ini_path.open('w') as f:
             self.config.write(f)
 
@@ -60,3 +76,141 @@ class BaseTestSetup(object):
         shutil.rmtree(self.main_dir, ignore_errors=True)
         shutil.rmtree(self.other_dir, ignore_errors=True)
         self.test_config_ini_path.unlink()
+
+
+class QuietHTTPRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Request handler which does not log the requests to stderr
+    """
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalServer(object):
+    """
+    A class for serving files from a directory over http
+    """
+
+    def __init__(self, directory):
+        """
+        Sets the directory to serve
+
+        Parameters
+        ----------
+        directory : Path
+            The directory to serve files from
+        """
+
+        self.directory = Path(directory)
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        """
+        Returns the url of the served directory
+
+        Returns
+        -------
+        url : str
+            The url
+        """
+
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """
+        Starts serving in a background thread
+        """
+
+        handler = functools.partial(QuietHTTPRequestHandler,
+                                    directory=str(self.directory))
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the server
+        """
+
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+def make_tar_file(tar_path, dir_name, files):
+    """
+    Makes a tar file containing a single directory
+
+    Parameters
+    ----------
+    tar_path : Path
+        Path to the tar file to make. The compression is given by the suffix
+    dir_name : str
+        Name of the top directory in the tar file
+    files : dict
+        The content of the files indexed by their path relative to dir_name.
+        Files starting with a shebang are made executable
+    """
+
+    source_dir = tar_path.parent.joinpath(f'.{dir_name}_source', dir_name)
+    for name, content in files.items():
+        path = source_dir.joinpath(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        if content.startswith('#!'):
+            path.chmod(0o755)
+
+    mode = {'.gz': 'w:gz', '.bz2': 'w:bz2', '.xz': 'w:xz'}.get(tar_path.suffix,
+                                                              'w')
+    with tarfile.open(tar_path, mode) as tar:
+        tar.add(source_dir, arcname=dir_name)
+
+    shutil.rmtree(source_dir.parent)
+
+
+def make_package_tar_file(tar_path,
+                          dir_name,
+                          configure_lines=(),
+                          install_lines=('echo pkg > '
+                                         '$(DESTDIR)$(PREFIX)/bin/pkg',)):
+    """
+    Makes a tar file of a package installed with configure and make
+
+    Notes
+    -----
+    The configure script writes the prefix to `config.mk` and the build
+    directory to `config.log`.
+    make install creates `$(DESTDIR)$(PREFIX)/bin` before running the
+    install lines
+
+    Parameters
+    ----------
+    tar_path : Path
+        Path to the tar file to make. The compression is given by the suffix
+    dir_name : str
+        Name of the top directory in the tar file
+    configure_lines : tuple of str
+        Additional lines of the configure script
+    install_lines : tuple of str
+        The commands of make install
+    """
+
+    configure = ''.join(f'{line}\n' for line in
+                        ('#!/bin/sh',
+                         'echo "PREFIX=${1#--prefix=}" > config.mk',
+                         *configure_lines,
+                         'pwd > config.log'))
+    makefile = ''.join(f'{line}\n' for line in
+                       ('include config.mk',
+                        'all:',
+                        'install:',
+                        '\tmkdir -p $(DESTDIR)$(PREFIX)/bin',
+                        *(f'\t{line}' for line in install_lines)))
+    make_tar_file(tar_path,
+                  dir_name,
+                  {'configure': configure, 'Makefile': makefile})